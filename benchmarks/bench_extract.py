@@ -0,0 +1,97 @@
+"""
+图片页面relay数据提取的微基准：字节扫描快速路径 vs BeautifulSoup
+
+用法(在仓库根目录运行，也可以直接 python benchmarks/bench_extract.py):
+    # 先保存样本页面
+    python -m benchmarks.bench_extract --save samples 1145814330195049890 68748481160
+    # 对保存的页面做对比
+    python -m benchmarks.bench_extract samples/*.html
+    # 没有样本时使用合成页面
+    python -m benchmarks.bench_extract
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+if not __package__:
+    # 以 python benchmarks/xxx.py 直接运行时，把仓库根目录加入导入路径
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pin.extract import extract_pin_data_fast, extract_pin_data_soup
+
+
+def synthetic_page(n_scripts=200, payload_kb=400):
+    """生成与真实图片页面体量相近的合成页面"""
+    filler = ''.join(
+        f'<div class="x{i}"><script type="application/json">{{"k": {i}, "v": "{"x" * 200}"}}</script></div>'
+        for i in range(n_scripts)
+    )
+    pin = {'entityId': '1', 'title': 't', 'blob': 'y' * (payload_kb * 1024)}
+    relay = json.dumps({'response': {'data': {'v3GetPinQuery': {'data': pin}}}})
+    return (
+        f'<!DOCTYPE html><html><head><title>pin</title></head><body>{filler}'
+        f'<script data-relay-response="true" type="application/json">{relay}</script>'
+        f'{filler}</body></html>'
+    ).encode('utf-8')
+
+
+def save_samples(directory, pin_ids):
+    """下载图片页面作为样本"""
+    from pin.client import PinterestClient
+
+    os.makedirs(directory, exist_ok=True)
+    with PinterestClient() as client:
+        for pin_id in pin_ids:
+            r = client.request(f"https://www.pinterest.com/pin/{pin_id}/")
+            path = os.path.join(directory, f"{pin_id}.html")
+            with open(path, 'wb') as f:
+                f.write(r.content)
+            print(f"已保存 {path} ({len(r.content) / 1024:.0f} KB)")
+
+
+def bench(func, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page in pages:
+            func(page)
+    return (time.perf_counter() - start) / (repeat * len(pages))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', nargs='*', help='保存的图片页面HTML文件')
+    parser.add_argument('--save', metavar='DIR', help='下载参数中的pin_id到DIR作为样本')
+    parser.add_argument('--repeat', type=int, default=20, help='每个页面重复次数')
+    args = parser.parse_args()
+
+    if args.save:
+        save_samples(args.save, args.pages)
+        return
+
+    if args.pages:
+        pages = []
+        for path in args.pages:
+            with open(path, 'rb') as f:
+                pages.append(f.read())
+    else:
+        print("未指定样本页面，使用合成页面")
+        pages = [synthetic_page()]
+
+    # 两条路径结果必须一致
+    for page in pages:
+        if extract_pin_data_fast(page) != extract_pin_data_soup(page):
+            sys.exit("快速路径与BeautifulSoup的结果不一致")
+
+    size = sum(len(p) for p in pages) / len(pages) / 1024
+    fast = bench(extract_pin_data_fast, pages, args.repeat)
+    soup = bench(extract_pin_data_soup, pages, max(args.repeat // 10, 1))
+    print(f"页面数: {len(pages)}, 平均大小: {size:.0f} KB")
+    print(f"快速路径:      {fast * 1000:8.2f} ms/页")
+    print(f"BeautifulSoup: {soup * 1000:8.2f} ms/页")
+    print(f"加速比:        {soup / fast:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
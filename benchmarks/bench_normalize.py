@@ -0,0 +1,103 @@
+"""
+图片数据规范化的基准：逐条 strptime 的旧实现 vs normalize_pins
+
+用法(在仓库根目录运行，也可以直接 python benchmarks/bench_normalize.py):
+    python -m benchmarks.bench_normalize
+    python -m benchmarks.bench_normalize --pins 100000 --page-size 25
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+if not __package__:
+    # 以 python benchmarks/xxx.py 直接运行时，把仓库根目录加入导入路径
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pin.normalize import normalize_pins, parse_created_at
+
+_DAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def make_fixture(n, seed=0):
+    """生成n条结构与 BoardFeedResource 返回一致的原始图片数据"""
+    rnd = random.Random(seed)
+    pins = []
+    for i in range(n):
+        pins.append({
+            'id': str(100000000000 + i),
+            'images': {
+                '236x': {'url': f'https://i.pinimg.com/236x/{i}.jpg', 'width': 236, 'height': 354},
+                'orig': {'url': f'https://i.pinimg.com/originals/{i}.jpg', 'width': rnd.randint(400, 4000), 'height': rnd.randint(400, 4000)},
+            },
+            'created_at': (
+                f"{rnd.choice(_DAYS)}, {rnd.randint(1, 28):02d} {rnd.choice(_MONTHS)} {rnd.randint(2012, 2024)} "
+                f"{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}:{rnd.randint(0, 59):02d} +0000"
+            ),
+            'dominant_color': '#%06x' % rnd.randint(0, 0xffffff),
+            'aggregate_metadata': {'aggregated_stats': {'saves': rnd.randint(0, 100000)}},
+            'repin_count': rnd.randint(0, 1000),
+            'title': f'title {i}',
+            'auto_alt_text': f'alt text {i}',
+        })
+    return pins
+
+
+def legacy_normalize(batch):
+    """重构前各资源类中重复的规范化代码"""
+    pics_data = []
+    for pic in batch:
+        pics_data.append({
+            'id': pic['id'],
+            'url': pic.get('images', {}).get('orig', {}).get('url', ''),
+            'width': pic.get('images', {}).get('orig', {}).get('width', 0),
+            'height': pic.get('images', {}).get('orig', {}).get('height', 0),
+            'created_at': int(time.mktime(time.strptime(pic.get('created_at', ''), '%a, %d %b %Y %H:%M:%S %z'))) if pic.get('created_at') else 0,
+            'dominant_color': pic.get('dominant_color', ''),
+            'count': {
+                'save': pic.get('aggregate_metadata', {}).get('aggregated_stats', {}).get('saves', 0),
+                'repin': pic.get('repin_count', 0),
+            },
+            'text': {
+                'title': pic.get('title', ''),
+                'auto_alt_text': pic.get('auto_alt_text', ''),
+            }
+        })
+    return pics_data
+
+
+def run(func, pages):
+    start = time.perf_counter()
+    n = 0
+    for page in pages:
+        n += len(func(page))
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pins', type=int, default=100000, help='图片数量')
+    parser.add_argument('--page-size', type=int, default=25, help='每页数量')
+    args = parser.parse_args()
+
+    # 旧实现用 mktime 按本地时区解释时间，在UTC下运行才能逐条对比结果
+    os.environ['TZ'] = 'UTC'
+    time.tzset()
+
+    pins = make_fixture(args.pins)
+    pages = [pins[i:i + args.page_size] for i in range(0, len(pins), args.page_size)]
+    assert normalize_pins(pages[0]) == legacy_normalize(pages[0])
+
+    legacy = run(legacy_normalize, pages)
+    parse_created_at.cache_clear()
+    new = run(normalize_pins, pages)
+    print(f"图片数: {args.pins}, 每页: {args.page_size}")
+    print(f"旧实现:         {legacy:12,.0f} 张/秒")
+    print(f"normalize_pins: {new:12,.0f} 张/秒")
+    print(f"加速比:         {new / legacy:12.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+from .config import CACHE_PATH, CACHE_MAX_BYTES, CACHE_TTL, CACHE_TOUCH_BATCH
+from .utils import logger
+
+
+class ResponseCache:
+    """资源接口响应的磁盘缓存(SQLite)
+
+    以 资源名 + 规范化的请求参数 + bookmark 为键，每个资源可设置不同的过期时间，
+    总大小超过上限时按最近最少使用(LRU)淘汰。命中时只在内存中记录访问时间，
+    攒够 CACHE_TOUCH_BATCH 条或写入、淘汰、关闭时再批量写回，避免每次命中都提交一次事务。
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_bytes: int = CACHE_MAX_BYTES, ttl: Dict[str, float] = None):
+        """
+        初始化缓存
+
+        参数:
+            path: SQLite文件路径
+            max_bytes: 缓存总大小上限(字节)
+            ttl: 各资源的过期时间(秒)，键 default 为默认值；过期时间为0表示不缓存该资源
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = {**CACHE_TTL, **(ttl or {})}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._touched = {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, resource TEXT, body BLOB, size INTEGER, created REAL, accessed REAL)'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)')
+        self._db.commit()
+        self.total_bytes = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def make_key(resource: str, options: Dict[str, Any], source_url: str = None) -> str:
+        """
+        生成缓存键
+
+        参数:
+            resource: 资源名称
+            options: 请求参数(含bookmarks)
+            source_url: 来源页面
+        返回:
+            缓存键
+        """
+        options = dict(options)
+        bookmarks = options.pop('bookmarks', None) or [None]
+        canonical = json.dumps(
+            [resource, options, bookmarks[0], source_url],
+            sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str,
+        )
+        return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+    def ttl_for(self, resource: str) -> float:
+        return self.ttl.get(resource, self.ttl.get('default', 0))
+
+    def get(self, resource: str, key: str) -> Optional[Any]:
+        """
+        读取缓存
+
+        参数:
+            resource: 资源名称
+            key: 缓存键
+        返回:
+            缓存的JSON数据，未命中或已过期时返回None
+        """
+        body = self.get_raw(resource, key)
+        return None if body is None else json.loads(body)
+
+    def get_raw(self, resource: str, key: str) -> Optional[bytes]:
+        """
+        读取缓存的原始JSON文本，由调用方自行解码(例如交给解析执行器)
+
+        参数:
+            resource: 资源名称
+            key: 缓存键
+        返回:
+            解压后的JSON字节串，未命中或已过期时返回None
+        """
+        ttl = self.ttl_for(resource)
+        with self._lock:
+            row = self._db.execute('SELECT body, created, size FROM responses WHERE key = ?', (key,)).fetchone()
+            now = time.time()
+            if row is None or now - row[1] > ttl:
+                if row is not None:
+                    self._touched.pop(key, None)
+                    self._db.execute('DELETE FROM responses WHERE key = ?', (key,))
+                    self._db.commit()
+                    self.total_bytes -= row[2]
+                self.misses += 1
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= CACHE_TOUCH_BATCH:
+                self._flush_touched()
+                self._db.commit()
+            self.hits += 1
+        return zlib.decompress(row[0])
+
+    def _flush_touched(self):
+        """把内存中记录的访问时间写回数据库(调用方持有锁并负责提交)"""
+        if self._touched:
+            self._db.executemany(
+                'UPDATE responses SET accessed = ? WHERE key = ?',
+                [(accessed, key) for key, accessed in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def set(self, resource: str, key: str, data: Any):
+        """
+        写入缓存
+
+        参数:
+            resource: 资源名称
+            key: 缓存键
+            data: JSON数据
+        """
+        if self.ttl_for(resource) <= 0:
+            return
+        body = zlib.compress(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            self._touched.pop(key, None)
+            old = self._db.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses (key, resource, body, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)',
+                (key, resource, body, len(body), now, now),
+            )
+            self.total_bytes += len(body) - (old[0] if old else 0)
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """按LRU淘汰，直到总大小降到上限的90%以下"""
+        target = self.max_bytes * 0.9
+        self._flush_touched()
+        rows = self._db.execute('SELECT key, size FROM responses ORDER BY accessed').fetchall()
+        removed = []
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            removed.append((key,))
+            self.total_bytes -= size
+        self._db.executemany('DELETE FROM responses WHERE key = ?', removed)
+        self.evictions += len(removed)
+        logger.debug(f"缓存淘汰 {len(removed)} 条")
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._touched.clear()
+            self._db.execute('DELETE FROM responses')
+            self._db.commit()
+            self.total_bytes = 0
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._db.commit()
+            self._db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """命中统计"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+            'bytes': self.total_bytes,
+        }
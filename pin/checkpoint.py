@@ -0,0 +1,110 @@
+import json
+import time
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional
+from .config import CHECKPOINT_PATH
+
+
+class CheckpointStore:
+    """分页任务的检查点(SQLite)
+
+    每个分页任务以调用方指定的任务键(如运行器中的 board:画板ID)为键，
+    每消费完一页就保存下一页的bookmark、已获取的条数和页数；
+    任务中断后以同一个键重新运行时从最后保存的bookmark继续，不再重复请求已完成的页面。
+    只有显式传入任务键的分页才读写检查点，普通调用总是从第一页开始。
+    """
+
+    def __init__(self, path: str = CHECKPOINT_PATH):
+        """
+        初始化检查点存储
+
+        参数:
+            path: SQLite文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS checkpoints ('
+            'key TEXT PRIMARY KEY, resource TEXT, options TEXT, bookmark TEXT, '
+            'items INTEGER, pages INTEGER, done INTEGER, updated REAL)'
+        )
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取检查点
+
+        参数:
+            key: 任务键
+        返回:
+            检查点(resource、options、bookmark、items、pages、done、updated)，没有时返回None
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT resource, options, bookmark, items, pages, done, updated FROM checkpoints WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'resource': row[0],
+            'options': json.loads(row[1]),
+            'bookmark': row[2],
+            'items': row[3],
+            'pages': row[4],
+            'done': bool(row[5]),
+            'updated': row[6],
+        }
+
+    def save(self, key: str, resource: str, options: Dict[str, Any], bookmark: Optional[str],
+             items: int, pages: int, done: bool = False):
+        """
+        保存检查点
+
+        参数:
+            key: 任务键
+            resource: 资源名称
+            options: 第一页的请求参数
+            bookmark: 下一页的bookmark
+            items: 已获取的条数
+            pages: 已获取的页数
+            done: 任务是否已完成
+        """
+        with self._lock:
+            self._db.execute(
+                'INSERT OR REPLACE INTO checkpoints (key, resource, options, bookmark, items, pages, done, updated) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, resource, json.dumps(options, ensure_ascii=False, default=str), bookmark,
+                 items, pages, int(done), time.time()),
+            )
+            self._db.commit()
+
+    def delete(self, key: str):
+        """删除一个任务的检查点"""
+        with self._lock:
+            self._db.execute('DELETE FROM checkpoints WHERE key = ?', (key,))
+            self._db.commit()
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """未完成的任务"""
+        with self._lock:
+            keys = [row[0] for row in self._db.execute('SELECT key FROM checkpoints WHERE done = 0 ORDER BY updated')]
+        return [dict(state, key=key) for key in keys if (state := self.load(key))]
+
+    def clear(self):
+        """清空所有检查点"""
+        with self._lock:
+            self._db.execute('DELETE FROM checkpoints')
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -1,8 +1,15 @@
 import httpx
+import time
 from http.cookies import SimpleCookie
-from fake_useragent import UserAgent
+from typing import Any
 from .config import VER
-from .utils import logger
+from .utils import logger, get_user_agent
+from .ratelimit import RateLimiter, endpoint_of
+from .retry import RetryPolicy, decode_json
+from .paginator import build_params
+from .session import SessionKeeper, is_auth_failure, sync_csrf
+from .metrics import Metrics, network_time
+from .hooks import Hooks
 from .subclass.board import Board
 from .subclass.account_boards import AccountBoards
 from .subclass.board_related import BoardRelated
@@ -24,7 +31,7 @@ class PinterestClient:
         'sessionFunnelEventLogged=1'
     )
 
-    def __init__(self, ver_i=2, proxies=None, cookie_file=None, cookie_str=None):
+    def __init__(self, ver_i=2, proxies=None, cookie_file=None, cookie_str=None, limiter=None, retry=None, cache=None, seen=None, checkpoint=None, metrics=None, observers=None):
         """
         初始化Pinterest客户端
 
@@ -33,13 +40,28 @@ class PinterestClient:
             proxies: 代理设置
             cookie_file: cookie文件路径
             cookie_str: cookie字符串
+            limiter: 按接口的限速器，默认新建一个RateLimiter
+            retry: 重试策略，默认新建一个RetryPolicy
+            cache: 资源响应缓存(ResponseCache)，不指定则不缓存
+            seen: 已见图片集合(SeenSet)，指定后图片分页跳过已见过的图片
+            checkpoint: 分页检查点存储(CheckpointStore)，传入 job_key 的分页任务中断后可以从最后的bookmark继续
+            metrics: 请求指标(Metrics)，默认新建一个
+            observers: 请求生命周期观察者(ClientObserver)列表
         """
         self.ver_i = ver_i
         self.proxies = proxies
         self.cookie_file = cookie_file
         self.cookie_str = cookie_str
-        self.ua = UserAgent()
+        self.ua = get_user_agent()
         self.session = None
+        self.limiter = limiter or RateLimiter()
+        self.retry = retry or RetryPolicy()
+        self.cache = cache
+        self.seen = seen
+        self.checkpoint = checkpoint
+        self.keeper = SessionKeeper()
+        self.metrics = metrics or Metrics()
+        self.hooks = Hooks(observers or ())
         self.pic_data = PicData(self)  # 初始化图片数据操作实例
         self.pic_related = PicRelated(self)  # 初始化相关图片操作实例
         self.board = Board(self)  # 初始化画板操作实例
@@ -58,6 +80,125 @@ class PinterestClient:
         if self.session:
             self.session.close()
 
+    def request(self, url, params=None, timeout=60) -> httpx.Response:
+        """
+        发送GET请求
+
+        请求前按接口限速；可重试的失败(429/5xx/超时/网络错误)按重试策略退避后重试。
+
+        参数:
+            url: 请求地址
+            params: 查询参数
+            timeout: 超时(秒)
+        返回:
+            httpx.Response
+        """
+        return self._request(url, params, timeout)
+
+    def get_json(self, url, params=None, timeout=60) -> Any:
+        """
+        发送GET请求并解码JSON
+
+        返回HTML错误页等非JSON内容时同样按重试策略重试。
+
+        参数:
+            url: 请求地址
+            params: 查询参数
+            timeout: 超时(秒)
+        返回:
+            解码后的JSON数据
+        """
+        return self._request(url, params, timeout, decode_json)
+
+    def get_resource(self, url, options, source_url=None) -> Any:
+        """
+        获取资源接口数据
+
+        启用缓存时先按 资源+参数+bookmark 查找，未命中才发送请求。
+
+        参数:
+            url: 资源接口地址
+            options: 资源参数
+            source_url: 来源页面
+        返回:
+            解码后的JSON数据
+        """
+        if self.cache:
+            resource = endpoint_of(url)
+            key = self.cache.make_key(resource, options, source_url)
+            data = self.cache.get(resource, key)
+            if data is not None:
+                return data
+
+        data = self.get_json(url, params=build_params(options, source_url))
+        if self.cache:
+            self.cache.set(resource, key, data)
+        return data
+
+    def _request(self, url, params, timeout, decode=None):
+        """带重试的请求"""
+        endpoint = endpoint_of(url)
+        metrics = self.metrics
+        hooks = self.hooks if self.hooks else None
+        attempt = 0
+        while True:
+            r = None
+            if hooks:
+                contexts = hooks.request(endpoint, url, attempt)
+                sent = time.perf_counter()
+            try:
+                r = self._send(endpoint, url, params, timeout)
+                metrics.response(endpoint, r)
+                if hooks:
+                    hooks.response(endpoint, url, attempt, r.status_code, time.perf_counter() - sent, network_time(r), contexts)
+                self.retry.check(r)
+                if decode:
+                    start = time.perf_counter()
+                    result = decode(r)
+                    seconds = time.perf_counter() - start
+                    metrics.decoded(endpoint, seconds)
+                    if hooks:
+                        hooks.decode(endpoint, 'json', seconds, len(r.content))
+                else:
+                    result = r
+                self.retry.on_success()
+                return result
+            except Exception as e:
+                metrics.failure(endpoint, e, response=r is not None)
+                if hooks and r is None:
+                    hooks.error(endpoint, url, attempt, e, time.perf_counter() - sent, contexts)
+                delay = self.retry.next_delay(e, attempt)
+                if delay is None:
+                    raise
+                metrics.retry(endpoint)
+                attempt += 1
+                if hooks:
+                    hooks.retry(endpoint, url, attempt, delay, e)
+                logger.warning(f"请求失败({e})，{delay:.1f}s 后重试 [{attempt}/{self.retry.max_attempts - 1}]")
+                time.sleep(delay)
+
+    def _send(self, endpoint, url, params, timeout) -> httpx.Response:
+        """发送一次请求，会话失效时刷新会话后重发一次"""
+        # 预热在首次请求时进行，构造客户端时不发出网络请求
+        self.keeper.ensure_sync(self.session)
+        generation = self.keeper.generation
+        r = self._send_once(endpoint, url, params, timeout)
+        if is_auth_failure(r, self.keeper.authenticated) and self.keeper.refresh_sync(self.session, generation):
+            r = self._send_once(endpoint, url, params, timeout)
+        return r
+
+    def _send_once(self, endpoint, url, params, timeout) -> httpx.Response:
+        """限速后发送一次请求，并把结果反馈给限速器"""
+        self.limiter.acquire_sync(endpoint)
+        try:
+            r = self.session.get(url, params=params, timeout=timeout)
+        except httpx.TimeoutException:
+            self.limiter.feedback(endpoint, timeout=True)
+            raise
+        self.limiter.feedback(endpoint, r.status_code)
+        self.keeper.observe(self.session, r)
+        return r
+
     def connect(self):
         """建立连接"""
         # 处理cookie
@@ -111,4 +252,6 @@ class PinterestClient:
             cookies=cookies,
             proxies=self.proxies if self.proxies else None,
             follow_redirects=True
-        )
\ No newline at end of file
+        )
+        # 首次请求前预热会话，获取新的csrftoken
+        sync_csrf(self.session)
\ No newline at end of file
@@ -1,8 +1,17 @@
+import time
 import httpx
+import asyncio
 from http.cookies import SimpleCookie
-from fake_useragent import UserAgent
+from typing import Any
 from .config import VER
-from .utils import logger
+from .utils import logger, get_user_agent
+from .ratelimit import RateLimiter, endpoint_of
+from .retry import RetryPolicy
+from .paginator import build_params
+from .executor import ParseExecutor
+from .session import SessionKeeper, is_auth_failure
+from .metrics import Metrics, network_time
+from .hooks import Hooks
 from .subclass_async.board import Board
 from .subclass_async.account_boards import AccountBoards
 from .subclass_async.board_related import BoardRelated
@@ -12,10 +21,58 @@ from .subclass_async.search_boards import SearchBoards
 from .subclass_async.search_pics import SearchPics
 
 
+def load_cookie_file(cookie_file):
+    """
+    读取cookie文件
+
+    参数:
+        cookie_file: cookie文件路径
+    返回:
+        cookie字典，读取失败时返回None
+    """
+    try:
+        with open(cookie_file) as f:
+            rawdata = f.read()
+        my_cookie = SimpleCookie()
+        my_cookie.load(rawdata)
+        return {key: morsel.value for key, morsel in my_cookie.items()}
+    except Exception as e:
+        logger.warning(f"读取cookie文件失败: {e}")
+        return None
+
+
+def build_headers(ver_i=2):
+    """
+    构建请求头
+
+    参数:
+        ver_i: API版本索引
+    返回:
+        请求头字典
+    """
+    return {
+        'User-Agent': get_user_agent().chrome,
+        'Accept': 'application/json, text/javascript, */*, q=0.01',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Referer': 'https://www.pinterest.com/',
+        'X-Requested-With': 'XMLHttpRequest',
+        'X-APP-VERSION': VER[ver_i] if ver_i in (1, 2) else None,
+        'X-Pinterest-AppState': 'active',
+        'X-Pinterest-PWS-Handler': 'www/[username]/[slug]/[section_slug].js',
+        'DNT': '1',
+        'Connection': 'keep-alive',
+        'Sec-Fetch-Dest': 'empty',
+        'Sec-Fetch-Mode': 'cors',
+        'Sec-Fetch-Site': 'same-origin',
+        'TE': 'Trailers'
+    }
+
+
 class PinterestClient:
     """Pinterest API客户端"""
 
-    def __init__(self, ver_i=2, proxies=None, cookie_file=None):
+    def __init__(self, ver_i=2, proxies=None, cookie_file=None, pool=None, limiter=None, retry=None, cache=None, parser=None, seen=None, checkpoint=None, proxy_pool=None, identity_pool=None, metrics=None, observers=None):
         """
         初始化Pinterest客户端
 
@@ -23,12 +80,35 @@ class PinterestClient:
             ver_i: API版本索引
             proxies: 代理设置
             cookie_file: cookie文件路径
+            pool: 共享的ClientPool，指定后复用其连接，忽略其余连接参数
+            limiter: 按接口的限速器，默认使用连接池的限速器或新建一个
+            retry: 重试策略，默认使用连接池的重试策略或新建一个
+            cache: 资源响应缓存(ResponseCache)，默认使用连接池的缓存，不指定则不缓存
+            parser: 解析执行器(ParseExecutor)，默认使用连接池的执行器或新建一个(传入的执行器不会在退出时被关闭)
+            seen: 已见图片集合(SeenSet)，指定后图片分页跳过已见过的图片，默认使用连接池的集合
+            checkpoint: 分页检查点存储(CheckpointStore)，传入 job_key 的分页任务中断后可以从最后的bookmark继续，默认使用连接池的存储
+            proxy_pool: 代理池(ProxyPool)，指定后请求分散到各代理并按代理限速，不再经过 limiter，默认使用连接池的代理池
+            identity_pool: 身份池(IdentityPool)，指定后请求分派到各身份并按身份限速，优先于 proxy_pool，默认使用连接池的身份池
+            metrics: 请求指标(Metrics)，默认使用连接池的指标或新建一个
+            observers: 请求生命周期观察者(ClientObserver)列表，默认使用连接池的观察者
         """
         self.ver_i = ver_i
         self.proxies = proxies
         self.cookie_file = cookie_file
-        self.ua = UserAgent()
+        self.pool = pool
         self.client = None
+        self.limiter = limiter or (pool.limiter if pool else RateLimiter())
+        self.retry = retry or (pool.retry if pool else RetryPolicy())
+        self.cache = cache or (pool.cache if pool else None)
+        self.parser = parser or (pool.parser if pool else ParseExecutor())
+        self._own_parser = parser is None and pool is None  # 只关闭自己创建的执行器
+        self.seen = seen or (pool.seen if pool else None)
+        self.checkpoint = checkpoint or (pool.checkpoint if pool else None)
+        self.proxy_pool = proxy_pool or (pool.proxy_pool if pool else None)
+        self.identity_pool = identity_pool or (pool.identity_pool if pool else None)
+        self.keeper = pool.keeper if pool else SessionKeeper()
+        self.metrics = metrics or (pool.metrics if pool else Metrics())
+        self.hooks = Hooks(observers) if observers else (pool.hooks if pool else Hooks())
         self.pic_data = PicData(self)  # 初始化图片数据操作实例
         self.pic_related = PicRelated(self)  # 初始化相关图片操作实例
         self.board = Board(self)  # 初始化画板操作实例
@@ -44,47 +124,162 @@ class PinterestClient:
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """异步上下文管理器退出"""
-        if self.client:
+        # 共享连接池由ClientPool负责关闭
+        if self.client and not self.pool:
             await self.client.aclose()
+        if self._own_parser:
+            self.parser.shutdown()
+
+    async def request(self, url, params=None, timeout=60) -> httpx.Response:
+        """
+        发送GET请求
+
+        请求前按接口限速；可重试的失败(429/5xx/超时/网络错误)按重试策略退避后重试。
+
+        参数:
+            url: 请求地址
+            params: 查询参数
+            timeout: 超时(秒)
+        返回:
+            httpx.Response
+        """
+        return await self._request(url, params, timeout)
+
+    async def get_json(self, url, params=None, timeout=60) -> Any:
+        """
+        发送GET请求并解码JSON
+
+        返回HTML错误页等非JSON内容时同样按重试策略重试；大响应体在解析执行器中解码。
+
+        参数:
+            url: 请求地址
+            params: 查询参数
+            timeout: 超时(秒)
+        返回:
+            解码后的JSON数据
+        """
+        return await self._request(url, params, timeout, self._decode_json)
+
+    async def get_resource(self, url, options, source_url=None) -> Any:
+        """
+        获取资源接口数据
+
+        启用缓存时先按 资源+参数+bookmark 查找，未命中才发送请求。缓存读写在线程中执行，
+        命中的数据和网络响应一样交给解析执行器解码，不阻塞事件循环。
+
+        参数:
+            url: 资源接口地址
+            options: 资源参数
+            source_url: 来源页面
+        返回:
+            解码后的JSON数据
+        """
+        if self.cache:
+            resource = endpoint_of(url)
+            key = self.cache.make_key(resource, options, source_url)
+            body = await asyncio.to_thread(self.cache.get_raw, resource, key)
+            if body is not None:
+                return await self.parser.loads(body)
+
+        data = await self.get_json(url, params=build_params(options, source_url))
+        if self.cache:
+            await asyncio.to_thread(self.cache.set, resource, key, data)
+        return data
+
+    async def _request(self, url, params, timeout, decode=None):
+        """带重试的请求"""
+        endpoint = endpoint_of(url)
+        metrics = self.metrics
+        hooks = self.hooks if self.hooks else None
+        attempt = 0
+        while True:
+            r = None
+            if hooks:
+                contexts = hooks.request(endpoint, url, attempt)
+                sent = time.perf_counter()
+            try:
+                r = await self._send(endpoint, url, params, timeout)
+                metrics.response(endpoint, r)
+                if hooks:
+                    hooks.response(endpoint, url, attempt, r.status_code, time.perf_counter() - sent, network_time(r), contexts)
+                self.retry.check(r)
+                if decode:
+                    start = time.perf_counter()
+                    result = await decode(r)
+                    seconds = time.perf_counter() - start
+                    metrics.decoded(endpoint, seconds)
+                    if hooks:
+                        hooks.decode(endpoint, 'json', seconds, len(r.content))
+                else:
+                    result = r
+                self.retry.on_success()
+                return result
+            except Exception as e:
+                metrics.failure(endpoint, e, response=r is not None)
+                if hooks and r is None:
+                    hooks.error(endpoint, url, attempt, e, time.perf_counter() - sent, contexts)
+                delay = self.retry.next_delay(e, attempt)
+                if delay is None:
+                    raise
+                metrics.retry(endpoint)
+                attempt += 1
+                if hooks:
+                    hooks.retry(endpoint, url, attempt, delay, e)
+                logger.warning(f"请求失败({e})，{delay:.1f}s 后重试 [{attempt}/{self.retry.max_attempts - 1}]")
+                await asyncio.sleep(delay)
+
+    async def _decode_json(self, r: httpx.Response) -> Any:
+        """在解析执行器中解码JSON"""
+        return await self.parser.loads(r.content)
+
+    async def _send(self, endpoint, url, params, timeout) -> httpx.Response:
+        """发送一次请求，会话失效时刷新会话后重发一次"""
+        if self.identity_pool is not None:
+            return await self.identity_pool.send(endpoint, url, params, timeout)
+        if self.proxy_pool is not None:
+            return await self.proxy_pool.send(endpoint, url, params, timeout)
+        generation = self.keeper.generation
+        r = await self._send_once(endpoint, url, params, timeout)
+        if is_auth_failure(r, self.keeper.authenticated) and await self.keeper.refresh(self.client, generation):
+            # 会话失效，刷新后重发一次
+            r = await self._send_once(endpoint, url, params, timeout)
+        return r
+
+    async def _send_once(self, endpoint, url, params, timeout) -> httpx.Response:
+        """限速后发送一次请求，并把结果反馈给限速器"""
+        await self.limiter.acquire(endpoint)
+        try:
+            r = await self.client.get(url, params=params, timeout=timeout)
+        except httpx.TimeoutException:
+            self.limiter.feedback(endpoint, timeout=True)
+            raise
+        self.limiter.feedback(endpoint, r.status_code)
+        self.keeper.observe(self.client, r)
+        return r
 
     async def connect(self):
         """建立连接"""
+        if self.identity_pool is not None:
+            await self.identity_pool.open()
+        if self.proxy_pool is not None:
+            await self.proxy_pool.open()
+        if self.pool:
+            self.client = await self.pool.open()
+            return
+        if self.identity_pool is not None or self.proxy_pool is not None:
+            # 请求经由身份池/代理池各自的客户端发送，会话在池中预热和刷新
+            return
+
         # 处理cookie
-        cookies = None
-        if self.cookie_file:
-            try:
-                with open(self.cookie_file) as f:
-                    rawdata = f.read()
-                my_cookie = SimpleCookie()
-                my_cookie.load(rawdata)
-                cookies = {key: morsel.value for key, morsel in my_cookie.items()}
-            except Exception as e:
-                logger.warning(f"读取cookie文件失败: {e}")
-
-        # 设置headers
-        headers = {
-            'User-Agent': self.ua.chrome,
-            'Accept': 'application/json, text/javascript, */*, q=0.01',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Referer': 'https://www.pinterest.com/',
-            'X-Requested-With': 'XMLHttpRequest',
-            'X-APP-VERSION': VER[self.ver_i] if self.ver_i in (1, 2) else None,
-            'X-Pinterest-AppState': 'active',
-            'X-Pinterest-PWS-Handler': 'www/[username]/[slug]/[section_slug].js',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Sec-Fetch-Dest': 'empty',
-            'Sec-Fetch-Mode': 'cors',
-            'Sec-Fetch-Site': 'same-origin',
-            'TE': 'Trailers'
-        }
+        cookies = load_cookie_file(self.cookie_file) if self.cookie_file else None
 
         # 创建异步客户端
         self.client = httpx.AsyncClient(
-            headers=headers,
+            headers=build_headers(self.ver_i),
             cookies=cookies,
             proxies=self.proxies,
             timeout=60.0,
             follow_redirects=True
-        )
\ No newline at end of file
+        )
+        # 预热会话，获取新的csrftoken
+        await self.keeper.prepare(self.client)
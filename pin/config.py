@@ -1,5 +1,116 @@
 # Pinterest API版本
 VER = (None, 'c643827', '4c8c36f')
 
-# 并发控制
-MAX_CONCURRENT = 5  # 最大并发数
+# 自适应限速(每个接口一个令牌桶, AIMD)
+RATE_INITIAL = 2.0  # 初始速率(请求/秒)
+RATE_MIN = 0.2  # 最小速率
+RATE_MAX = 20.0  # 最大速率
+RATE_INCREASE = 0.5  # 加性增量(每秒健康请求增加的请求/秒)
+RATE_DECREASE = 0.5  # 乘性减小系数
+RATE_BURST = 5  # 令牌桶容量
+RATE_COOLDOWN = 2.0  # 两次减速的最小间隔(秒)
+
+# 共享连接池
+POOL_MAX_CONNECTIONS = 20  # 最大连接数
+POOL_MAX_KEEPALIVE = 10  # 最大保活连接数
+POOL_KEEPALIVE_EXPIRY = 30.0  # 保活连接过期时间(秒)
+POOL_HTTP2 = False  # 是否启用HTTP/2(需要安装h2)
+
+# 重试策略
+RETRY_MAX_ATTEMPTS = 5  # 单个请求最大尝试次数
+RETRY_BASE_DELAY = 1.0  # 指数退避基数(秒)
+RETRY_MAX_DELAY = 60.0  # 单次等待上限(秒)
+RETRY_BUDGET_RATIO = 0.2  # 每个成功请求存入的重试额度
+RETRY_BUDGET_PER_SEC = 1.0  # 每秒固定补充的重试额度
+RETRY_BUDGET_MAX = 50.0  # 重试额度上限
+PAGE_RETRY_MAX_ATTEMPTS = 3  # 请求重试耗尽后，分页器对同一bookmark的最大尝试次数
+PAGE_RETRY_BASE_DELAY = 10.0  # 分页重试的退避基数(秒)
+PAGE_RETRY_MAX_DELAY = 300.0  # 分页重试的单次等待上限(秒)
+
+# 资源响应缓存
+CACHE_PATH = 'pin_cache.sqlite'  # 缓存文件
+CACHE_MAX_BYTES = 512 * 1024 * 1024  # 缓存总大小上限
+CACHE_TTL = {  # 各资源的过期时间(秒)
+    'default': 3600,
+    'BoardFeedResource': 6 * 3600,
+    'BoardsResource': 6 * 3600,
+    'BaseSearchResource': 1800,
+    'RelatedModulesResource': 1800,
+    'RelatedPinFeedResource': 1800,
+    'BoardContentRecommendationResource': 1800,
+}
+CACHE_TOUCH_BATCH = 256  # 命中后的访问时间先记在内存，攒够该条数再批量写回
+
+# 解析执行器(异步客户端)
+PARSE_EXECUTOR = 'thread'  # thread(不阻塞事件循环，但受GIL限制不并行)、process(只用于图片HTML解析，JSON仍在线程中解码) 或 inline
+PARSE_WORKERS = None  # 工作进程/线程数，None表示CPU核心数
+PARSE_MIN_BYTES = 64 * 1024  # 小于该大小的JSON直接在事件循环中解码
+
+# 结果写入
+SINK_ROW_GROUP = 8192  # Parquet/Arrow 每个行组(批)的图片数
+SINK_COMPRESSION = 'zstd'  # Parquet 压缩算法
+SINK_FLUSH_PAGES = 10  # NDJSON 每写入多少页 flush+fsync 一次
+SINK_FLUSH_INTERVAL = 5.0  # NDJSON 两次 flush+fsync 的最长间隔(秒)
+
+# 图片下载
+DOWNLOAD_MAX_CONNECTIONS = 32  # 最大连接数(同时也是并发下载任务数)
+DOWNLOAD_PER_HOST = 8  # 每个主机的最大并发下载数
+DOWNLOAD_CHUNK_SIZE = 256 * 1024  # 流式写入的块大小
+DOWNLOAD_TIMEOUT = 60.0  # 下载超时(秒)
+DOWNLOAD_MANIFEST = 'manifest.ndjson'  # 已完成文件清单(位于保存目录下)
+
+# 内容寻址存储
+STORE_INDEX = 'index.sqlite'  # 索引文件(位于存储根目录下)
+STORE_SHARD_DEPTH = 2  # 分片目录层数(每层取哈希的2个字符)
+
+# 已见图片集合
+SEEN_PATH = 'pin_seen.sqlite'  # 精确存储(SQLite)，布隆过滤器保存为同名 .bloom 文件
+SEEN_CAPACITY = 10_000_000  # 布隆过滤器的预计容量，超出后重新打开时自动扩容
+SEEN_ERROR_RATE = 0.01  # 布隆过滤器的误判率
+
+# 相关推荐图遍历
+FRONTIER_WORKERS = 8  # 并发展开的任务数
+FRONTIER_MAX_DEPTH = 2  # 最大展开深度(种子为0)
+FRONTIER_MAX_ITEMS = 10000  # 最多产出的图片数
+FRONTIER_MAX_SIZE = 100000  # 待展开队列的最大长度，超出时丢弃优先级最低的节点
+FRONTIER_PER_NODE = 100  # 每个节点最多读取的相关图片数
+
+# 分页检查点
+CHECKPOINT_PATH = 'pin_checkpoint.sqlite'  # 检查点文件
+
+# 任务队列与多进程运行器
+JOB_QUEUE_PATH = 'pin_jobs.sqlite'  # 本地任务队列(SQLite)
+JOB_VISIBILITY_TIMEOUT = 300.0  # 租约时长(秒)，超时未确认的任务重新可见
+JOB_MAX_ATTEMPTS = 3  # 单个任务的最大尝试次数
+JOB_RETRY_DELAY = 30.0  # 失败任务重新可领取前的等待时间(秒)，按尝试次数线性增加
+JOB_POLL_INTERVAL = 1.0  # 暂无可领取任务时的轮询间隔(秒)
+RUNNER_CONCURRENCY = 4  # 每个工作进程同时执行的任务数
+RUNNER_OUTBOX_PAGES = 16  # 每个工作进程待发往主进程的页数上限，超过时暂停抓取
+RUNNER_COMMIT_INTERVAL = 2.0  # 主进程同步输出文件并提交任务确认、检查点的间隔(秒)
+RUNNER_PART_INTERVAL = 60.0  # Parquet/Arrow 输出关闭分片并提交的最长间隔(秒)，分片满一个行组或空闲时提前提交
+
+# 代理池
+PROXY_MAX_CONNECTIONS = 10  # 每个代理的最大连接数
+PROXY_HEALTH_ALPHA = 0.2  # 健康指标的指数滑动平均系数
+PROXY_LATENCY_TARGET = 1.0  # 延迟不超过该值(秒)时不扣分
+PROXY_MIN_SCORE = 0.3  # 健康分低于该值时隔离
+PROXY_MIN_SAMPLES = 5  # 按健康分隔离前至少需要的请求数
+PROXY_MAX_FAILURES = 3  # 连续连接失败达到该次数时立即隔离
+PROXY_QUARANTINE = 30.0  # 首次隔离时长(秒)，再次隔离时翻倍
+PROXY_QUARANTINE_MAX = 600.0  # 隔离时长上限(秒)
+
+# 身份(cookie)池
+IDENTITY_MAX_CONNECTIONS = 10  # 每个身份的最大连接数
+IDENTITY_MAX_FAILURES = 3  # 连续认证失败达到该次数时停用身份
+IDENTITY_ATTEMPTS = 3  # 会话失效时单个请求最多尝试的身份数
+
+# 会话预热与刷新
+SESSION_WARMUP = True  # 连接时先请求一次首页，获取新的csrftoken等会话cookie
+SESSION_WARMUP_URL = 'https://www.pinterest.com/'
+SESSION_AUTH_STATUS = (401,)  # 直接视为会话失效的状态码(403 也可能是资源本身不可访问，只有返回HTML页面或登出时才计入)
+SESSION_REFRESH_INTERVAL = 30.0  # 两次刷新的最小间隔(秒)，避免并发失败反复刷新
+
+# 指标
+METRICS_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # 请求耗时直方图的桶(秒)
+METRICS_DECODE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)  # 解码耗时直方图的桶(秒)
+METRICS_PAGE_BUCKETS = (0, 5, 10, 25, 50, 100, 250)  # 每页条目数直方图的桶
@@ -0,0 +1,364 @@
+import os
+import time
+import asyncio
+import threading
+from typing import Dict, Any, Iterable, AsyncIterable, Optional, Tuple, Union
+from urllib.parse import urlsplit
+import httpx
+from .config import (
+    DOWNLOAD_MAX_CONNECTIONS, DOWNLOAD_PER_HOST, DOWNLOAD_CHUNK_SIZE, DOWNLOAD_TIMEOUT, DOWNLOAD_MANIFEST,
+)
+from .utils import logger, create_dir, sanitize, get_user_agent
+from .retry import RetryPolicy, RetryableError
+from .record import PinRecord
+from .sinks import NdjsonSink, read_ndjson
+from .store import BlobStore
+from .variant import VariantPolicy
+
+
+def _part_size(part: str) -> int:
+    """已下载部分的大小，不存在时为0"""
+    return os.path.getsize(part) if os.path.exists(part) else 0
+
+
+class DownloadStats:
+    """下载统计"""
+
+    def __init__(self):
+        self.files = 0  # 完成下载的文件数
+        self.bytes = 0  # 下载的字节数
+        self.skipped = 0  # 已存在而跳过的文件数
+        self.failed = 0  # 失败的文件数
+        self.resumed = 0  # 断点续传的次数
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def mb_per_sec(self) -> float:
+        return self.bytes / 1024 / 1024 / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def files_per_sec(self) -> float:
+        return self.files / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'files': self.files,
+            'bytes': self.bytes,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'resumed': self.resumed,
+            'elapsed': round(self.elapsed, 2),
+            'mb_per_sec': round(self.mb_per_sec, 2),
+            'files_per_sec': round(self.files_per_sec, 2),
+        }
+
+
+class Downloader:
+    """异步图片下载器
+
+    使用独立于API会话的httpx连接池；按主机限制并发，流式分块写入 .part 文件，
+    中断后通过Range请求续传，完成的文件记录到保存目录下的清单中。
+    文件读写、清单和存储索引的访问都在线程中执行，磁盘卡顿不会阻塞事件循环上的其他下载和API请求。
+
+    用法:
+        async with Downloader('images') as downloader:
+            await downloader.download_all(await client.board.get_pics_data(board_id))
+            print(downloader.stats.as_dict())
+    """
+
+    def __init__(
+        self,
+        save_dir: str,
+        max_connections: int = DOWNLOAD_MAX_CONNECTIONS,
+        per_host: int = DOWNLOAD_PER_HOST,
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        timeout: float = DOWNLOAD_TIMEOUT,
+        proxies=None,
+        retry: RetryPolicy = None,
+        manifest: str = DOWNLOAD_MANIFEST,
+        store: BlobStore = None,
+        variant: VariantPolicy = None,
+    ):
+        """
+        初始化下载器
+
+        参数:
+            save_dir: 保存目录
+            max_connections: 最大连接数(同时也是 download_all 的并发任务数)
+            per_host: 每个主机的最大并发下载数
+            chunk_size: 流式写入的块大小(字节)
+            timeout: 超时(秒)
+            proxies: 代理设置
+            retry: 重试策略，默认新建一个(不占用API请求的重试预算)
+            manifest: 清单文件名
+            store: 内容寻址存储，指定后文件保存到存储中并以其索引代替清单
+            variant: 图片尺寸选择策略，默认下载数据中的地址(通常为原图)
+        """
+        create_dir(save_dir)
+        self.save_dir = save_dir
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.proxies = proxies
+        self.retry = retry or RetryPolicy()
+        self.manifest_path = os.path.join(save_dir, manifest)
+        self.store = store
+        self.variant = variant
+        self.done = self._load_manifest() if store is None else {}
+        self.stats = DownloadStats()
+        self.http = None
+        self._manifest = None
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._manifest_lock = threading.Lock()
+
+    async def __aenter__(self):
+        """异步上下文管理器入口"""
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """异步上下文管理器退出"""
+        await self.aclose()
+
+    async def open(self):
+        """创建下载用的httpx客户端并打开清单"""
+        if self.http is None:
+            self.http = httpx.AsyncClient(
+                headers={
+                    'User-Agent': get_user_agent().chrome,
+                    'Referer': 'https://www.pinterest.com/',
+                },
+                proxies=self.proxies,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                follow_redirects=True,
+            )
+            if self.store is None:
+                self._manifest = await asyncio.to_thread(NdjsonSink, self.manifest_path, compression='none')
+            self.stats = DownloadStats()
+
+    async def aclose(self):
+        """关闭客户端和清单"""
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+            if self._manifest is not None:
+                self._manifest.close()
+                self._manifest = None
+            logger.debug(f"下载器已关闭: {self.stats.as_dict()}")
+
+    def _load_manifest(self) -> Dict[str, str]:
+        """读取清单，返回 url -> 文件名"""
+        if not os.path.exists(self.manifest_path):
+            return {}
+        return {entry['url']: entry['file'] for entry in read_ndjson(self.manifest_path, compression='none')}
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).hostname or ''
+        sem = self._hosts.get(host)
+        if sem is None:
+            sem = self._hosts[host] = asyncio.Semaphore(self.per_host)
+        return sem
+
+    @staticmethod
+    def filename(url: str, name: Optional[str] = None) -> str:
+        """
+        生成保存的文件名
+
+        参数:
+            url: 图片地址
+            name: 文件名(不含扩展名)，为空时使用地址中的文件名
+        返回:
+            文件名，扩展名取自地址
+        """
+        base = os.path.basename(urlsplit(url).path)
+        stem, ext = os.path.splitext(base)
+        return sanitize(str(name) if name else stem) + (ext.lower() or '.jpg')
+
+    async def download(self, url: str, name: Optional[str] = None, pin_id: Optional[str] = None) -> Optional[str]:
+        """
+        下载一张图片
+
+        清单(或存储索引)中已有、文件已存在时直接跳过；同一地址同时只下载一次。
+        失败时按重试策略退避重试，已下载的部分保留在 .part 文件中续传。
+
+        参数:
+            url: 图片地址
+            name: 文件名(不含扩展名)，为空时使用地址中的文件名；使用存储时忽略
+            pin_id: 记录到清单/索引中的图片ID
+        返回:
+            文件路径，失败时返回None
+        """
+        pending = self._inflight.get(url)
+        if pending is not None:
+            path = await asyncio.shield(pending)
+            if path and self.store is not None:
+                await asyncio.to_thread(self._link_stored, url, pin_id)
+            return path
+
+        future = self._inflight[url] = asyncio.get_running_loop().create_future()
+        path = None
+        try:
+            path = await self._download(url, name, pin_id)
+        finally:
+            del self._inflight[url]
+            future.set_result(path)
+        return path
+
+    def _link_stored(self, url: str, pin_id: Optional[str]) -> Optional[str]:
+        """地址已在存储中时关联图片ID并返回文件路径，否则返回None(在线程中调用)"""
+        digest = self.store.lookup(url)
+        if not digest:
+            return None
+        self.store.link(pin_id, digest)
+        return self.store.path(digest)
+
+    def _write_manifest(self, entry: Dict[str, Any]):
+        """追加一条清单记录(在线程中调用，多个下载共用一个清单文件)"""
+        with self._manifest_lock:
+            self._manifest.write([entry])
+
+    async def _download(self, url: str, name: Optional[str], pin_id: Optional[str]) -> Optional[str]:
+        if self.store is not None:
+            stored = await asyncio.to_thread(self._link_stored, url, pin_id)
+            if stored:
+                self.stats.skipped += 1
+                return stored
+            path = self.store.staging_path(url)
+        else:
+            file = self.done.get(url) or self.filename(url, name)
+            path = os.path.join(self.save_dir, file)
+            if await asyncio.to_thread(os.path.exists, path):
+                self.stats.skipped += 1
+                return path
+
+        attempt = 0
+        while True:
+            try:
+                async with self._host_limit(url):
+                    size = await self._fetch(url, path)
+                break
+            except Exception as e:
+                delay = self.retry.next_delay(e, attempt)
+                if delay is None:
+                    self.stats.failed += 1
+                    logger.warning(f"下载失败: {url} ({e})")
+                    return None
+                attempt += 1
+                logger.debug(f"下载失败({e})，{delay:.1f}s 后重试 [{attempt}/{self.retry.max_attempts - 1}]: {url}")
+                await asyncio.sleep(delay)
+
+        self.retry.on_success()
+        if self.store is not None:
+            # 计算哈希需要读取整个文件，放到线程中执行
+            path = await asyncio.to_thread(self.store.put, path, url, pin_id)
+        else:
+            self.done[url] = file
+            await asyncio.to_thread(self._write_manifest, {'url': url, 'file': file, 'size': size, 'id': pin_id})
+        self.stats.files += 1
+        return path
+
+    async def _fetch(self, url: str, path: str) -> int:
+        """流式下载到 .part 文件，完成后重命名；返回文件大小"""
+        part = path + '.part'
+        offset = await asyncio.to_thread(_part_size, part)
+        headers = {'Range': f'bytes={offset}-'} if offset else None
+
+        async with self.http.stream('GET', url, headers=headers) as r:
+            if r.status_code == 416:
+                # 已有部分与服务器文件不一致，重新下载
+                await asyncio.to_thread(os.remove, part)
+                raise RetryableError("Range无效，重新下载", status=416)
+            self.retry.check(r)
+            if r.status_code == 206:
+                self.stats.resumed += 1
+                mode = 'ab'
+            else:
+                offset = 0
+                mode = 'wb'
+
+            written = 0
+            f = await asyncio.to_thread(open, part, mode)
+            try:
+                async for chunk in r.aiter_bytes(self.chunk_size):
+                    await asyncio.to_thread(f.write, chunk)
+                    written += len(chunk)
+                    self.stats.bytes += len(chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+
+            expected = r.headers.get('Content-Length')
+            if expected and r.headers.get('Content-Encoding') is None and written != int(expected):
+                raise RetryableError(f"下载不完整: {written}/{expected} 字节")
+
+        await asyncio.to_thread(os.replace, part, path)
+        return offset + written
+
+    async def download_all(self, pins: Union[Iterable, AsyncIterable]) -> DownloadStats:
+        """
+        并发下载多张图片
+
+        参数:
+            pins: 图片地址、get_pics_data 格式的字典、原始图片数据或PinRecord(同步或异步可迭代)，
+                  有图片ID时以ID作为文件名
+        返回:
+            下载统计
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_connections * 2)
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                url, pin_id = item
+                if not url:
+                    continue
+                try:
+                    await self.download(url, pin_id, pin_id)
+                except Exception as e:
+                    # 重试之外的错误(写文件、存储索引等)只记为失败，不能让工作任务退出，否则生产者会阻塞在满队列上
+                    self.stats.failed += 1
+                    logger.error(f"下载失败: {url} ({e!r})")
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.max_connections)]
+        try:
+            if hasattr(pins, '__aiter__'):
+                async for pin in pins:
+                    await queue.put(self._item(pin))
+            else:
+                for pin in pins:
+                    await queue.put(self._item(pin))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for w in workers:
+                w.cancel()
+
+        logger.info(f"下载完成: {self.stats.as_dict()}")
+        return self.stats
+
+    def _item(self, pin: Union[str, Dict[str, Any], PinRecord]) -> Tuple[str, Optional[str]]:
+        """取出图片地址和ID，按尺寸策略选择版本"""
+        variant = self.variant
+        if isinstance(pin, str):
+            return (variant.rewrite_url(pin) if variant else pin), None
+        if isinstance(pin, PinRecord):
+            url, width, pin_id = pin.url, pin.width, pin.id
+        elif 'images' in pin:
+            # 原始数据：直接从 images 中选择
+            images = pin.get('images') or {}
+            chosen = variant.select(images) if variant else images.get('orig') or {}
+            return chosen.get('url'), pin.get('id')
+        else:
+            url, width, pin_id = pin.get('url'), pin.get('width'), pin.get('id')
+        if variant and url:
+            url = variant.rewrite_url(url, width)
+        return url, pin_id
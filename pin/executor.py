@@ -0,0 +1,88 @@
+import json
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Optional
+from .config import PARSE_EXECUTOR, PARSE_WORKERS, PARSE_MIN_BYTES
+from .retry import RetryableError
+
+
+class ParseExecutor:
+    """CPU密集解析的执行器
+
+    把HTML解析和大JSON解码放到线程池或进程池中执行，避免阻塞事件循环。
+    线程池(默认)只让事件循环保持响应: json.loads 和 BeautifulSoup 解析都持有GIL，多个页面并不会在多个核心上并行解析。
+    进程池只用于图片HTML解析，可以让多个图片页面在多个CPU核心上并行解析，执行的函数和参数必须可以pickle；
+    JSON解码即使在进程池模式下也使用线程池，因为解码结果pickle回主进程的开销与解码本身相当。
+    需要让JSON解码也用满多个核心时，使用多进程运行器(pin.runner)，每个工作进程各自解码。
+    """
+
+    def __init__(self, kind: str = PARSE_EXECUTOR, max_workers: Optional[int] = PARSE_WORKERS, min_size: int = PARSE_MIN_BYTES):
+        """
+        初始化执行器
+
+        参数:
+            kind: thread(线程池)、process(HTML解析用进程池) 或 inline(直接在事件循环中执行)
+            max_workers: 工作线程/进程数，None表示CPU核心数
+            min_size: 小于该字节数的响应直接在事件循环中解码
+        """
+        if kind not in ('process', 'thread', 'inline'):
+            raise ValueError(f"未知的执行器类型: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.min_size = min_size
+        self._executor: Optional[Executor] = None
+        self._threads: Optional[ThreadPoolExecutor] = None  # 进程池模式下解码JSON的线程池
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        """底层执行器(首次使用时创建)"""
+        if self._executor is None and self.kind != 'inline':
+            if self.kind == 'process':
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pin-parse')
+        return self._executor
+
+    @property
+    def json_executor(self) -> Optional[Executor]:
+        """解码JSON的执行器(进程池模式下为单独的线程池)"""
+        if self.kind != 'process':
+            return self.executor
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pin-json')
+        return self._threads
+
+    async def run(self, func: Callable, *args) -> Any:
+        """
+        在执行器中运行函数
+
+        参数:
+            func: 要运行的函数
+            args: 位置参数
+        返回:
+            函数返回值
+        """
+        if self.kind == 'inline':
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def loads(self, content: bytes) -> Any:
+        """
+        解码JSON响应体
+
+        大响应体在执行器中解码；非JSON内容抛出RetryableError。
+        """
+        try:
+            if self.kind == 'inline' or len(content) < self.min_size:
+                return json.loads(content)
+            return await asyncio.get_running_loop().run_in_executor(self.json_executor, json.loads, content)
+        except ValueError:
+            raise RetryableError("非JSON响应")
+
+    def shutdown(self):
+        """关闭执行器"""
+        for executor in (self._executor, self._threads):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._threads = None
@@ -0,0 +1,114 @@
+import re
+import json
+from typing import Dict, Any, Optional, Iterator, Union
+
+# relay数据所在script标签的属性
+RELAY_ATTR = b'data-relay-response'
+SCRIPT_END = re.compile(rb'</script', re.IGNORECASE)
+
+
+def iter_relay_scripts(html: Union[bytes, str]) -> Iterator[bytes]:
+    """
+    按字节扫描页面，依次产出 data-relay-response="true" 的script内容
+
+    不解析整个HTML，只在属性出现的位置附近查找标签边界。
+
+    参数:
+        html: 页面内容(bytes或str)
+    产出:
+        script标签内的原始内容
+    """
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    pos = 0
+    while True:
+        idx = html.find(RELAY_ATTR, pos)
+        if idx < 0:
+            return
+        tag_start = html.rfind(b'<', 0, idx)
+        tag_end = html.find(b'>', idx)
+        if tag_start < 0 or tag_end < 0:
+            return
+        pos = tag_end + 1
+
+        # 必须是script标签且属性值为true
+        if html[tag_start:tag_start + 7].lower() != b'<script':
+            continue
+        value = html[idx + len(RELAY_ATTR):tag_end].lstrip(b' =').lstrip(b'"\'')
+        if not value.startswith(b'true'):
+            continue
+
+        end = SCRIPT_END.search(html, pos)
+        if end is None:
+            return
+        yield html[pos:end.start()]
+
+
+def _find_pin_data(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """从relay数据中取出图片数据"""
+    try:
+        return data["response"]["data"]["v3GetPinQuery"]["data"]
+    except (KeyError, TypeError):
+        return None
+
+
+def extract_pin_data_fast(html: Union[bytes, str]) -> Optional[Dict[str, Any]]:
+    """
+    快速提取图片数据(字节扫描)
+
+    参数:
+        html: 页面内容
+    返回:
+        图片数据，找不到时返回None
+    """
+    for script in iter_relay_scripts(html):
+        try:
+            pin_data = _find_pin_data(json.loads(script))
+        except ValueError:
+            continue
+        if pin_data is not None:
+            return pin_data
+    return None
+
+
+def extract_pin_data_soup(html: Union[bytes, str]) -> Optional[Dict[str, Any]]:
+    """
+    使用BeautifulSoup提取图片数据(完整解析，较慢)
+
+    参数:
+        html: 页面内容
+    返回:
+        图片数据，找不到时返回None
+    """
+    from bs4 import BeautifulSoup
+
+    if isinstance(html, bytes):
+        html = html.decode('utf-8', errors='replace')
+    soup = BeautifulSoup(html, "html.parser")
+
+    # 查找包含数据的script标签
+    for script in soup.find_all("script"):
+        if script.get("data-relay-response") == "true":
+            pin_data = _find_pin_data(json.loads(script.string))
+            if pin_data is not None:
+                return pin_data
+    return None
+
+
+def extract_pin_data(html: Union[bytes, str]) -> Dict[str, Any]:
+    """
+    从图片页面中提取relay数据
+
+    先走字节扫描的快速路径，失败时回退到BeautifulSoup。
+
+    参数:
+        html: 页面内容
+    返回:
+        图片数据
+    """
+    pin_data = extract_pin_data_fast(html)
+    if pin_data is None:
+        pin_data = extract_pin_data_soup(html)
+    if pin_data is None:
+        raise Exception("Pin data not found")
+    return pin_data
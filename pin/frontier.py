@@ -0,0 +1,246 @@
+import heapq
+import asyncio
+import itertools
+from contextlib import aclosing
+from typing import List, Dict, Any, Callable, Iterable, AsyncIterator, Optional, Set, Tuple, Union
+from .config import FRONTIER_WORKERS, FRONTIER_MAX_DEPTH, FRONTIER_MAX_ITEMS, FRONTIER_MAX_SIZE, FRONTIER_PER_NODE
+from .normalize import _EMPTY
+from .utils import logger
+
+
+class CrawlNode:
+    """待展开的节点(图片或画板)"""
+
+    __slots__ = ('kind', 'id', 'depth', 'score')
+
+    def __init__(self, kind: str, id: str, depth: int = 0, score: float = 0.0):
+        self.kind = kind
+        self.id = id
+        self.depth = depth
+        self.score = score
+
+    def __repr__(self):
+        return f"CrawlNode({self.kind}={self.id}, depth={self.depth}, score={self.score})"
+
+
+def saves_of(pin: Dict[str, Any]) -> int:
+    """原始图片数据的保存数"""
+    return ((pin.get('aggregate_metadata') or _EMPTY).get('aggregated_stats') or _EMPTY).get('saves', 0) or 0
+
+
+class Frontier:
+    """按优先级排序的待展开队列
+
+    优先级高的节点先出队，同优先级按入队顺序；入队过的节点不会再次入队。
+    长度超过上限时只保留优先级最高的 max_size 个节点。
+    """
+
+    def __init__(self, max_size: int = FRONTIER_MAX_SIZE):
+        self.max_size = max_size
+        self.dropped = 0  # 因超出上限被丢弃的节点数
+        self._heap: List[Tuple[float, int, CrawlNode]] = []
+        self._seq = itertools.count()
+        self._queued: Set[Tuple[str, str]] = set()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, node: CrawlNode) -> bool:
+        """
+        节点入队
+
+        参数:
+            node: 节点，score越大越先展开
+        返回:
+            是否入队(已入队过的节点返回False)
+        """
+        key = (node.kind, node.id)
+        if key in self._queued:
+            return False
+        self._queued.add(key)
+        heapq.heappush(self._heap, (-node.score, next(self._seq), node))
+        if len(self._heap) > self.max_size * 2:
+            # 分摊裁剪，避免每次入队都排序
+            self.dropped += len(self._heap) - self.max_size
+            self._heap = heapq.nsmallest(self.max_size, self._heap)
+        return True
+
+    def pop(self) -> Optional[CrawlNode]:
+        """取出优先级最高的节点，队列为空时返回None"""
+        return heapq.heappop(self._heap)[2] if self._heap else None
+
+
+class FrontierCrawler:
+    """相关推荐图的遍历器(异步)
+
+    从种子图片/画板出发，通过 pic_related / board_related 展开相关图片，
+    按优先级(默认保存数)选择下一个展开的节点；N个任务共用同一个客户端并发展开，
+    请求速率由客户端的限速器控制。客户端设置了已见集合时，图片在消费者取下一批时才记为已见。
+
+    用法:
+        async with ClientPool() as pool:
+            async with pool.client() as client:
+                crawler = FrontierCrawler(client, workers=8, max_depth=2)
+                async for node, pins in crawler.crawl(pins=['pin_id']):
+                    ...
+    """
+
+    def __init__(
+        self,
+        client,
+        workers: int = FRONTIER_WORKERS,
+        max_depth: int = FRONTIER_MAX_DEPTH,
+        max_items: int = FRONTIER_MAX_ITEMS,
+        max_size: int = FRONTIER_MAX_SIZE,
+        per_node: int = FRONTIER_PER_NODE,
+        priority: Union[str, Callable[[Dict[str, Any], int], float]] = 'saves',
+        follow_boards: bool = False,
+    ):
+        """
+        初始化遍历器
+
+        参数:
+            client: 异步PinterestClient实例
+            workers: 并发展开的任务数
+            max_depth: 最大深度，种子深度为0，深度达到max_depth的图片只产出不再展开
+            max_items: 最多产出的图片数
+            max_size: 待展开队列的最大长度
+            per_node: 每个节点最多读取的相关图片数
+            priority: saves(保存数高的先展开)、depth(广度优先)或函数 f(原始图片数据, 深度) -> 优先级
+            follow_boards: 是否同时展开图片所在的画板
+        """
+        if isinstance(priority, str):
+            if priority not in ('saves', 'depth'):
+                raise ValueError(f"未知的优先级: {priority}")
+            priority = (lambda pin, depth: saves_of(pin)) if priority == 'saves' else (lambda pin, depth: -depth)
+        self.client = client
+        self.workers = workers
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.per_node = per_node
+        self.priority = priority
+        self.follow_boards = follow_boards
+        self.frontier = Frontier(max_size)
+        self.items = 0  # 已产出的图片数
+        self.expanded = 0  # 已展开的节点数
+        self.failed = 0  # 展开失败的节点数
+        self._found: Set[str] = set()
+        self._active = 0
+        self._cond: Optional[asyncio.Condition] = None
+
+    def _done(self) -> bool:
+        return self.items >= self.max_items
+
+    async def crawl(self, pins: Iterable[str] = (), boards: Iterable[str] = ()) -> AsyncIterator[Tuple[CrawlNode, List[Dict[str, Any]]]]:
+        """
+        从种子开始遍历
+
+        参数:
+            pins: 种子图片ID
+            boards: 种子画板ID
+        产出:
+            (被展开的节点, 本页新发现的原始图片列表)
+        """
+        for pin_id in pins:
+            self.frontier.push(CrawlNode('pin', str(pin_id), 0, float('inf')))
+        for board_id in boards:
+            self.frontier.push(CrawlNode('board', str(board_id), 0, float('inf')))
+
+        self._cond = asyncio.Condition()
+        out: asyncio.Queue = asyncio.Queue(maxsize=self.workers * 2)
+        tasks = [asyncio.ensure_future(self._worker(out)) for _ in range(self.workers)]
+
+        async def finish():
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await out.put(None)
+
+        closer = asyncio.ensure_future(finish())
+        seen = getattr(self.client, 'seen', None)
+        try:
+            while True:
+                item = await out.get()
+                if item is None:
+                    break
+                yield item
+                # 消费者取下一批时才把产出的图片记为已见，被截断或未取走的图片不会标记
+                if seen is not None:
+                    await asyncio.to_thread(seen.mark_seen, item[1])
+        finally:
+            for task in tasks:
+                task.cancel()
+            closer.cancel()
+            logger.info(f"遍历结束: {self.stats()}")
+
+    async def _worker(self, out: asyncio.Queue):
+        cond = self._cond
+        while True:
+            async with cond:
+                # 队列为空但还有节点在展开时，等待新节点入队
+                while not self.frontier and self._active and not self._done():
+                    await cond.wait()
+                node = None if self._done() else self.frontier.pop()
+                if node is None:
+                    cond.notify_all()
+                    return
+                self._active += 1
+            try:
+                await self._expand(node, out)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.warning(f"展开失败 {node}: {e}")
+            finally:
+                async with cond:
+                    self._active -= 1
+                    cond.notify_all()
+
+    def _source(self, node: CrawlNode) -> AsyncIterator[List[Dict[str, Any]]]:
+        if node.kind == 'pin':
+            return self.client.pic_related.aiter_pics_origin(node.id, mark_seen=False)
+        return self.client.board_related.aiter_pics_origin(node.id, mark_seen=False)
+
+    async def _expand(self, node: CrawlNode, out: asyncio.Queue):
+        """读取节点的相关图片，产出新图片并把它们作为下一层节点入队"""
+        self.expanded += 1
+        read = 0
+        depth = node.depth + 1
+        expand = depth < self.max_depth
+        push = self.frontier.push
+        async with aclosing(self._source(node)) as pages:
+            async for batch in pages:
+                new = []
+                pushed = False
+                for pin in batch:
+                    pin_id = str(pin.get('id'))
+                    if pin_id in self._found:
+                        continue
+                    self._found.add(pin_id)
+                    new.append(pin)
+                    if expand:
+                        score = self.priority(pin, depth)
+                        pushed |= push(CrawlNode('pin', pin_id, depth, score))
+                        board_id = (pin.get('board') or _EMPTY).get('id')
+                        if self.follow_boards and board_id:
+                            pushed |= push(CrawlNode('board', str(board_id), depth, score))
+                if pushed:
+                    # 唤醒等待新节点的任务
+                    async with self._cond:
+                        self._cond.notify_all()
+                # 达到 max_items 后截断为空时不产出空批次
+                new = new[:max(0, self.max_items - self.items)]
+                if new:
+                    self.items += len(new)
+                    await out.put((node, new))
+                read += len(batch)
+                if read >= self.per_node or self._done():
+                    break
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'items': self.items,
+            'expanded': self.expanded,
+            'failed': self.failed,
+            'frontier': len(self.frontier),
+            'dropped': self.frontier.dropped,
+        }
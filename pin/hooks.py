@@ -0,0 +1,169 @@
+import time
+from typing import List, Dict, Any, Callable, Iterable, Optional, Union
+from .normalize import normalize_pins
+from .record import PinRecord, normalize_records
+from .utils import logger
+
+
+class ClientObserver:
+    """请求生命周期观察者
+
+    继承后覆盖需要的方法，通过 PinterestClient(observers=[...]) 或 ClientPool(observers=[...]) 注册。
+    所有耗时单位为秒；resource 为资源名称(如 BoardFeedResource)，图片HTML页面为 pin。
+    on_request 的返回值作为 context 传给同一次尝试的 on_response / on_error，可用于开始和结束一个span。
+    观察者抛出的异常只记录日志，不影响请求。
+    """
+
+    def on_request(self, resource: str, url: str, attempt: int) -> Any:
+        """
+        一次请求尝试开始(限速等待之前)
+
+        参数:
+            resource: 资源名称
+            url: 请求地址
+            attempt: 第几次重试，首次为0
+        返回:
+            任意上下文对象
+        """
+
+    def on_response(self, resource: str, url: str, attempt: int, status: int, elapsed: float,
+                    network: Optional[float], context: Any = None):
+        """
+        收到响应
+
+        参数:
+            status: HTTP状态码
+            elapsed: 从 on_request 到收到响应的耗时(含限速等待)
+            network: 网络耗时(从发送请求到读完响应体)，无法获取时为None
+            context: on_request 的返回值
+        """
+
+    def on_error(self, resource: str, url: str, attempt: int, error: Exception, elapsed: float, context: Any = None):
+        """没有收到响应的失败尝试(超时、网络错误等)"""
+
+    def on_decode(self, resource: str, kind: str, seconds: float, size: int):
+        """
+        响应体解码完成
+
+        参数:
+            kind: json(JSON解码) 或 html(图片页面数据提取)
+            seconds: 解码耗时
+            size: 响应体字节数
+        """
+
+    def on_page(self, resource: str, items: int, seconds: float):
+        """
+        一页数据规范化完成
+
+        参数:
+            items: 条目数
+            seconds: 规范化耗时
+        """
+
+    def on_retry(self, resource: str, url: str, attempt: int, delay: float, error: Exception, level: str = 'request'):
+        """
+        安排重试
+
+        参数:
+            attempt: 即将进行的是第几次重试
+            delay: 重试前的等待时间
+            error: 导致重试的异常
+            level: request(请求级重试) 或 page(分页级重试同一bookmark)
+        """
+
+
+class CallbackObserver(ClientObserver):
+    """由回调函数组成的观察者
+
+    用法:
+        client = PinterestClient(observers=[CallbackObserver(response=lambda resource, url, attempt, status, elapsed, network, context: ...)])
+    """
+
+    EVENTS = ('request', 'response', 'error', 'decode', 'page', 'retry')
+
+    def __init__(self, **callbacks: Callable):
+        """
+        参数:
+            callbacks: 事件名(request、response、error、decode、page、retry) -> 回调函数，参数与对应的 on_* 方法相同
+        """
+        for event, callback in callbacks.items():
+            if event not in self.EVENTS:
+                raise ValueError(f"未知的事件: {event}")
+            setattr(self, f'on_{event}', callback)
+
+
+class Hooks:
+    """把事件分发给所有观察者(客户端内部使用)
+
+    没有观察者时为假值，调用方据此跳过计时等开销。
+    """
+
+    def __init__(self, observers: Iterable[ClientObserver] = ()):
+        self.observers: List[ClientObserver] = list(observers)
+
+    def __bool__(self):
+        return bool(self.observers)
+
+    def add(self, observer: ClientObserver):
+        self.observers.append(observer)
+
+    def _emit(self, event: str, *args) -> List[Any]:
+        results = []
+        for observer in self.observers:
+            try:
+                results.append(getattr(observer, event)(*args))
+            except Exception as e:
+                logger.warning(f"观察者 {type(observer).__name__}.{event} 出错: {e}")
+                results.append(None)
+        return results
+
+    def request(self, resource: str, url: str, attempt: int) -> List[Any]:
+        """返回各观察者的上下文，传给 response / error"""
+        return self._emit('on_request', resource, url, attempt)
+
+    def response(self, resource: str, url: str, attempt: int, status: int, elapsed: float,
+                 network: Optional[float], contexts: List[Any]):
+        for observer, context in zip(self.observers, contexts):
+            try:
+                observer.on_response(resource, url, attempt, status, elapsed, network, context)
+            except Exception as e:
+                logger.warning(f"观察者 {type(observer).__name__}.on_response 出错: {e}")
+
+    def error(self, resource: str, url: str, attempt: int, error: Exception, elapsed: float, contexts: List[Any]):
+        for observer, context in zip(self.observers, contexts):
+            try:
+                observer.on_error(resource, url, attempt, error, elapsed, context)
+            except Exception as e:
+                logger.warning(f"观察者 {type(observer).__name__}.on_error 出错: {e}")
+
+    def decode(self, resource: str, kind: str, seconds: float, size: int):
+        self._emit('on_decode', resource, kind, seconds, size)
+
+    def page(self, resource: str, items: int, seconds: float):
+        self._emit('on_page', resource, items, seconds)
+
+    def retry(self, resource: str, url: str, attempt: int, delay: float, error: Exception, level: str = 'request'):
+        self._emit('on_retry', resource, url, attempt, delay, error, level)
+
+
+def normalize_page(client, resource: str, batch: List[Dict[str, Any]], as_records: bool = False,
+                   variant=None) -> List[Union[Dict[str, Any], PinRecord]]:
+    """
+    规范化一页原始图片数据，并通知客户端的观察者
+
+    参数:
+        client: PinterestClient实例
+        resource: 资源名称
+        batch: 原始图片列表
+        as_records: 为True时返回PinRecord而不是字典
+        variant: 图片尺寸选择策略
+    返回:
+        规范化后的图片列表
+    """
+    hooks = getattr(client, 'hooks', None)
+    if not hooks:
+        return normalize_records(batch, variant) if as_records else normalize_pins(batch, variant)
+    start = time.perf_counter()
+    page = normalize_records(batch, variant) if as_records else normalize_pins(batch, variant)
+    hooks.page(resource, len(page), time.perf_counter() - start)
+    return page
@@ -0,0 +1,259 @@
+import os
+import asyncio
+from http.cookies import SimpleCookie
+from typing import List, Dict, Any, Iterable, Optional
+import httpx
+from .config import IDENTITY_MAX_CONNECTIONS, IDENTITY_MAX_FAILURES, IDENTITY_ATTEMPTS
+from .ratelimit import RateLimiter
+from .session import SessionKeeper, auth_failure_reason
+from .utils import logger
+
+
+class IdentityPoolExhausted(Exception):
+    """所有身份均已停用"""
+
+
+def parse_cookie_str(cookie_str: str) -> Dict[str, str]:
+    """解析 'k1=v1; k2=v2' 格式的cookie字符串"""
+    cookie = SimpleCookie()
+    cookie.load(cookie_str)
+    return {key: morsel.value for key, morsel in cookie.items()}
+
+
+class Identity:
+    """一个登录身份: 独立的cookie、会话(CSRF令牌)、连接池和限速器"""
+
+    def __init__(self, name: str, cookies: Dict[str, str], limiter: RateLimiter, proxy: Optional[str] = None):
+        self.name = name
+        self.cookies = cookies
+        self.limiter = limiter
+        self.proxy = proxy
+        self.keeper = SessionKeeper()
+        self.http: Optional[httpx.AsyncClient] = None
+        self.inflight = 0
+        self.requests = 0
+        self.failures = 0  # 连续认证失败次数
+        self.retired = False
+        self.reason = None  # 停用原因
+
+    @property
+    def csrftoken(self) -> Optional[str]:
+        return self.cookies.get('csrftoken')
+
+    @property
+    def authenticated(self) -> bool:
+        """cookie是否为已登录会话(_auth=1)"""
+        return self.cookies.get('_auth') == '1'
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'identity': self.name,
+            'requests': self.requests,
+            'inflight': self.inflight,
+            'failures': self.failures,
+            'retired': self.retired,
+            'reason': self.reason,
+            'rate': self.limiter.snapshot(),
+        }
+
+
+class IdentityPool:
+    """身份(cookie)池(异步)
+
+    每个身份拥有独立的 httpx.AsyncClient、CSRF令牌和按接口的自适应限速器，
+    每次请求分派给在途请求最少的身份，总吞吐随身份数量增长。
+    打开时预热每个身份的会话；响应表明会话失效时先刷新该身份的会话(获取新的csrftoken)重发一次，
+    仍然失效时换一个身份重试，同一身份连续失效达到 max_failures 次后停用。
+
+    用法:
+        async with IdentityPool(cookie_files=['a.txt', 'b.txt']) as identities:
+            async with ClientPool(identity_pool=identities) as pool:
+                ...
+    """
+
+    def __init__(
+        self,
+        cookie_files: Iterable[str] = (),
+        cookie_strs: Iterable[str] = (),
+        ver_i=2,
+        proxies: Optional[List[str]] = None,
+        max_connections: int = IDENTITY_MAX_CONNECTIONS,
+        timeout: float = 60.0,
+        rate: Optional[Dict[str, Any]] = None,
+        overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+        max_failures: int = IDENTITY_MAX_FAILURES,
+    ):
+        """
+        初始化身份池
+
+        参数:
+            cookie_files: cookie文件路径列表，每个文件一个身份
+            cookie_strs: cookie字符串列表，每个字符串一个身份
+            ver_i: API版本索引
+            proxies: 代理地址列表，按顺序轮流分配给各身份(同一身份固定使用同一出口)
+            max_connections: 每个身份的最大连接数
+            timeout: 请求超时(秒)
+            rate: 每个身份的默认桶参数，见 AdaptiveBucket
+            overrides: 每个身份按接口覆盖的桶参数
+            max_failures: 连续认证失败达到该次数时停用身份
+        """
+        from .client_async import load_cookie_file
+
+        self.ver_i = ver_i
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.timeout = timeout
+        self.max_failures = max_failures
+        sources = []
+        for path in cookie_files:
+            cookies = load_cookie_file(path)
+            if cookies:
+                sources.append((os.path.basename(path), cookies))
+        for i, cookie_str in enumerate(cookie_strs):
+            sources.append((f'cookie-{i}', parse_cookie_str(cookie_str)))
+        if not sources:
+            raise ValueError("没有可用的cookie")
+        self.identities = [
+            Identity(name, cookies, RateLimiter(overrides, **(rate or {})), proxies[i % len(proxies)] if proxies else None)
+            for i, (name, cookies) in enumerate(sources)
+        ]
+        self._opened = False
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    def __len__(self):
+        """可用的身份数"""
+        return sum(not identity.retired for identity in self.identities)
+
+    async def open(self):
+        """为每个身份创建httpx客户端并预热会话(已打开时直接返回)"""
+        if self._opened:
+            return
+        from .client_async import build_headers
+
+        for identity in self.identities:
+            headers = build_headers(self.ver_i)
+            if identity.csrftoken:
+                headers['X-CSRFToken'] = identity.csrftoken
+            identity.http = httpx.AsyncClient(
+                headers=headers,
+                cookies=identity.cookies,
+                proxies=identity.proxy,
+                timeout=self.timeout,
+                limits=self.limits,
+                follow_redirects=True,
+            )
+        self._opened = True
+        await asyncio.gather(*(identity.keeper.prepare(identity.http) for identity in self.identities))
+
+    async def aclose(self):
+        """关闭所有身份的连接"""
+        if not self._opened:
+            return
+        await asyncio.gather(*(identity.http.aclose() for identity in self.identities))
+        self._opened = False
+        logger.info(f"身份池已关闭: {self.stats()}")
+
+    def choose(self, endpoint: str, exclude: Iterable[Identity] = ()) -> Optional[Identity]:
+        """
+        选择在途请求最少的身份，相同时选择限速等待最短的
+
+        参数:
+            endpoint: 接口名称
+            exclude: 不选择的身份(换身份重试时已经尝试过的)
+        返回:
+            身份，可用的身份都在 exclude 中时返回None
+        """
+        live = [i for i in self.identities if not i.retired]
+        if not live:
+            raise IdentityPoolExhausted("所有身份均已停用")
+        candidates = [i for i in live if i not in exclude]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda i: (i.inflight, i.limiter.bucket(endpoint).wait_time()))
+
+    def auth_failure(self, identity: Identity, r: httpx.Response) -> Optional[str]:
+        """响应表明会话失效时返回原因，否则返回None(规则与单个客户端相同，见 session.auth_failure_reason)"""
+        return auth_failure_reason(r, identity.authenticated)
+
+    async def send(self, endpoint: str, url: str, params=None, timeout=60) -> httpx.Response:
+        """
+        通过选中的身份发送GET请求，按身份限速；会话失效时换一个身份重试
+
+        参数:
+            endpoint: 接口名称
+            url: 请求地址
+            params: 查询参数
+            timeout: 超时(秒)
+        返回:
+            httpx.Response，所有尝试都失效时返回最后一个响应
+        """
+        tried = []
+        r = None
+        while len(tried) < IDENTITY_ATTEMPTS:
+            # 每个身份最多尝试一次，同一个请求不会让一个身份被记多次失败
+            identity = self.choose(endpoint, exclude=tried)
+            if identity is None:
+                break
+            await identity.limiter.acquire(endpoint)
+            if identity.retired:
+                # 等待限速期间身份已被停用
+                continue
+            tried.append(identity)
+            generation = identity.keeper.generation
+            r = await self._get(identity, endpoint, url, params, timeout)
+            reason = self.auth_failure(identity, r)
+            if reason is not None and await identity.keeper.refresh(identity.http, generation):
+                # 先刷新该身份的会话，重发一次
+                await identity.limiter.acquire(endpoint)
+                r = await self._get(identity, endpoint, url, params, timeout)
+                reason = self.auth_failure(identity, r)
+            if reason is None:
+                identity.failures = 0
+                return r
+            self._strike(identity, reason)
+        if r is None:
+            raise IdentityPoolExhausted("所有身份均已停用")
+        return r
+
+    async def _get(self, identity: Identity, endpoint: str, url: str, params, timeout) -> httpx.Response:
+        """通过指定身份发送一次请求(已限速)"""
+        identity.inflight += 1
+        identity.requests += 1
+        try:
+            r = await identity.http.get(url, params=params, timeout=timeout)
+        except httpx.TimeoutException:
+            identity.limiter.feedback(endpoint, timeout=True)
+            raise
+        finally:
+            identity.inflight -= 1
+        identity.limiter.feedback(endpoint, r.status_code)
+        identity.keeper.observe(identity.http, r)
+        return r
+
+    def _strike(self, identity: Identity, reason: str):
+        """记录一次认证失败，连续失败过多时停用"""
+        identity.failures += 1
+        if identity.failures >= self.max_failures:
+            self._retire(identity, reason)
+
+    def _retire(self, identity: Identity, reason: str):
+        if identity.retired:
+            return
+        identity.retired = True
+        identity.reason = reason
+        logger.warning(f"身份 {identity.name} 已停用({reason})，剩余 {len(self)} 个")
+
+    def retire(self, name: str, reason: str = '手动停用'):
+        """停用指定身份"""
+        for identity in self.identities:
+            if identity.name == name:
+                self._retire(identity, reason)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """各身份的请求数、在途请求数、连续失败次数和停用状态"""
+        return [identity.as_dict() for identity in self.identities]
@@ -0,0 +1,270 @@
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Union
+from .config import JOB_QUEUE_PATH, JOB_VISIBILITY_TIMEOUT, JOB_MAX_ATTEMPTS
+
+# 任务类型: 画板图片、搜索图片、图片的相关推荐
+JOB_KINDS = ('board', 'search', 'pin')
+
+
+class Job:
+    """队列中的一个任务"""
+
+    __slots__ = ('id', 'kind', 'target', 'payload', 'attempts', 'lease')
+
+    def __init__(self, id, kind: str, target: str, payload: Dict[str, Any] = None, attempts: int = 0, lease: str = None):
+        self.id = id
+        self.kind = kind
+        self.target = target
+        self.payload = payload or {}
+        self.attempts = attempts  # 含本次在内的尝试次数
+        self.lease = lease  # 租约标识，确认/退回时校验
+
+    def __repr__(self):
+        return f"Job({self.kind}={self.target}, id={self.id}, attempts={self.attempts})"
+
+
+class JobQueue(ABC):
+    """任务队列接口
+
+    工作进程通过 lease 领取任务并获得有时限的租约；处理完成后 ack，失败时 nack。
+    租约到期仍未确认的任务重新变为可领取，因此工作进程崩溃不会丢失任务；
+    ack/nack 校验租约，过期租约的确认无效，避免同一任务被重复确认。
+    已完成或失败的任务再次 put 时会被忽略(避免崩溃后重新运行同一批任务时重复抓取)，需要重新执行时调用 requeue。
+    其他后端(如Redis)实现这些抽象方法即可替换本地的 SqliteJobQueue。
+    """
+
+    def put(self, kind: str, target: str, payload: Dict[str, Any] = None) -> bool:
+        """
+        添加任务，同类型同目标的任务已存在时(包括已完成、已失败的任务)忽略
+
+        参数:
+            kind: 任务类型(board、search、pin)
+            target: 画板ID、搜索词或图片ID
+            payload: 附加参数
+        返回:
+            是否新增
+        """
+        return self.put_many([(kind, target, payload)]) > 0
+
+    @abstractmethod
+    def put_many(self, jobs: Iterable[Union[Tuple[str, str], Tuple[str, str, Dict[str, Any]]]]) -> int:
+        """批量添加任务，返回新增的数量"""
+
+    @abstractmethod
+    def lease(self, worker: str, visibility_timeout: float = JOB_VISIBILITY_TIMEOUT) -> Optional[Job]:
+        """
+        领取一个任务
+
+        参数:
+            worker: 工作进程标识
+            visibility_timeout: 租约时长(秒)
+        返回:
+            任务，没有可领取的任务时返回None
+        """
+
+    @abstractmethod
+    def extend(self, job: Job, visibility_timeout: float = JOB_VISIBILITY_TIMEOUT) -> bool:
+        """延长租约(心跳)，租约已失效时返回False"""
+
+    @abstractmethod
+    def ack(self, job: Job) -> bool:
+        """确认任务完成，租约已失效时返回False"""
+
+    @abstractmethod
+    def nack(self, job: Job, error: str = None, delay: float = 0.0) -> bool:
+        """
+        退回任务
+
+        未超过最大尝试次数时在 delay 秒后重新可领取，否则标记为失败。
+
+        参数:
+            job: 任务
+            error: 错误信息
+            delay: 重新可领取前的等待时间(秒)
+        返回:
+            租约是否有效
+        """
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """各状态(ready、leased、done、failed)的任务数"""
+
+    def requeue(self, kind: str, target: str) -> bool:
+        """
+        把已完成或已失败的任务重新放回队列(尝试次数清零)，任务不存在时添加
+
+        参数:
+            kind: 任务类型
+            target: 画板ID、搜索词或图片ID
+        返回:
+            是否放回或新增
+        """
+        return self.requeue_many([(kind, target)]) > 0
+
+    @abstractmethod
+    def requeue_many(self, jobs: Iterable[Union[Tuple[str, str], Tuple[str, str, Dict[str, Any]]]]) -> int:
+        """批量重新放回任务，返回放回和新增的数量；等待中或执行中的任务不受影响"""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class SqliteJobQueue(JobQueue):
+    """基于SQLite的本地任务队列
+
+    多个进程可以同时打开同一个文件领取任务(领取在 BEGIN IMMEDIATE 事务中进行)。
+    同一个实例可以在多个线程中使用(如通过 asyncio.to_thread 调用，避免等待写锁时阻塞事件循环)。
+    SQLite文件应放在本地磁盘上，不要放在网络文件系统中。
+    """
+
+    def __init__(self, path: str = JOB_QUEUE_PATH, max_attempts: int = JOB_MAX_ATTEMPTS):
+        """
+        初始化队列
+
+        参数:
+            path: SQLite文件路径
+            max_attempts: 单个任务的最大尝试次数
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, kind TEXT, target TEXT, payload TEXT, '
+            "state TEXT DEFAULT 'ready', attempts INTEGER DEFAULT 0, available REAL DEFAULT 0, "
+            'lease TEXT, worker TEXT, error TEXT, updated REAL, UNIQUE(kind, target))'
+        )
+        self._db.execute('CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state, available)')
+
+    def put_many(self, jobs: Iterable[Union[Tuple[str, str], Tuple[str, str, Dict[str, Any]]]]) -> int:
+        rows = []
+        for job in jobs:
+            kind, target = job[0], str(job[1])
+            if kind not in JOB_KINDS:
+                raise ValueError(f"未知的任务类型: {kind}")
+            payload = job[2] if len(job) > 2 else None
+            rows.append((kind, target, json.dumps(payload or {}, ensure_ascii=False), time.time()))
+        db = self._db
+        with self._lock:
+            before = db.total_changes
+            db.execute('BEGIN IMMEDIATE')
+            db.executemany('INSERT OR IGNORE INTO jobs (kind, target, payload, updated) VALUES (?, ?, ?, ?)', rows)
+            db.execute('COMMIT')
+            return db.total_changes - before
+
+    def lease(self, worker: str, visibility_timeout: float = JOB_VISIBILITY_TIMEOUT) -> Optional[Job]:
+        with self._lock:
+            db = self._db
+            now = time.time()
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                # 可领取: 等待中且已到可领取时间，或租约已过期
+                row = db.execute(
+                    "SELECT id, kind, target, payload, attempts FROM jobs "
+                    "WHERE (state = 'ready' AND available <= ?) OR (state = 'leased' AND available <= ?) "
+                    "ORDER BY id LIMIT 1", (now, now),
+                ).fetchone()
+                if row is None:
+                    db.execute('COMMIT')
+                    return None
+                job_id, kind, target, payload, attempts = row
+                if attempts >= self.max_attempts:
+                    # 租约过期且次数已用尽(工作进程反复崩溃)
+                    db.execute(
+                        "UPDATE jobs SET state = 'failed', error = ?, updated = ? WHERE id = ?",
+                        ('租约过期且尝试次数已用尽', now, job_id),
+                    )
+                    db.execute('COMMIT')
+                    return self.lease(worker, visibility_timeout)
+                lease = uuid.uuid4().hex
+                db.execute(
+                    "UPDATE jobs SET state = 'leased', attempts = attempts + 1, available = ?, lease = ?, worker = ?, updated = ? "
+                    "WHERE id = ?", (now + visibility_timeout, lease, worker, now, job_id),
+                )
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            return Job(job_id, kind, target, json.loads(payload), attempts + 1, lease)
+
+    def _update_leased(self, job: Job, sql: str, args: tuple) -> bool:
+        with self._lock:
+            cur = self._db.execute(sql + " WHERE id = ? AND lease = ? AND state = 'leased'", args + (job.id, job.lease))
+            return cur.rowcount > 0
+
+    def extend(self, job: Job, visibility_timeout: float = JOB_VISIBILITY_TIMEOUT) -> bool:
+        now = time.time()
+        return self._update_leased(job, 'UPDATE jobs SET available = ?, updated = ?', (now + visibility_timeout, now))
+
+    def ack(self, job: Job) -> bool:
+        return self._update_leased(
+            job, "UPDATE jobs SET state = 'done', lease = NULL, error = NULL, updated = ?", (time.time(),)
+        )
+
+    def nack(self, job: Job, error: str = None, delay: float = 0.0) -> bool:
+        now = time.time()
+        if job.attempts >= self.max_attempts:
+            return self._update_leased(
+                job, "UPDATE jobs SET state = 'failed', lease = NULL, error = ?, updated = ?", (error, now)
+            )
+        return self._update_leased(
+            job, "UPDATE jobs SET state = 'ready', lease = NULL, available = ?, error = ?, updated = ?",
+            (now + delay, error, now),
+        )
+
+    def stats(self) -> Dict[str, int]:
+        counts = dict.fromkeys(('ready', 'leased', 'done', 'failed'), 0)
+        with self._lock:
+            counts.update(self._db.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall())
+        return counts
+
+    def failed(self) -> List[Dict[str, Any]]:
+        """失败的任务及错误信息"""
+        with self._lock:
+            rows = self._db.execute("SELECT kind, target, attempts, error FROM jobs WHERE state = 'failed' ORDER BY id").fetchall()
+        return [{'kind': k, 'target': t, 'attempts': a, 'error': e} for k, t, a, e in rows]
+
+    def requeue_many(self, jobs: Iterable[Union[Tuple[str, str], Tuple[str, str, Dict[str, Any]]]]) -> int:
+        jobs = list(jobs)
+        now = time.time()
+        with self._lock:
+            db = self._db
+            before = db.total_changes
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                db.executemany(
+                    "UPDATE jobs SET state = 'ready', attempts = 0, available = 0, lease = NULL, error = NULL, updated = ? "
+                    "WHERE kind = ? AND target = ? AND state IN ('done', 'failed')",
+                    [(now, job[0], str(job[1])) for job in jobs],
+                )
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            changed = db.total_changes - before
+        return changed + self.put_many(jobs)
+
+    def retry_failed(self) -> int:
+        """把失败的任务重新放回队列，返回数量"""
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE jobs SET state = 'ready', attempts = 0, available = 0, updated = ? WHERE state = 'failed'", (time.time(),)
+            )
+            return cur.rowcount
+
+    def close(self):
+        with self._lock:
+            self._db.close()
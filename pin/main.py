@@ -1,14 +1,30 @@
 import json
 import asyncio
 import os
-from client import PinterestClient
-from utils import logger
-from config import MAX_CONCURRENT
+from .pool import ClientPool
+from .utils import logger
 
-async def fetch_with_limit(board_id, uname, board_slug, semaphore):
-    async with semaphore:
-        async with PinterestClient() as client:
-            return board_id, await client.board.get(board_id, uname, board_slug)
+async def fetch_board(pool, board_id, uname, board_slug):
+    async with pool.client() as client:
+        return board_id, await client.board.get_pics_data_origin(board_id, uname, board_slug)
+
+async def export_board(pool, board_id, path):
+    """逐页把画板图片写入Parquet/Arrow文件"""
+    from .sinks import ArrowSink
+    async with pool.client() as client:
+        with ArrowSink(path) as sink:
+            async for page in client.board.aiter_pics(board_id, as_records=True):
+                sink.write(page)
+    return board_id, sink.rows
+
+async def stream_board(pool, board_id, uname, board_slug, path):
+    """逐页把画板原始数据追加写入NDJSON文件"""
+    from .sinks import NdjsonSink
+    async with pool.client() as client:
+        with NdjsonSink(path) as sink:
+            async for page in client.board.aiter_pics_origin(board_id, uname, board_slug):
+                sink.write(page)
+    return board_id, sink.rows
 
 async def main():
     # Pinterest配置
@@ -18,20 +34,39 @@ async def main():
     # Pin ID列表
     ids = ['604538018670785766']  # 您的完整ID列表
 
-    # 创建并发限制
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT)
+    # 保存配置:
+    #   json: 原始数据，全部获取后一次性写入
+    #   ndjson / ndjson.gz / ndjson.zst: 原始数据，每页获取后立即追加写入(zst需要zstandard)
+    #   parquet / arrow: 规范化后的列式文件(需要pyarrow)
+    save_dir = '厚涂'
+    save_format = 'json'
 
     try:
-        # 执行所有任务
-        tasks = [
-            fetch_with_limit(board_id, uname, board_slug, semaphore)
-            for board_id in ids
-        ]
-        results = await asyncio.gather(*tasks)
+        os.makedirs(save_dir, exist_ok=True)
+        # 所有任务共用一个连接池，请求速率由连接池的自适应限速器控制
+        async with ClientPool() as pool:
+            if save_format != 'json':
+                if save_format.startswith('ndjson'):
+                    tasks = [
+                        stream_board(pool, board_id, uname, board_slug, f'{save_dir}/{board_id}.{save_format}')
+                        for board_id in ids
+                    ]
+                else:
+                    tasks = [
+                        export_board(pool, board_id, f'{save_dir}/{board_id}.{save_format}')
+                        for board_id in ids
+                    ]
+                for board_id, rows in await asyncio.gather(*tasks):
+                    logger.info(f"画板 {board_id}: 已写入 {rows} 张图片")
+                return
+
+            tasks = [
+                fetch_board(pool, board_id, uname, board_slug)
+                for board_id in ids
+            ]
+            results = await asyncio.gather(*tasks)
 
         # 保存结果
-        save_dir = '厚涂'
-        os.makedirs(save_dir, exist_ok=True)
         for board_id, images in results:
             with open(f'{save_dir}/{board_id}.json', 'w') as f:
                 json.dump(images, f)
@@ -39,4 +74,4 @@ async def main():
         logger.error(f"执行过程中出现错误: {e}")
 
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,228 @@
+import json
+import time
+import bisect
+import threading
+from collections import Counter
+from typing import List, Dict, Any, Optional, Sequence
+import httpx
+from .config import METRICS_LATENCY_BUCKETS, METRICS_DECODE_BUCKETS, METRICS_PAGE_BUCKETS
+
+
+def network_time(r: httpx.Response) -> Optional[float]:
+    """响应的网络耗时(从发送请求到读完响应体)，响应体未读完时返回None"""
+    try:
+        return r.elapsed.total_seconds()
+    except RuntimeError:
+        return None
+
+
+class Histogram:
+    """固定桶的直方图(与Prometheus的累计桶格式一致)"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个为 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按桶上界估计分位数，没有数据时返回None"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float('inf')
+        return float('inf')
+
+    def cumulative(self) -> List[int]:
+        """各桶(含 +Inf)的累计计数"""
+        total, result = 0, []
+        for n in self.counts:
+            total += n
+            result.append(total)
+        return result
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else None,
+            'p50': self.quantile(0.5),
+            'p90': self.quantile(0.9),
+            'p99': self.quantile(0.99),
+            'buckets': dict(zip([*map(str, self.buckets), '+Inf'], self.cumulative())),
+        }
+
+
+class EndpointMetrics:
+    """一个资源(接口)的指标"""
+
+    def __init__(self):
+        self.requests = 0
+        self.status: Counter = Counter()
+        self.errors: Counter = Counter()  # 异常类型 -> 次数
+        self.retries = 0
+        self.bytes = 0
+        self.pages = 0
+        self.items = 0
+        self.latency = Histogram(METRICS_LATENCY_BUCKETS)
+        self.decode = Histogram(METRICS_DECODE_BUCKETS)
+        self.page_size = Histogram(METRICS_PAGE_BUCKETS)
+
+    def as_dict(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'status': {str(k): v for k, v in sorted(self.status.items())},
+            'errors': dict(self.errors),
+            'retries': self.retries,
+            'bytes': self.bytes,
+            'pages': self.pages,
+            'items': self.items,
+            'pages_per_sec': round(self.pages / elapsed, 3) if elapsed > 0 else 0.0,
+            'latency': self.latency.as_dict(),
+            'decode': self.decode.as_dict(),
+            'page_size': self.page_size.as_dict(),
+        }
+
+
+class Metrics:
+    """按资源划分的请求指标
+
+    客户端在每次请求、重试、解码和分页时记录：请求数、状态码、异常、重试次数、响应字节数(网络传输量)、
+    请求耗时和解码耗时直方图、每页条目数。图片HTML页面记为 pin。线程安全，多个客户端可以共用一个实例。
+
+    用法:
+        client = PinterestClient(metrics=Metrics())
+        ...
+        print(client.metrics.snapshot())
+        open('metrics.prom', 'w').write(client.metrics.to_prometheus())
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.endpoints: Dict[str, EndpointMetrics] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, endpoint: str) -> EndpointMetrics:
+        m = self.endpoints.get(endpoint)
+        if m is None:
+            m = self.endpoints.setdefault(endpoint, EndpointMetrics())
+        return m
+
+    def response(self, endpoint: str, r: httpx.Response):
+        """记录一个响应的状态码、耗时和字节数"""
+        with self._lock:
+            m = self._get(endpoint)
+            m.requests += 1
+            m.status[r.status_code] += 1
+            m.bytes += r.num_bytes_downloaded
+            elapsed = network_time(r)
+            if elapsed is not None:
+                m.latency.observe(elapsed)
+
+    def failure(self, endpoint: str, exc: Exception, response: bool = False):
+        """
+        记录一次失败的尝试
+
+        参数:
+            endpoint: 资源名称
+            exc: 异常
+            response: 是否已收到响应(已收到时请求数已经计入)
+        """
+        with self._lock:
+            m = self._get(endpoint)
+            if not response:
+                m.requests += 1
+            m.errors[type(exc).__name__] += 1
+
+    def retry(self, endpoint: str):
+        with self._lock:
+            self._get(endpoint).retries += 1
+
+    def decoded(self, endpoint: str, seconds: float):
+        with self._lock:
+            self._get(endpoint).decode.observe(seconds)
+
+    def page(self, endpoint: str, items: int):
+        """记录一页数据的条目数"""
+        with self._lock:
+            m = self._get(endpoint)
+            m.pages += 1
+            m.items += items
+            m.page_size.observe(items)
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+            self.started = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        当前指标
+
+        返回:
+            {'elapsed': 秒数, 'endpoints': {资源名称: 指标}}
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            return {
+                'elapsed': round(elapsed, 3),
+                'endpoints': {name: m.as_dict(elapsed) for name, m in sorted(self.endpoints.items())},
+            }
+
+    def to_json(self, indent: Optional[int] = None) -> str:
+        """JSON格式的指标"""
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=indent)
+
+    def to_prometheus(self, prefix: str = 'pin') -> str:
+        """Prometheus文本格式的指标"""
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+
+        def sample(name: str, labels: Dict[str, Any], value):
+            label = ','.join(f'{k}="{v}"' for k, v in labels.items())
+            lines.append(f"{prefix}_{name}{{{label}}} {value}")
+
+        def histogram(name: str, help_text: str, attr: str):
+            family(name, 'histogram', help_text)
+            for endpoint, m in endpoints:
+                h = getattr(m, attr)
+                for le, n in zip([*map(str, h.buckets), '+Inf'], h.cumulative()):
+                    sample(f'{name}_bucket', {'resource': endpoint, 'le': le}, n)
+                sample(f'{name}_sum', {'resource': endpoint}, round(h.sum, 6))
+                sample(f'{name}_count', {'resource': endpoint}, h.count)
+
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            family('requests_total', 'counter', '按状态码的响应数')
+            for endpoint, m in endpoints:
+                for status, n in sorted(m.status.items()):
+                    sample('requests_total', {'resource': endpoint, 'status': status}, n)
+            family('errors_total', 'counter', '按异常类型的失败次数')
+            for endpoint, m in endpoints:
+                for error, n in sorted(m.errors.items()):
+                    sample('errors_total', {'resource': endpoint, 'error': error}, n)
+            for name, attr, help_text in (
+                ('retries_total', 'retries', '重试次数'),
+                ('response_bytes_total', 'bytes', '响应字节数(网络传输量)'),
+                ('pages_total', 'pages', '分页数'),
+                ('items_total', 'items', '分页条目数'),
+            ):
+                family(name, 'counter', help_text)
+                for endpoint, m in endpoints:
+                    sample(name, {'resource': endpoint}, getattr(m, attr))
+            histogram('request_duration_seconds', '请求耗时(秒)', 'latency')
+            histogram('decode_duration_seconds', 'JSON解码耗时(秒)', 'decode')
+            histogram('page_items', '每页条目数', 'page_size')
+        return '\n'.join(lines) + '\n'
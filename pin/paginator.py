@@ -0,0 +1,434 @@
+import json
+import time
+import asyncio
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Iterable, Optional, Iterator, AsyncIterator, Tuple
+from .utils import logger
+from .retry import PageRetryPolicy
+
+# 资源接口地址
+RESOURCE_URL = 'https://www.pinterest.com/resource/{}/get/'
+NGJS_RESOURCE_URL = 'https://www.pinterest.com/_ngjs/resource/{}/get/'
+
+# 表示没有下一页的bookmark
+END_BOOKMARKS = ('-end-', '%22-end-%22')
+
+
+def build_params(options: Dict[str, Any], source_url: str = None) -> str:
+    """
+    构建资源请求的查询字符串
+
+    参数:
+        options: 资源参数
+        source_url: 来源页面
+    返回:
+        编码后的查询字符串
+    """
+    query = {}
+    if source_url is not None:
+        query['source_url'] = source_url
+    query['data'] = {
+        'options': options,
+        'context': {}
+    }
+    query['_'] = int(time.time()*1000)
+    return urllib.parse.urlencode(query).replace('+', '').replace('%27', '%22').replace('%3A%22true%22', '%3Atrue').replace('%3A%22false%22', '%3Afalse')
+
+
+def is_end(bookmark: Optional[str]) -> bool:
+    """判断bookmark是否表示最后一页"""
+    return not bookmark or bookmark in END_BOOKMARKS
+
+
+class PaginationError(Exception):
+    """分页中途失败(同一bookmark的分页重试已耗尽)
+
+    已产出的页面有效；从 bookmark 继续即可补齐剩余部分(使用检查点时重新运行同样的调用即可)。
+    """
+
+    def __init__(self, message: str, resource: str, bookmark: Optional[str], pages: int, items: int):
+        super().__init__(message)
+        self.resource = resource
+        self.bookmark = bookmark  # 失败页面的bookmark
+        self.pages = pages  # 失败前已获取的页数
+        self.items = items  # 失败前已获取的条数
+
+
+class PagedResult(list):
+    """分页结果列表
+
+    与普通列表用法相同，另外记录分页是否完整:
+        completed: 是否包含从第一页到最后一页的全部数据
+        bookmark: 未完成时失败页面的bookmark，可用于只补抓剩余部分
+        error: 未完成时的异常(PaginationError)
+    """
+
+    def __init__(self, items: Iterable = (), completed: bool = True, bookmark: Optional[str] = None, error: Exception = None):
+        super().__init__(items)
+        self.completed = completed
+        self.bookmark = bookmark
+        self.error = error
+
+    def derive(self, items: Iterable) -> 'PagedResult':
+        """用新的条目创建结果，保留完整性信息"""
+        return PagedResult(items, self.completed, self.bookmark, self.error)
+
+    def _fail(self, e: PaginationError):
+        self.completed = False
+        self.bookmark = e.bookmark
+        self.error = e
+
+
+def collect(pages: Iterable[List[Any]]) -> PagedResult:
+    """
+    把逐页产出的数据合并为一个列表
+
+    分页中途失败时返回已获取的部分，并标记为未完成，而不是抛出异常或静默截断。
+
+    参数:
+        pages: 分页生成器
+    返回:
+        PagedResult
+    """
+    result = PagedResult()
+    try:
+        for page in pages:
+            result.extend(page)
+    except PaginationError as e:
+        result._fail(e)
+    return result
+
+
+async def acollect(pages: AsyncIterator[List[Any]]) -> PagedResult:
+    """collect 的异步版本"""
+    result = PagedResult()
+    try:
+        async for page in pages:
+            result.extend(page)
+    except PaginationError as e:
+        result._fail(e)
+    return result
+
+
+class PageStats:
+    """分页统计"""
+
+    def __init__(self, resource: str):
+        self.resource = resource
+        self.pages = 0
+        self.items = 0
+        self.skipped = 0  # 已见过而被跳过的条目数
+        self.started = time.monotonic()
+        self.finished = None
+
+    def add(self, batch: List[Any]):
+        self.pages += 1
+        self.items += len(batch)
+
+    def finish(self):
+        self.finished = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def pages_per_sec(self) -> float:
+        """每秒页数，大画板的主要吞吐指标"""
+        return self.pages / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def items_per_sec(self) -> float:
+        return self.items / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'resource': self.resource,
+            'pages': self.pages,
+            'items': self.items,
+            'skipped': self.skipped,
+            'elapsed': self.elapsed,
+            'pages_per_sec': self.pages_per_sec,
+            'items_per_sec': self.items_per_sec,
+        }
+
+
+class _PaginatorBase:
+    """bookmark分页引擎的公共部分"""
+
+    def __init__(
+        self,
+        client,
+        resource: str,
+        build_options: Callable[[Optional[str]], Dict[str, Any]],
+        source_url: str = None,
+        ngjs: bool = False,
+        results_key: str = None,
+        bookmark_source: str = 'options',
+        error: str = None,
+        progress: str = '获取数据',
+        summary: str = '条数据',
+        progress_level: str = 'DEBUG',
+        prefetch: bool = True,
+        seen=None,
+        mark_seen: bool = True,
+        checkpoint=None,
+        job_key: str = None,
+        page_retry: PageRetryPolicy = None,
+    ):
+        """
+        初始化分页器
+
+        参数:
+            client: PinterestClient实例
+            resource: 资源名称，如 BoardFeedResource
+            build_options: 根据bookmark构建请求参数的函数
+            source_url: 来源页面
+            ngjs: 是否使用 _ngjs 资源地址
+            results_key: 数据在 resource_response.data 下的键名(搜索接口为 results)
+            bookmark_source: 下一页bookmark的位置，options 或 response
+            error: 重试耗尽时的错误信息
+            progress: 进度日志前缀
+            summary: 结束日志的单位
+            progress_level: 进度日志级别
+            prefetch: 是否在拿到bookmark后立即预取下一页
+            seen: 已见集合(SeenSet)，指定后每页跳过已见过的条目
+            mark_seen: 是否在消费者取下一页时(即上一页已处理完)把上一页记为已见；
+                       为False时由调用方在写入成功后自行调用 seen.mark_seen
+            checkpoint: 检查点存储(CheckpointStore)，默认使用客户端的检查点存储
+            job_key: 检查点任务键，指定后(且有检查点存储)每消费完一页保存bookmark，
+                     中断的任务以同一个键重新运行时从最后的bookmark继续；不指定时不读写检查点。
+                     迭代器被关闭(提前停止、消费方异常)时保留检查点；同一个键用于不同的请求参数时抛出ValueError
+            page_retry: 分页级重试策略，请求重试耗尽后按此策略重试同一bookmark，默认新建一个PageRetryPolicy
+        """
+        self.client = client
+        self.resource = resource
+        self.url = (NGJS_RESOURCE_URL if ngjs else RESOURCE_URL).format(resource)
+        self.build_options = build_options
+        self.source_url = source_url
+        self.results_key = results_key
+        self.bookmark_source = bookmark_source
+        self.error = error or f"获取数据失败: {resource}"
+        self.progress = progress
+        self.summary = summary
+        self.progress_level = progress_level
+        self.prefetch = prefetch
+        self.seen = seen
+        self.mark_seen = mark_seen and seen is not None
+        if checkpoint is None:
+            checkpoint = getattr(client, 'checkpoint', None)
+        self.checkpoint = checkpoint if job_key is not None else None
+        self.job_key = job_key
+        self.resumed = False  # 是否从检查点继续
+        self.page_retry = page_retry or PageRetryPolicy()
+        self.stats = PageStats(resource)
+        self.metrics = getattr(client, 'metrics', None)
+        self._checkpoint_options = None
+        self._resumed_items = 0
+        self._resumed_pages = 0
+
+    def _extract(self, data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], str]:
+        """从响应中提取本页数据和下一页bookmark"""
+        batch = data['resource_response']['data']
+        if self.results_key:
+            batch = batch[self.results_key]
+        if self.bookmark_source == 'response':
+            bookmark = data['resource_response'].get('bookmark') or '-end-'
+        else:
+            bookmark = data['resource']['options'].get('bookmarks', ['-end-'])[0]
+        return batch, bookmark
+
+    def _resume(self) -> Optional[str]:
+        """读取检查点，返回继续的bookmark(从头开始时返回None)"""
+        if self.checkpoint is None:
+            return None
+        self._checkpoint_options = self.build_options(None)
+        state = self.checkpoint.load(self.job_key)
+        if state is None or state['done'] or is_end(state['bookmark']):
+            return None
+        options = json.loads(json.dumps(self._checkpoint_options, ensure_ascii=False, default=str))
+        if state['resource'] != self.resource or state['options'] != options:
+            raise ValueError(
+                f"检查点任务键 {self.job_key} 已用于其他请求({state['resource']} {state['options']})，"
+                f"请换一个任务键或先删除该检查点"
+            )
+        self.resumed = True
+        self._resumed_items = state['items']
+        self._resumed_pages = state['pages']
+        logger.info(f"从检查点继续 {self.resource}: 已获取 {state['items']} 条 / {state['pages']} 页")
+        return state['bookmark']
+
+    def _save_checkpoint(self, bookmark: str):
+        """保存下一页的bookmark"""
+        if self.checkpoint is None:
+            return
+        self.checkpoint.save(
+            self.job_key, self.resource, self._checkpoint_options, bookmark,
+            self._resumed_items + self.stats.items, self._resumed_pages + self.stats.pages, done=is_end(bookmark),
+        )
+
+    def _next_retry(self, bookmark: Optional[str], exc: Exception, attempt: int) -> float:
+        """决定是否重试同一bookmark，放弃时抛出PaginationError"""
+        delay = self.page_retry.next_delay(exc, attempt)
+        if delay is None:
+            logger.error(f"获取数据失败: {exc}")
+            raise PaginationError(
+                f"{exc} (已获取 {self.stats.pages} 页 / {self.stats.items} 条)",
+                self.resource, bookmark, self.stats.pages, self.stats.items,
+            ) from exc
+        logger.warning(
+            f"获取第 {self.stats.pages + 1} 页失败({exc})，{delay:.1f}s 后重试同一bookmark "
+            f"[{attempt + 1}/{self.page_retry.max_attempts - 1}]"
+        )
+        hooks = getattr(self.client, 'hooks', None)
+        if hooks:
+            hooks.retry(self.resource, self.url, attempt + 1, delay, exc, 'page')
+        return delay
+
+    def _filter(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """跳过已见过的条目"""
+        if self.seen is None:
+            return batch
+        new = self.seen.filter_unseen(batch)
+        self.stats.skipped += len(batch) - len(new)
+        return new
+
+    def _log_progress(self):
+        logger.log(self.progress_level, f"{self.progress} [ {self.stats.items} / ? ]")
+
+    def _log_summary(self):
+        self.stats.finish()
+        n = self.stats.items
+        skipped = f", 跳过已见 {self.stats.skipped}" if self.stats.skipped else ''
+        logger.success(
+            f"找到 {n} {self.summary}{'s' if n > 1 else ''} "
+            f"({self.stats.pages} 页, {self.stats.pages_per_sec:.2f} 页/秒{skipped})"
+        )
+
+
+class Paginator(_PaginatorBase):
+    """bookmark分页引擎(同步版本)
+
+    迭代时逐页产出数据；下一页在当前页被消费的同时于后台线程中请求。
+    某页失败时按分页级重试策略重试同一bookmark，重试耗尽时抛出PaginationError。
+    """
+
+    def _fetch(self, bookmark: Optional[str]) -> Tuple[List[Dict[str, Any]], str]:
+        """获取一页数据"""
+        try:
+            data = self.client.get_resource(self.url, self.build_options(bookmark), self.source_url)
+        except Exception as e:
+            # 重试已由客户端的重试策略处理
+            raise Exception(f"{self.error} ({e})") from e
+        return self._extract(data)
+
+    def _fetch_retry(self, bookmark: Optional[str], exc: Exception) -> Tuple[List[Dict[str, Any]], str]:
+        """按分页级重试策略重试同一bookmark"""
+        attempt = 0
+        while True:
+            time.sleep(self._next_retry(bookmark, exc, attempt))
+            attempt += 1
+            try:
+                return self._fetch(bookmark)
+            except Exception as e:
+                exc = e
+
+    def __iter__(self) -> Iterator[List[Dict[str, Any]]]:
+        executor = ThreadPoolExecutor(max_workers=1) if self.prefetch else None
+        pending = None
+        bookmark = self._resume()
+        try:
+            while True:
+                self._log_progress()
+                try:
+                    batch, next_bookmark = pending.result() if pending else self._fetch(bookmark)
+                except Exception as e:
+                    pending = None
+                    batch, next_bookmark = self._fetch_retry(bookmark, e)
+                pending = None
+                bookmark = next_bookmark
+
+                # bookmark已知，立即发起下一页请求
+                if executor and not is_end(bookmark):
+                    pending = executor.submit(self._fetch, bookmark)
+
+                if self.metrics is not None:
+                    self.metrics.page(self.resource, len(batch))
+                batch = self._filter(batch)
+                self.stats.add(batch)
+                yield batch
+                if self.mark_seen:
+                    self.seen.mark_seen(batch)
+                self._save_checkpoint(bookmark)
+
+                if is_end(bookmark):
+                    break
+        finally:
+            if pending:
+                pending.cancel()
+            if executor:
+                executor.shutdown(wait=False)
+            self._log_summary()
+
+
+class AsyncPaginator(_PaginatorBase):
+    """bookmark分页引擎(异步版本)
+
+    迭代时逐页产出数据；下一页在当前页被消费的同时作为后台任务请求。
+    某页失败时按分页级重试策略重试同一bookmark，重试耗尽时抛出PaginationError。
+    """
+
+    async def _fetch(self, bookmark: Optional[str]) -> Tuple[List[Dict[str, Any]], str]:
+        """获取一页数据"""
+        try:
+            data = await self.client.get_resource(self.url, self.build_options(bookmark), self.source_url)
+        except Exception as e:
+            # 重试已由客户端的重试策略处理
+            raise Exception(f"{self.error} ({e})") from e
+        return self._extract(data)
+
+    async def _fetch_retry(self, bookmark: Optional[str], exc: Exception) -> Tuple[List[Dict[str, Any]], str]:
+        """按分页级重试策略重试同一bookmark"""
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._next_retry(bookmark, exc, attempt))
+            attempt += 1
+            try:
+                return await self._fetch(bookmark)
+            except Exception as e:
+                exc = e
+
+    async def __aiter__(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        pending = None
+        bookmark = self._resume()
+        try:
+            while True:
+                self._log_progress()
+                try:
+                    batch, next_bookmark = await (pending if pending else self._fetch(bookmark))
+                except Exception as e:
+                    pending = None
+                    batch, next_bookmark = await self._fetch_retry(bookmark, e)
+                pending = None
+                bookmark = next_bookmark
+
+                # bookmark已知，立即发起下一页请求
+                if self.prefetch and not is_end(bookmark):
+                    pending = asyncio.ensure_future(self._fetch(bookmark))
+
+                if self.metrics is not None:
+                    self.metrics.page(self.resource, len(batch))
+                batch = self._filter(batch)
+                self.stats.add(batch)
+                yield batch
+                if self.mark_seen:
+                    await asyncio.to_thread(self.seen.mark_seen, batch)
+                self._save_checkpoint(bookmark)
+
+                if is_end(bookmark):
+                    break
+        finally:
+            if pending:
+                pending.cancel()
+            self._log_summary()
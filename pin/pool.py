@@ -0,0 +1,196 @@
+import asyncio
+from typing import Dict, Any
+import httpx
+from .config import POOL_MAX_CONNECTIONS, POOL_MAX_KEEPALIVE, POOL_KEEPALIVE_EXPIRY, POOL_HTTP2
+from .utils import logger
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+from .executor import ParseExecutor
+from .client_async import PinterestClient, build_headers, load_cookie_file
+from .session import SessionKeeper
+from .metrics import Metrics
+from .hooks import Hooks
+
+
+class PoolStats:
+    """连接复用统计"""
+
+    def __init__(self):
+        self.requests = 0  # 发出的请求数
+        self.connections = 0  # 新建的TCP连接数
+        self.tls_handshakes = 0  # 完成的TLS握手数
+
+    @property
+    def reused(self) -> int:
+        """复用已有连接的请求数"""
+        return max(self.requests - self.connections, 0)
+
+    @property
+    def reuse_ratio(self) -> float:
+        return self.reused / self.requests if self.requests else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'connections': self.connections,
+            'tls_handshakes': self.tls_handshakes,
+            'reused': self.reused,
+            'reuse_ratio': self.reuse_ratio,
+        }
+
+
+class ClientPool:
+    """共享的异步连接池
+
+    多个并发的画板/搜索任务共用同一个 httpx.AsyncClient，
+    连接、TLS会话和UserAgent只创建一次。
+
+    用法:
+        async with ClientPool(max_connections=20) as pool:
+            client = pool.client()
+            await client.board.get_pics_data(board_id)
+    """
+
+    def __init__(
+        self,
+        ver_i=2,
+        proxies=None,
+        cookie_file=None,
+        max_connections: int = POOL_MAX_CONNECTIONS,
+        max_keepalive_connections: int = POOL_MAX_KEEPALIVE,
+        keepalive_expiry: float = POOL_KEEPALIVE_EXPIRY,
+        http2: bool = POOL_HTTP2,
+        timeout: float = 60.0,
+        limiter: RateLimiter = None,
+        retry: RetryPolicy = None,
+        cache=None,
+        parser: ParseExecutor = None,
+        seen=None,
+        checkpoint=None,
+        proxy_pool=None,
+        identity_pool=None,
+        metrics=None,
+        observers=None,
+    ):
+        """
+        初始化连接池
+
+        参数:
+            ver_i: API版本索引
+            proxies: 代理设置
+            cookie_file: cookie文件路径
+            max_connections: 最大连接数
+            max_keepalive_connections: 最大保活连接数
+            keepalive_expiry: 保活连接的过期时间(秒)
+            http2: 是否启用HTTP/2多路复用(需要安装h2)
+            timeout: 请求超时(秒)
+            limiter: 所有任务共享的按接口限速器，默认新建一个
+            retry: 所有任务共享的重试策略(含重试预算)，默认新建一个
+            cache: 所有任务共享的资源响应缓存(ResponseCache)，不指定则不缓存
+            parser: 所有任务共享的解析执行器，默认新建一个(传入的执行器不会在关闭时被关闭)
+            seen: 所有任务共享的已见图片集合(SeenSet)，不指定则不跳过
+            checkpoint: 所有任务共享的分页检查点存储(CheckpointStore)，只用于传入 job_key 的分页任务
+            proxy_pool: 所有任务共享的代理池(ProxyPool)，指定后请求经由各代理发送并按代理限速
+            identity_pool: 所有任务共享的身份池(IdentityPool)，指定后请求分派到各身份并按身份限速
+            metrics: 所有任务共享的请求指标(Metrics)，默认新建一个
+            observers: 所有任务共享的请求生命周期观察者(ClientObserver)列表
+        """
+        self.ver_i = ver_i
+        self.proxies = proxies
+        self.cookie_file = cookie_file
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.timeout = timeout
+        self.limiter = limiter or RateLimiter()
+        self.retry = retry or RetryPolicy()
+        self.cache = cache
+        self.parser = parser or ParseExecutor()
+        self._own_parser = parser is None  # 传入的执行器可能被其他连接池共用，由调用方关闭
+        self.seen = seen
+        self.checkpoint = checkpoint
+        self.proxy_pool = proxy_pool
+        self.identity_pool = identity_pool
+        self.keeper = SessionKeeper()
+        self.metrics = metrics or Metrics()
+        self.hooks = Hooks(observers or ())
+        self.stats = PoolStats()
+        self.http = None
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        """异步上下文管理器入口"""
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """异步上下文管理器退出"""
+        await self.aclose()
+
+    def client(self) -> PinterestClient:
+        """创建一个复用本连接池的PinterestClient"""
+        return PinterestClient(ver_i=self.ver_i, pool=self)
+
+    async def open(self) -> httpx.AsyncClient:
+        """
+        打开共享的httpx客户端(已打开时直接返回)
+
+        返回:
+            httpx.AsyncClient实例，使用身份池或代理池时为None
+        """
+        async with self._lock:
+            if self.identity_pool is not None or self.proxy_pool is not None:
+                # 请求经由身份池/代理池各自的客户端发送，不创建共享客户端
+                return self.http
+            if self.http is None:
+                self.http = self._create()
+                # 预热会话，所有任务共用同一组会话cookie
+                await self.keeper.prepare(self.http)
+        return self.http
+
+    async def aclose(self):
+        """关闭连接池"""
+        if self._own_parser:
+            self.parser.shutdown()
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
+        logger.info(f"连接池已关闭: {self.stats.as_dict()}, 接口速率: {self.limiter.snapshot()}")
+
+    def _create(self) -> httpx.AsyncClient:
+        """创建httpx客户端"""
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("未安装h2，HTTP/2不可用，回退到HTTP/1.1")
+                http2 = False
+
+        cookies = load_cookie_file(self.cookie_file) if self.cookie_file else None
+
+        return httpx.AsyncClient(
+            headers=build_headers(self.ver_i),
+            cookies=cookies,
+            proxies=self.proxies,
+            timeout=self.timeout,
+            limits=self.limits,
+            http2=http2,
+            follow_redirects=True,
+            event_hooks={'request': [self._on_request]},
+        )
+
+    async def _on_request(self, request: httpx.Request):
+        """请求钩子：统计请求数并挂载连接追踪"""
+        self.stats.requests += 1
+        request.extensions['trace'] = self._trace
+
+    async def _trace(self, name: str, info: Dict[str, Any]):
+        """httpcore追踪回调：统计新建连接和TLS握手"""
+        if name == 'connection.connect_tcp.complete':
+            self.stats.connections += 1
+        elif name == 'connection.start_tls.complete':
+            self.stats.tls_handshakes += 1
@@ -0,0 +1,190 @@
+import time
+import asyncio
+import threading
+import urllib.parse
+from typing import Dict, Any, Optional
+from .config import RATE_INITIAL, RATE_MIN, RATE_MAX, RATE_INCREASE, RATE_DECREASE, RATE_BURST, RATE_COOLDOWN
+from .utils import logger
+
+# 视为"受限"的状态码，触发乘性减速
+THROTTLE_STATUS = (429, 500, 502, 503, 504)
+
+
+def endpoint_of(url: str) -> str:
+    """
+    根据URL确定限速所属的接口
+
+    参数:
+        url: 请求地址
+    返回:
+        资源名称(如 BoardFeedResource)，图片HTML页面为 pin
+    """
+    parts = [p for p in urllib.parse.urlsplit(url).path.split('/') if p]
+    if 'resource' in parts:
+        i = parts.index('resource')
+        if i + 1 < len(parts):
+            return parts[i + 1]
+    if parts and parts[0] == 'pin':
+        return 'pin'
+    return parts[0] if parts else 'root'
+
+
+class TokenBucket:
+    """令牌桶
+
+    线程安全；同步代码使用 acquire_sync，异步代码使用 acquire。
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        参数:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量(允许的突发请求数)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """预订一个令牌，返回需要等待的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def wait_time(self) -> float:
+        """现在预订一个令牌需要等待的秒数(不预订)"""
+        with self._lock:
+            tokens = min(self.capacity, self.tokens + (time.monotonic() - self.updated) * self.rate)
+        return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+    async def acquire(self):
+        """等待直到获得令牌(异步)"""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self):
+        """等待直到获得令牌(同步)"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+
+class AdaptiveBucket(TokenBucket):
+    """AIMD自适应令牌桶
+
+    响应正常时速率加性增加，遇到429/5xx/超时时乘性减小。
+    """
+
+    def __init__(
+        self,
+        rate: float = RATE_INITIAL,
+        capacity: float = RATE_BURST,
+        min_rate: float = RATE_MIN,
+        max_rate: float = RATE_MAX,
+        increase: float = RATE_INCREASE,
+        decrease: float = RATE_DECREASE,
+        cooldown: float = RATE_COOLDOWN,
+    ):
+        """
+        参数:
+            rate: 初始速率(请求/秒)
+            capacity: 桶容量
+            min_rate: 最小速率
+            max_rate: 最大速率
+            increase: 每秒健康请求带来的速率增量
+            decrease: 受限时的速率乘数
+            cooldown: 两次减速之间的最小间隔(秒)，避免同一批在途请求连续减速
+        """
+        super().__init__(rate, capacity)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.last_decrease = 0.0
+        self.throttled = 0
+
+    def on_success(self):
+        """正常响应：加性增加"""
+        with self._lock:
+            # 每个请求增加 increase/rate，满速运行一秒约增加 increase
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self):
+        """受限响应：乘性减小"""
+        with self._lock:
+            self.throttled += 1
+            now = time.monotonic()
+            if now - self.last_decrease < self.cooldown:
+                return
+            self.last_decrease = now
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = min(self.tokens, 0)
+        logger.debug(f"接口受限，速率降至 {self.rate:.2f} 请求/秒")
+
+
+class RateLimiter:
+    """按接口划分的自适应限速器
+
+    每个接口(BoardFeedResource、BaseSearchResource、RelatedModulesResource、图片页面等)
+    拥有独立的AIMD令牌桶。
+    """
+
+    def __init__(self, overrides: Optional[Dict[str, Dict[str, Any]]] = None, **defaults):
+        """
+        参数:
+            overrides: 按接口覆盖的桶参数，如 {'pin': {'rate': 1.0}}
+            defaults: 所有接口的默认桶参数，见 AdaptiveBucket
+        """
+        self.overrides = overrides or {}
+        self.defaults = defaults
+        self.buckets: Dict[str, AdaptiveBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, endpoint: str) -> AdaptiveBucket:
+        """获取接口对应的令牌桶(不存在时创建)"""
+        bucket = self.buckets.get(endpoint)
+        if bucket is None:
+            with self._lock:
+                bucket = self.buckets.get(endpoint)
+                if bucket is None:
+                    params = {**self.defaults, **self.overrides.get(endpoint, {})}
+                    bucket = self.buckets[endpoint] = AdaptiveBucket(**params)
+        return bucket
+
+    async def acquire(self, endpoint: str):
+        await self.bucket(endpoint).acquire()
+
+    def acquire_sync(self, endpoint: str):
+        self.bucket(endpoint).acquire_sync()
+
+    def reserve(self, endpoint: str) -> float:
+        """预占一个令牌，返回需要等待的秒数(跨进程共享限速器时由工作进程自行等待)"""
+        return self.bucket(endpoint)._reserve()
+
+    def feedback(self, endpoint: str, status: int = None, timeout: bool = False):
+        """
+        根据请求结果调整速率
+
+        参数:
+            endpoint: 接口名称
+            status: HTTP状态码
+            timeout: 是否超时
+        """
+        if timeout or status in THROTTLE_STATUS:
+            self.bucket(endpoint).on_throttle()
+        elif status is not None and status < 400:
+            self.bucket(endpoint).on_success()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """各接口当前的速率和受限次数"""
+        return {
+            endpoint: {'rate': bucket.rate, 'throttled': bucket.throttled}
+            for endpoint, bucket in self.buckets.items()
+        }
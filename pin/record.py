@@ -0,0 +1,168 @@
+import sys
+from array import array
+from typing import List, Dict, Any, Iterable, Iterator, Union
+from .normalize import parse_created_at, _EMPTY
+
+
+class PinRecord:
+    """紧凑的图片记录
+
+    使用 __slots__ 存储，不为每张图片重复保存字典的键；可与 get_pics_data 的字典格式互相转换。
+    """
+
+    __slots__ = ('id', 'url', 'width', 'height', 'created_at', 'dominant_color', 'save', 'repin', 'title', 'auto_alt_text')
+
+    def __init__(self, id, url='', width=0, height=0, created_at=0, dominant_color='', save=0, repin=0, title='', auto_alt_text=''):
+        self.id = id
+        self.url = url
+        self.width = width
+        self.height = height
+        self.created_at = created_at
+        self.dominant_color = dominant_color
+        self.save = save
+        self.repin = repin
+        self.title = title
+        self.auto_alt_text = auto_alt_text
+
+    def __repr__(self):
+        return f"PinRecord(id={self.id!r}, url={self.url!r}, width={self.width}, height={self.height})"
+
+    def __eq__(self, other):
+        if not isinstance(other, PinRecord):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> 'PinRecord':
+        """从 get_pics_data 的字典格式创建"""
+        count = d.get('count') or _EMPTY
+        text = d.get('text') or _EMPTY
+        return cls(
+            d['id'], d.get('url', ''), d.get('width', 0), d.get('height', 0), d.get('created_at', 0),
+            d.get('dominant_color', ''), count.get('save', 0), count.get('repin', 0),
+            text.get('title', ''), text.get('auto_alt_text', ''),
+        )
+
+    @classmethod
+    def from_raw(cls, pic: Dict[str, Any], variant=None) -> 'PinRecord':
+        """直接从资源接口返回的原始图片数据创建，不经过中间字典；variant 为图片尺寸选择策略，默认使用原图"""
+        get = pic.get
+        images = get('images') or _EMPTY
+        orig = (images.get('orig') or _EMPTY) if variant is None else variant.select(images)
+        return cls(
+            pic['id'], orig.get('url', ''), orig.get('width', 0), orig.get('height', 0),
+            parse_created_at(get('created_at')), get('dominant_color', ''),
+            ((get('aggregate_metadata') or _EMPTY).get('aggregated_stats') or _EMPTY).get('saves', 0),
+            get('repin_count', 0), get('title', ''), get('auto_alt_text', ''),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为 get_pics_data 的字典格式"""
+        return {
+            'id': self.id,
+            'url': self.url,
+            'width': self.width,
+            'height': self.height,
+            'created_at': self.created_at,
+            'dominant_color': self.dominant_color,
+            'count': {
+                'save': self.save,
+                'repin': self.repin,
+            },
+            'text': {
+                'title': self.title,
+                'auto_alt_text': self.auto_alt_text,
+            }
+        }
+
+
+def normalize_records(batch: List[Dict[str, Any]], variant=None) -> List[PinRecord]:
+    """
+    批量把一页原始图片数据转换为PinRecord
+
+    参数:
+        batch: 资源接口返回的原始图片列表
+        variant: 图片尺寸选择策略(VariantPolicy)，默认使用原图
+    返回:
+        PinRecord列表
+    """
+    from_raw = PinRecord.from_raw
+    return [from_raw(pic, variant) for pic in batch]
+
+
+class PinBatch:
+    """按列存储的图片集合
+
+    数值列(id、宽高、创建时间、保存数、转发数)存放在 array 中，
+    适合在内存中保存数百万张图片用于去重和排序。
+    """
+
+    def __init__(self):
+        self.ids = array('Q')
+        self.width = array('l')
+        self.height = array('l')
+        self.created_at = array('q')
+        self.save = array('q')
+        self.repin = array('q')
+        self.url: List[str] = []
+        self.dominant_color: List[str] = []
+        self.title: List[str] = []
+        self.auto_alt_text: List[str] = []
+        # 不是规范数字的id(极少见)按位置单独保存
+        self._odd_ids: Dict[int, str] = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, pin: Union[PinRecord, Dict[str, Any]]):
+        """追加一张图片(PinRecord或字典格式)"""
+        if not isinstance(pin, PinRecord):
+            pin = PinRecord.from_dict(pin)
+        pin_id = str(pin.id)
+        if pin_id.isdigit() and (pin_id == '0' or pin_id[0] != '0') and int(pin_id) < 2 ** 64:
+            self.ids.append(int(pin_id))
+        else:
+            self._odd_ids[len(self.ids)] = pin_id
+            self.ids.append(0)
+        self.width.append(pin.width or 0)
+        self.height.append(pin.height or 0)
+        self.created_at.append(pin.created_at or 0)
+        self.save.append(pin.save or 0)
+        self.repin.append(pin.repin or 0)
+        self.url.append(pin.url)
+        self.dominant_color.append(sys.intern(pin.dominant_color or ''))
+        self.title.append(pin.title)
+        self.auto_alt_text.append(pin.auto_alt_text)
+
+    def extend(self, pins: Iterable[Union[PinRecord, Dict[str, Any]]]):
+        for pin in pins:
+            self.append(pin)
+
+    def id_at(self, i: int) -> str:
+        """第i张图片的id"""
+        return self._odd_ids.get(i) or str(self.ids[i])
+
+    def __getitem__(self, i: int) -> PinRecord:
+        if i < 0:
+            i += len(self)
+        return PinRecord(
+            self.id_at(i), self.url[i], self.width[i], self.height[i], self.created_at[i],
+            self.dominant_color[i], self.save[i], self.repin[i], self.title[i], self.auto_alt_text[i],
+        )
+
+    def __iter__(self) -> Iterator[PinRecord]:
+        for i in range(len(self)):
+            yield self[i]
+
+    @classmethod
+    def from_records(cls, pins: Iterable[Union[PinRecord, Dict[str, Any]]]) -> 'PinBatch':
+        """从PinRecord或字典格式创建"""
+        batch = cls()
+        batch.extend(pins)
+        return batch
+
+    from_dicts = from_records
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """转换为 get_pics_data 的字典格式"""
+        return [pin.to_dict() for pin in self]
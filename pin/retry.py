@@ -0,0 +1,213 @@
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+import httpx
+from .config import (
+    RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+    RETRY_BUDGET_RATIO, RETRY_BUDGET_PER_SEC, RETRY_BUDGET_MAX,
+    PAGE_RETRY_MAX_ATTEMPTS, PAGE_RETRY_BASE_DELAY, PAGE_RETRY_MAX_DELAY,
+)
+from .utils import logger
+
+# 可重试的HTTP状态码
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class RetryableError(Exception):
+    """可重试的请求错误(可重试状态码、非JSON的错误页面等)"""
+
+    def __init__(self, message: str, status: int = None, retry_after: float = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析Retry-After响应头
+
+    参数:
+        value: 秒数或HTTP日期
+    返回:
+        需要等待的秒数，无法解析时返回None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryBudget:
+    """并发任务共享的重试预算
+
+    每个成功请求存入 ratio 个额度，每次重试消耗1个额度；另外每秒固定补充 per_sec 个，
+    保证整体失败时仍有少量重试。额度耗尽时放弃重试，避免大量任务同时重试压垮接口。
+    """
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, per_sec: float = RETRY_BUDGET_PER_SEC, max_tokens: float = RETRY_BUDGET_MAX):
+        """
+        参数:
+            ratio: 每个成功请求存入的额度
+            per_sec: 每秒固定补充的额度
+            max_tokens: 额度上限
+        """
+        self.ratio = ratio
+        self.per_sec = per_sec
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self.updated) * self.per_sec)
+        self.updated = now
+
+    def deposit(self):
+        """记录一次成功请求"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """申请一次重试，预算不足时返回False"""
+        with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class RetryPolicy:
+    """重试策略
+
+    指数退避 + 完全抖动(full jitter)，优先遵循 Retry-After，并受共享重试预算约束。
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = RETRY_MAX_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        retry_status=RETRYABLE_STATUS,
+        budget: RetryBudget = None,
+    ):
+        """
+        参数:
+            max_attempts: 单个请求的最大尝试次数(含首次)
+            base_delay: 退避基数(秒)
+            max_delay: 单次等待上限(秒)
+            retry_status: 可重试的状态码
+            budget: 共享的重试预算，默认新建一个
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_status = frozenset(retry_status)
+        self.budget = budget or RetryBudget()
+
+    def check(self, r: httpx.Response):
+        """
+        检查响应状态
+
+        可重试的状态码抛出RetryableError，其余错误状态抛出httpx.HTTPStatusError。
+        """
+        if r.status_code in self.retry_status:
+            raise RetryableError(
+                f"HTTP {r.status_code}",
+                status=r.status_code,
+                retry_after=parse_retry_after(r.headers.get('Retry-After')),
+            )
+        if r.status_code >= 400:
+            r.raise_for_status()
+
+    def is_retryable(self, exc: Exception) -> bool:
+        """判断异常是否可重试"""
+        return isinstance(exc, (RetryableError, httpx.TransportError))
+
+    def backoff(self, attempt: int, retry_after: float = None) -> float:
+        """
+        计算第attempt次重试前的等待时间
+
+        参数:
+            attempt: 已失败的次数(从0开始)
+            retry_after: 服务端要求的等待时间
+        返回:
+            等待秒数
+        """
+        if retry_after is not None:
+            # 在服务端要求的时间上加少量抖动，避免所有任务同时醒来
+            return min(retry_after, self.max_delay) + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def next_delay(self, exc: Exception, attempt: int) -> Optional[float]:
+        """
+        决定是否重试
+
+        参数:
+            exc: 本次失败的异常
+            attempt: 已失败的次数(从0开始)
+        返回:
+            重试前的等待秒数，不再重试时返回None
+        """
+        if not self.is_retryable(exc) or attempt + 1 >= self.max_attempts:
+            return None
+        if not self.budget.withdraw():
+            logger.warning("重试预算已耗尽，放弃重试")
+            return None
+        return self.backoff(attempt, getattr(exc, 'retry_after', None))
+
+    def on_success(self):
+        """记录一次成功请求"""
+        self.budget.deposit()
+
+
+class PageRetryPolicy(RetryPolicy):
+    """分页级重试策略
+
+    客户端的请求级重试耗尽后，分页器按此策略等待更长时间再重试同一bookmark；
+    除明确的客户端错误(429以外的4xx)外都会重试，包括响应结构异常。
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = PAGE_RETRY_MAX_ATTEMPTS,
+        base_delay: float = PAGE_RETRY_BASE_DELAY,
+        max_delay: float = PAGE_RETRY_MAX_DELAY,
+        budget: RetryBudget = None,
+    ):
+        super().__init__(max_attempts, base_delay, max_delay, budget=budget)
+
+    def is_retryable(self, exc: Exception) -> bool:
+        # 分页器会包装原始异常，沿 __cause__ 查找HTTP状态错误
+        e = exc
+        while e is not None:
+            if isinstance(e, httpx.HTTPStatusError):
+                status = e.response.status_code
+                return status >= 500 or status in self.retry_status
+            e = e.__cause__
+        return True
+
+
+def decode_json(r: httpx.Response):
+    """
+    解码JSON响应
+
+    2xx响应返回HTML错误页等非JSON内容时抛出RetryableError。
+    """
+    try:
+        return r.json()
+    except ValueError:
+        raise RetryableError(f"非JSON响应: {r.headers.get('Content-Type', '')}", status=r.status_code)
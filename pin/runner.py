@@ -0,0 +1,483 @@
+"""
+多进程分片运行器
+
+任务(画板ID、搜索词、图片ID)放入 SqliteJobQueue，N 个工作进程各自运行一个事件循环和异步
+PinterestClient，从队列领取任务并逐页抓取；所有进程的请求共享协调进程中的全局限速器，
+抓到的数据通过进程间队列送回主进程，写入同一个输出文件。
+任务确认(ack/nack)和分页检查点也由主进程在对应的数据写入输出文件并同步之后提交，
+任一进程崩溃都不会出现任务已确认而数据未落盘的情况。Parquet/Arrow 输出写为分片目录，
+每次提交前关闭当前分片(写入文件尾并fsync)，已确认任务的数据总在可读取的分片中。
+
+用法:
+    python -m pin.runner add board 604538018670785766 --queue pin_jobs.sqlite
+    python -m pin.runner run --workers 4 --out result.ndjson.zst
+    python -m pin.runner stats
+"""
+import os
+import time
+import queue
+import socket
+import asyncio
+import argparse
+import threading
+import multiprocessing
+from multiprocessing.managers import BaseManager
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from .config import (
+    JOB_QUEUE_PATH, JOB_VISIBILITY_TIMEOUT, JOB_RETRY_DELAY, JOB_POLL_INTERVAL, RUNNER_CONCURRENCY,
+    RUNNER_OUTBOX_PAGES, RUNNER_COMMIT_INTERVAL, RUNNER_PART_INTERVAL, SINK_ROW_GROUP,
+)
+from .checkpoint import CheckpointStore
+from .jobqueue import Job, SqliteJobQueue, JOB_KINDS
+from .ratelimit import RateLimiter
+from .utils import logger
+
+
+class RateCoordinator(BaseManager):
+    """在独立进程中持有全局限速器
+
+    所有工作进程通过代理对象向同一个 RateLimiter 预占令牌并反馈请求结果，
+    因此多个进程合计的请求速率不超过限速器的设置，且任一进程被限流时所有进程一起降速。
+    """
+
+
+RateCoordinator.register('RateLimiter', RateLimiter, exposed=('reserve', 'feedback', 'snapshot'))
+
+
+class SharedRateLimiter:
+    """工作进程端的限速器
+
+    接口与 RateLimiter 相同；令牌在协调进程中预占，等待在本进程中进行，不占用协调进程。
+    与协调进程的通信是阻塞的进程间调用，在事件循环中时放到线程里进行，不阻塞其他任务。
+    """
+
+    def __init__(self, remote):
+        """
+        参数:
+            remote: RateCoordinator 创建的 RateLimiter 代理(每个线程使用各自的连接)
+        """
+        self.remote = remote
+
+    async def acquire(self, endpoint: str):
+        wait = await asyncio.to_thread(self.remote.reserve, endpoint)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, endpoint: str):
+        wait = self.remote.reserve(endpoint)
+        if wait > 0:
+            time.sleep(wait)
+
+    def feedback(self, endpoint: str, status: int = None, timeout: bool = False):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.remote.feedback(endpoint, status, timeout)
+            return
+        # 反馈不需要等待结果
+        future = loop.run_in_executor(None, self.remote.feedback, endpoint, status, timeout)
+        future.add_done_callback(_log_feedback_error)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return self.remote.snapshot()
+
+
+def _log_feedback_error(future: asyncio.Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning(f"限速反馈失败: {future.exception()}")
+
+
+class Outbox:
+    """工作进程发往主进程的消息
+
+    事件循环中只把消息放入本地队列，由后台线程依次写入有界的进程间队列：主进程处理不过来时
+    只有后台线程等待，事件循环(包括租约心跳)照常运行；积压超过 max_pages 页时 wait() 让抓取暂停。
+    所有消息经同一个线程按顺序发送，主进程收到确认时该任务的页面已经先到达。
+    """
+
+    def __init__(self, results, max_pages: int = RUNNER_OUTBOX_PAGES):
+        """
+        参数:
+            results: 进程间队列
+            max_pages: 积压页数上限
+        """
+        self.results = results
+        self.max_pages = max_pages
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='pin-outbox', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            message = self._queue.get()
+            if message is None:
+                return
+            self.results.put(message)
+
+    def put(self, message: tuple):
+        self._queue.put(message)
+
+    async def wait(self):
+        """积压过多时等待后台线程发送"""
+        while self._queue.qsize() > self.max_pages:
+            await asyncio.sleep(0.05)
+
+    def close(self):
+        """发送剩余的消息"""
+        self._queue.put(None)
+        self._thread.join()
+
+
+class RelayCheckpoint:
+    """工作进程端的检查点存储
+
+    读取直接查询检查点文件；保存和删除作为消息发给主进程，由主进程在此前的页面写入输出文件并同步之后执行，
+    因此检查点不会越过已落盘的数据。
+    """
+
+    def __init__(self, path: str, outbox: Outbox):
+        self.store = CheckpointStore(path)
+        self.outbox = outbox
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.store.load(key)
+
+    def save(self, *args, **kwargs):
+        self.outbox.put(('checkpoint', 'save', args, kwargs))
+
+    def delete(self, key: str):
+        self.outbox.put(('checkpoint', 'delete', (key,), {}))
+
+    def close(self):
+        self.store.close()
+
+
+def job_pages(client, job: Job):
+    """
+    任务对应的分页迭代器
+
+    参数:
+        client: 异步PinterestClient实例
+        job: 任务，board为画板图片，search为搜索图片，pin为图片的相关推荐
+    返回:
+        逐页产出PinRecord列表的异步迭代器
+    """
+    # 以任务类型和目标为检查点键，失败重试的任务从最后的bookmark继续
+    job_key = f'{job.kind}:{job.target}'
+    if job.kind == 'board':
+        return client.board.aiter_pics(job.target, as_records=True, job_key=job_key)
+    if job.kind == 'search':
+        return client.search_pics.aiter_pics(job.target, as_records=True, job_key=job_key)
+    if job.kind == 'pin':
+        return client.pic_related.aiter_pics(job.target, as_records=True, job_key=job_key)
+    raise ValueError(f"未知的任务类型: {job.kind}")
+
+
+async def _heartbeat(jobs: SqliteJobQueue, job: Job, visibility_timeout: float):
+    """定期延长租约，直到任务结束"""
+    while True:
+        await asyncio.sleep(visibility_timeout / 3)
+        if not await asyncio.to_thread(jobs.extend, job, visibility_timeout):
+            logger.warning(f"租约已失效: {job}")
+            return
+
+
+async def _drain(client, jobs: SqliteJobQueue, outbox: Outbox, worker: str, visibility_timeout: float):
+    """循环领取并执行任务，队列中没有未完成的任务时返回"""
+    while True:
+        # SQLite可能在等待其他进程的写锁，放到线程中进行
+        job = await asyncio.to_thread(jobs.lease, worker, visibility_timeout)
+        if job is None:
+            counts = await asyncio.to_thread(jobs.stats)
+            if not counts['ready'] and not counts['leased']:
+                return
+            # 还有延迟重试的任务、其他进程正在执行或等待主进程确认的任务(可能因租约过期重新可见)
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+            continue
+        heartbeat = asyncio.ensure_future(_heartbeat(jobs, job, visibility_timeout))
+        items = 0
+        try:
+            async for page in job_pages(client, job):
+                outbox.put(('page', job.kind, job.target, page))
+                items += len(page)
+                await outbox.wait()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            outbox.put(('nack', job, f"{type(e).__name__}: {e}", JOB_RETRY_DELAY * job.attempts))
+            logger.warning(f"[{worker}] 任务失败 {job}: {e}")
+        else:
+            # 由主进程在页面写入输出文件后确认
+            outbox.put(('ack', job))
+            logger.info(f"[{worker}] 任务完成 {job.kind}={job.target}: {items} 张图片")
+        finally:
+            heartbeat.cancel()
+
+
+async def _work(queue_path: str, limiter, outbox: Outbox, worker: str, concurrency: int,
+                visibility_timeout: float, client_options: Dict[str, Any], checkpoint_path: Optional[str]):
+    from .client_async import PinterestClient
+    from .executor import ParseExecutor
+
+    jobs = SqliteJobQueue(queue_path)
+    checkpoint = RelayCheckpoint(checkpoint_path, outbox) if checkpoint_path else None
+    try:
+        # 每个工作进程本身就是一个CPU核心，解析直接在事件循环中进行
+        async with PinterestClient(limiter=SharedRateLimiter(limiter), parser=ParseExecutor('inline'),
+                                   checkpoint=checkpoint, **client_options) as client:
+            await asyncio.gather(*(
+                _drain(client, jobs, outbox, f'{worker}/{i}', visibility_timeout) for i in range(concurrency)
+            ))
+    finally:
+        jobs.close()
+        if checkpoint is not None:
+            checkpoint.close()
+
+
+def run_worker(queue_path: str, limiter, results, worker: str, concurrency: int = RUNNER_CONCURRENCY,
+               visibility_timeout: float = JOB_VISIBILITY_TIMEOUT, client_options: Dict[str, Any] = None,
+               checkpoint_path: Optional[str] = None):
+    """
+    工作进程入口
+
+    参数:
+        queue_path: 任务队列文件路径
+        limiter: RateCoordinator 创建的 RateLimiter 代理
+        results: 进程间队列，产出 ('page', 任务类型, 目标, PinRecord列表)、('checkpoint', 方法, 参数, 关键字参数)、
+                 ('ack', 任务)、('nack', 任务, 错误, 延迟)，结束时产出 ('done', 进程标识)
+        worker: 工作进程标识
+        concurrency: 同时执行的任务数
+        visibility_timeout: 租约时长(秒)
+        client_options: 传给PinterestClient的参数(ver_i、proxies、cookie_file)
+        checkpoint_path: 分页检查点文件路径，失败重试的任务从最后的bookmark继续
+    """
+    outbox = Outbox(results, max(RUNNER_OUTBOX_PAGES, concurrency * 4))
+    try:
+        asyncio.run(_work(queue_path, limiter, outbox, worker, concurrency, visibility_timeout,
+                          client_options or {}, checkpoint_path))
+    except Exception as e:
+        logger.error(f"[{worker}] 工作进程异常退出: {e}")
+    finally:
+        outbox.close()
+        results.put(('done', worker))
+
+
+class ShardedRunner:
+    """多进程分片运行器
+
+    用法:
+        runner = ShardedRunner('result.parquet', workers=4, rate={'rate': 8.0, 'capacity': 8.0})
+        stats = runner.run([('board', '604538018670785766'), ('search', '厚涂')])
+
+    多台机器可以各自运行 ShardedRunner 领取同一个队列(需要替换为共享的 JobQueue 后端)，各自写入本机的输出文件。
+    """
+
+    def __init__(
+        self,
+        output: str,
+        workers: Optional[int] = None,
+        concurrency: int = RUNNER_CONCURRENCY,
+        queue_path: str = JOB_QUEUE_PATH,
+        rate: Optional[Dict[str, Any]] = None,
+        overrides: Optional[Dict[str, Dict[str, Any]]] = None,
+        visibility_timeout: float = JOB_VISIBILITY_TIMEOUT,
+        checkpoint: bool = True,
+        client_options: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        初始化运行器
+
+        参数:
+            output: 输出文件路径，扩展名决定格式，见 sinks.open_sink；Parquet/Arrow 为分片目录(PartitionedSink)
+            workers: 工作进程数，None表示CPU核心数
+            concurrency: 每个工作进程同时执行的任务数
+            queue_path: 任务队列文件路径
+            rate: 全局限速器的默认桶参数(所有进程合计)，见 AdaptiveBucket
+            overrides: 按接口覆盖的桶参数
+            visibility_timeout: 租约时长(秒)，工作进程崩溃后其任务在租约到期后重新执行
+            checkpoint: 是否保存分页检查点(queue_path + '.checkpoint')
+            client_options: 传给PinterestClient的参数(ver_i、proxies、cookie_file)
+        """
+        self.output = output
+        self.workers = workers or os.cpu_count() or 1
+        self.concurrency = concurrency
+        self.queue_path = queue_path
+        self.rate = rate or {}
+        self.overrides = overrides
+        self.visibility_timeout = visibility_timeout
+        self.checkpoint_path = queue_path + '.checkpoint' if checkpoint else None
+        self.client_options = client_options or {}
+
+    def run(self, jobs: Iterable[Tuple[str, str]] = ()) -> Dict[str, Any]:
+        """
+        添加任务并运行，直到队列中没有未完成的任务
+
+        参数:
+            jobs: (任务类型, 目标) 列表，为空时只处理队列中已有的任务
+        返回:
+            统计信息
+        """
+        from .sinks import open_sink
+
+        with SqliteJobQueue(self.queue_path) as job_queue:
+            added = job_queue.put_many(jobs)
+            if added:
+                logger.info(f"新增 {added} 个任务")
+
+        start = time.perf_counter()
+        host = socket.gethostname()
+        ctx = multiprocessing.get_context()
+        manager = RateCoordinator(ctx=ctx)
+        manager.start()
+        try:
+            limiter = manager.RateLimiter(self.overrides, **self.rate)
+            results = ctx.Queue(maxsize=self.workers * self.concurrency * 4)
+            procs = [
+                ctx.Process(
+                    target=run_worker, name=f'pin-worker-{i}', daemon=True,
+                    args=(self.queue_path, limiter, results, f'{host}-{os.getpid()}-{i}', self.concurrency,
+                          self.visibility_timeout, self.client_options, self.checkpoint_path),
+                )
+                for i in range(self.workers)
+            ]
+            for proc in procs:
+                proc.start()
+
+            checkpoints = CheckpointStore(self.checkpoint_path) if self.checkpoint_path else None
+            try:
+                with SqliteJobQueue(self.queue_path) as job_queue, open_sink(self.output, partitioned=True) as sink:
+                    items, pages = self._collect(results, procs, sink, job_queue, checkpoints)
+            finally:
+                if checkpoints is not None:
+                    checkpoints.close()
+
+            for proc in procs:
+                proc.join()
+            rates = limiter.snapshot()
+        finally:
+            manager.shutdown()
+
+        with SqliteJobQueue(self.queue_path) as job_queue:
+            counts = job_queue.stats()
+        elapsed = time.perf_counter() - start
+        stats = {
+            'jobs': counts,
+            'items': items,
+            'pages': pages,
+            'workers': self.workers,
+            'elapsed': round(elapsed, 3),
+            'items_per_sec': round(items / elapsed, 1) if elapsed else 0.0,
+            'rate': rates,
+        }
+        logger.info(f"运行结束: {stats}")
+        return stats
+
+    def _collect(self, results, procs, sink, job_queue: SqliteJobQueue,
+                 checkpoints: Optional[CheckpointStore]) -> Tuple[int, int]:
+        """
+        接收工作进程的消息直到所有进程结束
+
+        页面立即写入输出；检查点和任务确认先暂存，同步输出后统一提交。NDJSON 每隔 RUNNER_COMMIT_INTERVAL 秒提交；
+        分片输出在当前分片满一个行组、超过 RUNNER_PART_INTERVAL 秒或暂时没有新页面时提交，避免产生过小的分片。
+
+        返回:
+            (条数, 页数)
+        """
+        items = pages = 0
+        running = len(procs)
+        pending = []
+        committed = time.monotonic()
+        partitioned = hasattr(sink, 'part_rows')
+        interval = RUNNER_PART_INTERVAL if partitioned else RUNNER_COMMIT_INTERVAL
+        while running:
+            try:
+                message = results.get(timeout=1.0)
+            except queue.Empty:
+                # 工作进程被强制结束时收不到结束消息
+                if not any(proc.is_alive() for proc in procs):
+                    break
+                message = None
+            if message is None:
+                pass
+            elif message[0] == 'done':
+                running -= 1
+            elif message[0] == 'page':
+                page = message[3]
+                sink.write(page)
+                items += len(page)
+                pages += 1
+            else:
+                pending.append(message)
+            # 没有新消息时立即提交，否则等待确认的任务一直处于租约中，工作进程不会结束
+            if pending and (
+                message is None
+                or time.monotonic() - committed >= interval
+                or (partitioned and sink.part_rows >= SINK_ROW_GROUP)
+            ):
+                self._commit(sink, pending, job_queue, checkpoints)
+                committed = time.monotonic()
+        self._commit(sink, pending, job_queue, checkpoints)
+        return items, pages
+
+    @staticmethod
+    def _commit(sink, pending: List[tuple], job_queue: SqliteJobQueue, checkpoints: Optional[CheckpointStore]):
+        """同步输出(NDJSON flush+fsync，分片输出关闭当前分片)，然后执行暂存的检查点和任务确认"""
+        sink.flush()
+        for message in pending:
+            if message[0] == 'checkpoint':
+                if checkpoints is not None:
+                    _, method, args, kwargs = message
+                    getattr(checkpoints, method)(*args, **kwargs)
+            elif message[0] == 'ack':
+                job = message[1]
+                if not job_queue.ack(job):
+                    logger.warning(f"确认失败，租约已失效(任务将被重新执行): {job}")
+            elif message[0] == 'nack':
+                _, job, error, delay = message
+                job_queue.nack(job, error=error, delay=delay)
+        pending.clear()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queue', default=JOB_QUEUE_PATH, help='任务队列文件路径')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help='添加任务')
+    add.add_argument('kind', choices=JOB_KINDS)
+    add.add_argument('targets', nargs='+', help='画板ID、搜索词或图片ID')
+    add.add_argument('--requeue', action='store_true', help='已完成或失败的同名任务重新执行(默认忽略)')
+
+    run = commands.add_parser('run', help='运行工作进程直到队列完成')
+    run.add_argument('--out', required=True, help='输出文件(.ndjson/.ndjson.gz/.ndjson.zst/.parquet/.arrow)')
+    run.add_argument('--workers', type=int, default=None, help='工作进程数，默认为CPU核心数')
+    run.add_argument('--concurrency', type=int, default=RUNNER_CONCURRENCY, help='每个进程同时执行的任务数')
+    run.add_argument('--rate', type=float, default=None, help='所有进程合计的每秒请求数上限(每个接口)')
+
+    commands.add_parser('stats', help='查看任务状态')
+    commands.add_parser('retry', help='重新执行失败的任务')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        rate = {'rate': args.rate, 'max_rate': args.rate, 'capacity': max(1.0, args.rate)} if args.rate else None
+        runner = ShardedRunner(args.out, workers=args.workers, concurrency=args.concurrency,
+                               queue_path=args.queue, rate=rate)
+        print(runner.run())
+        return
+    with SqliteJobQueue(args.queue) as job_queue:
+        if args.command == 'add':
+            jobs = [(args.kind, target) for target in args.targets]
+            if args.requeue:
+                print(f"放回或新增 {job_queue.requeue_many(jobs)} 个任务")
+            else:
+                print(f"新增 {job_queue.put_many(jobs)} 个任务")
+        elif args.command == 'retry':
+            print(f"重新放回 {job_queue.retry_failed()} 个任务")
+        else:
+            print(job_queue.stats())
+            for job in job_queue.failed():
+                print(job)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+import os
+import math
+import struct
+import sqlite3
+import hashlib
+import threading
+from typing import List, Dict, Any, Iterable
+from .config import SEEN_PATH, SEEN_CAPACITY, SEEN_ERROR_RATE
+from .utils import logger
+
+
+class BloomFilter:
+    """布隆过滤器
+
+    位数组保存在 bytearray 中，k 个位置由一次 blake2b 哈希的两半做双重哈希得到。
+    """
+
+    _HEADER = struct.Struct('<QQ')
+
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        参数:
+            capacity: 预计元素数
+            error_rate: 期望的误判率
+        """
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str) -> List[int]:
+        h = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        a = int.from_bytes(h[:8], 'little')
+        b = int.from_bytes(h[8:], 'little') | 1
+        m = self.size
+        return [(a + i * b) % m for i in range(self.hashes)]
+
+    def add(self, key: str):
+        bits = self.bits
+        for p in self._positions(key):
+            bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def save(self, path: str):
+        """保存到文件(先写临时文件再替换)"""
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(self._HEADER.pack(self.size, self.hashes))
+            f.write(self.bits)
+        os.replace(tmp, path)
+
+    def load(self, path: str) -> bool:
+        """从文件读取，参数不一致时返回False"""
+        with open(path, 'rb') as f:
+            size, hashes = self._HEADER.unpack(f.read(self._HEADER.size))
+            if (size, hashes) != (self.size, self.hashes):
+                return False
+            bits = f.read()
+        if len(bits) != len(self.bits):
+            return False
+        self.bits = bytearray(bits)
+        return True
+
+
+class SeenSet:
+    """持久化的已见图片集合
+
+    布隆过滤器在内存中快速排除新ID，只有可能见过的ID才查询SQLite中的精确记录；
+    可以跨任务去重画板、搜索和相关推荐中反复出现的图片。过滤(filter_unseen)和标记(mark_seen)分开进行，
+    条目在写入成功之后才记为已见，中途崩溃时未写入的条目下次仍会被抓取。
+    布隆过滤器在关闭时保存到 path + '.bloom'，下次打开时直接读取，与精确记录不一致时重建。
+
+    用法:
+        with SeenSet('pin_seen.sqlite') as seen:
+            client = PinterestClient(seen=seen)  # 分页时跳过已见过的图片
+    """
+
+    def __init__(self, path: str = SEEN_PATH, capacity: int = SEEN_CAPACITY, error_rate: float = SEEN_ERROR_RATE):
+        """
+        初始化集合
+
+        参数:
+            path: SQLite文件路径
+            capacity: 布隆过滤器的预计容量
+            error_rate: 布隆过滤器的误判率
+        """
+        self.path = path
+        self.bloom_path = path + '.bloom'
+        self.error_rate = error_rate
+        self.skipped = 0  # filter_unseen 跳过的数量
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS seen (id TEXT PRIMARY KEY) WITHOUT ROWID')
+        self._db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)')
+        self._db.commit()
+        row = self._db.execute("SELECT value FROM meta WHERE key = 'count'").fetchone()
+        self.count = row[0] if row else self._db.execute('SELECT COUNT(*) FROM seen').fetchone()[0]
+
+        if self.count * 2 > capacity:
+            logger.warning(f"已见图片数({self.count})接近布隆过滤器容量({capacity})，扩容到 {self.count * 4}")
+            capacity = self.count * 4
+        self.capacity = capacity
+        self.bloom = BloomFilter(capacity, error_rate)
+        self._load_bloom()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self.count
+
+    def _load_bloom(self):
+        """读取保存的布隆过滤器，不存在或已过期时从精确记录重建"""
+        saved = self._db.execute("SELECT value FROM meta WHERE key = 'bloom_count'").fetchone()
+        if os.path.exists(self.bloom_path) and saved and saved[0] == self.count and self.bloom.load(self.bloom_path):
+            return
+        if self.count:
+            logger.info(f"重建布隆过滤器: {self.count} 个ID")
+        add = self.bloom.add
+        for (pin_id,) in self._db.execute('SELECT id FROM seen'):
+            add(pin_id)
+
+    def __contains__(self, pin_id) -> bool:
+        pin_id = str(pin_id)
+        if pin_id not in self.bloom:
+            return False
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM seen WHERE id = ?', (pin_id,)).fetchone() is not None
+
+    def _known(self, ids: List[str]) -> set:
+        """精确记录中已有的ID(调用方持有锁)"""
+        maybe = [i for i in ids if i in self.bloom]
+        known = set()
+        # 只有布隆过滤器判断可能见过的ID才查询精确记录
+        for start in range(0, len(maybe), 500):
+            chunk = maybe[start:start + 500]
+            known.update(row[0] for row in self._db.execute(
+                f"SELECT id FROM seen WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ))
+        return known
+
+    def add_many(self, ids: Iterable) -> List[str]:
+        """
+        批量添加ID
+
+        参数:
+            ids: ID列表
+        返回:
+            之前没有见过的ID
+        """
+        ids = list(dict.fromkeys(str(i) for i in ids))
+        with self._lock:
+            known = self._known(ids)
+            new = [i for i in ids if i not in known]
+            if new:
+                self._db.executemany('INSERT OR IGNORE INTO seen (id) VALUES (?)', [(i,) for i in new])
+                self.count += len(new)
+                self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('count', ?)", (self.count,))
+                self._db.commit()
+                for i in new:
+                    self.bloom.add(i)
+        return new
+
+    def add(self, pin_id) -> bool:
+        """添加一个ID，之前没有见过时返回True"""
+        return bool(self.add_many([pin_id]))
+
+    def filter_unseen(self, batch: List[Dict[str, Any]], key: str = 'id') -> List[Dict[str, Any]]:
+        """
+        过滤一页数据，只保留没有见过的条目；不会把它们记为已见，写入成功后再调用 mark_seen
+
+        参数:
+            batch: 原始数据列表
+            key: ID所在的键
+        返回:
+            没有见过的条目(保持原顺序，同一页内重复的条目只保留第一条)
+        """
+        ids = [str(item[key]) for item in batch]
+        with self._lock:
+            known = self._known(ids)
+        result = []
+        for pin_id, item in zip(ids, batch):
+            if pin_id not in known:
+                known.add(pin_id)
+                result.append(item)
+        self.skipped += len(batch) - len(result)
+        return result
+
+    def mark_seen(self, batch: List[Dict[str, Any]], key: str = 'id') -> int:
+        """
+        把已经写入的条目记为已见
+
+        参数:
+            batch: 原始数据列表
+            key: ID所在的键
+        返回:
+            新记录的数量
+        """
+        return len(self.add_many(item[key] for item in batch))
+
+    def close(self):
+        """保存布隆过滤器并关闭"""
+        with self._lock:
+            self.bloom.save(self.bloom_path)
+            self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('bloom_count', ?)", (self.count,))
+            self._db.commit()
+            self._db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'capacity': self.capacity,
+            'skipped': self.skipped,
+            'bloom_bytes': len(self.bloom.bits),
+        }
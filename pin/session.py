@@ -0,0 +1,218 @@
+import time
+import asyncio
+import threading
+from typing import Optional, Union
+import httpx
+from .config import SESSION_WARMUP, SESSION_WARMUP_URL, SESSION_AUTH_STATUS, SESSION_REFRESH_INTERVAL
+from .utils import logger
+
+# 匿名会话失效时丢弃的cookie，重新预热时由服务端下发
+SESSION_COOKIES = ('csrftoken', '_pinterest_sess')
+
+
+def sync_csrf(http: Union[httpx.Client, httpx.AsyncClient], r: Optional[httpx.Response] = None) -> Optional[str]:
+    """
+    把cookie中的csrftoken同步到 X-CSRFToken 请求头
+
+    响应下发了新的csrftoken时使用新值，并删除cookie中的旧值，避免同名cookie冲突。
+
+    参数:
+        http: httpx客户端
+        r: 刚收到的响应
+    返回:
+        当前的csrftoken，没有时返回None
+    """
+    token = None
+    if r is not None:
+        token = next((c.value for c in r.cookies.jar if c.name == 'csrftoken'), None)
+    jar = http.cookies.jar
+    if token is None:
+        tokens = [c.value for c in jar if c.name == 'csrftoken']
+        token = tokens[-1] if tokens else None
+    if token is None:
+        return None
+    for c in list(jar):
+        if c.name == 'csrftoken' and c.value != token:
+            jar.clear(c.domain, c.path, c.name)
+    http.headers['X-CSRFToken'] = token
+    return token
+
+
+def is_authenticated(http: Union[httpx.Client, httpx.AsyncClient]) -> bool:
+    """cookie是否为已登录会话(_auth=1)"""
+    return any(c.name == '_auth' and c.value == '1' for c in http.cookies.jar)
+
+
+def is_json(r: httpx.Response) -> bool:
+    """响应内容是否为JSON"""
+    return 'json' in r.headers.get('content-type', '')
+
+
+def is_html_page(r: httpx.Response) -> bool:
+    """资源接口是否返回了HTML页面(会话失效时被重定向到登录/首页)"""
+    return '/resource/' in r.url.path and r.headers.get('content-type', '').startswith('text/html')
+
+
+def auth_failure_reason(r: httpx.Response, authenticated: bool = False) -> Optional[str]:
+    """
+    响应表明会话失效时返回原因，否则返回None
+
+    401、资源接口返回了HTML页面(被重定向到登录页)，或已登录会话被改为 _auth=0。
+    403 本身不计入: 私密画板、被屏蔽的图片等资源级的403与会话无关。
+
+    参数:
+        r: 响应
+        authenticated: 发出请求的会话是否为已登录会话
+    """
+    if r.status_code in SESSION_AUTH_STATUS:
+        return f"HTTP {r.status_code}"
+    if authenticated and r.cookies.get('_auth') == '0':
+        return '会话已登出(_auth=0)'
+    if is_html_page(r):
+        return f"HTTP {r.status_code}，资源接口返回了HTML页面"
+    return None
+
+
+def is_auth_failure(r: httpx.Response, authenticated: bool = False) -> bool:
+    """响应是否表明会话失效，规则见 auth_failure_reason"""
+    return auth_failure_reason(r, authenticated) is not None
+
+
+class SessionKeeper:
+    """维护一个httpx客户端的会话
+
+    连接时请求一次首页预热，拿到服务端下发的csrftoken；每个响应中轮换的csrftoken同步到请求头；
+    请求因会话失效而失败时刷新会话(匿名会话先丢弃旧的csrftoken和_pinterest_sess)，调用方随后重发一次。
+    并发请求同时失败时只刷新一次。
+    """
+
+    def __init__(self, warm_up: bool = SESSION_WARMUP, url: str = SESSION_WARMUP_URL,
+                 refresh_interval: float = SESSION_REFRESH_INTERVAL):
+        """
+        参数:
+            warm_up: 连接时是否预热
+            url: 预热请求的地址
+            refresh_interval: 两次刷新的最小间隔(秒)
+        """
+        self.warm_up = warm_up
+        self.url = url
+        self.refresh_interval = refresh_interval
+        self.generation = 0  # 每次刷新加1，用于判断失败的请求之后是否已经刷新过
+        self.refreshes = 0
+        self._refreshed = 0.0
+        self._lock = threading.Lock()
+        self._alock: Optional[asyncio.Lock] = None
+        self._prepared = None  # 已预热的客户端
+        self.authenticated = False  # 预热时是否为已登录会话，用于识别登出
+
+    def observe(self, http: Union[httpx.Client, httpx.AsyncClient], r: httpx.Response):
+        """处理响应中下发的cookie"""
+        if 'set-cookie' in r.headers:
+            sync_csrf(http, r)
+
+    def _reset(self, http: Union[httpx.Client, httpx.AsyncClient]):
+        """丢弃匿名会话的cookie(已登录会话保留，只重新获取令牌)"""
+        if is_authenticated(http):
+            return
+        jar = http.cookies.jar
+        for c in list(jar):
+            if c.name in SESSION_COOKIES:
+                jar.clear(c.domain, c.path, c.name)
+        http.headers.pop('X-CSRFToken', None)
+
+    def _can_refresh(self, generation: int) -> Optional[bool]:
+        """已被其他请求刷新时返回True，距上次刷新过近时返回False，需要刷新时返回None"""
+        if generation != self.generation:
+            return True
+        if time.monotonic() - self._refreshed < self.refresh_interval:
+            return False
+        return None
+
+    def _done(self, ok: bool):
+        self._refreshed = time.monotonic()
+        if ok:
+            self.generation += 1
+            self.refreshes += 1
+
+    def prepare_sync(self, http: httpx.Client):
+        """连接时预热(同步)，失败时只记录警告"""
+        sync_csrf(http)
+        self.authenticated = is_authenticated(http)
+        if self.warm_up:
+            self._warm_up_sync(http)
+
+    def ensure_sync(self, http: httpx.Client):
+        """首次请求前预热(同步)，同一个客户端只预热一次"""
+        if self._prepared is http:
+            return
+        with self._lock:
+            if self._prepared is not http:
+                self.prepare_sync(http)
+                self._prepared = http
+
+    async def prepare(self, http: httpx.AsyncClient):
+        """连接时预热(异步)，失败时只记录警告"""
+        sync_csrf(http)
+        self.authenticated = is_authenticated(http)
+        if self.warm_up:
+            await self._warm_up(http)
+
+    def _warm_up_sync(self, http: httpx.Client) -> bool:
+        try:
+            r = http.get(self.url, headers={'Accept': 'text/html'})
+        except httpx.HTTPError as e:
+            logger.warning(f"会话预热失败: {e}")
+            return False
+        sync_csrf(http, r)
+        return r.status_code < 400
+
+    async def _warm_up(self, http: httpx.AsyncClient) -> bool:
+        try:
+            r = await http.get(self.url, headers={'Accept': 'text/html'})
+        except httpx.HTTPError as e:
+            logger.warning(f"会话预热失败: {e}")
+            return False
+        sync_csrf(http, r)
+        return r.status_code < 400
+
+    def refresh_sync(self, http: httpx.Client, generation: int) -> bool:
+        """
+        刷新会话(同步)
+
+        参数:
+            http: httpx客户端
+            generation: 失败的请求发出前的 generation
+        返回:
+            是否应该重发请求
+        """
+        with self._lock:
+            state = self._can_refresh(generation)
+            if state is not None:
+                return state
+            logger.info("会话失效，重新获取会话cookie")
+            self._reset(http)
+            ok = self._warm_up_sync(http)
+            self._done(ok)
+            return ok
+
+    async def refresh(self, http: httpx.AsyncClient, generation: int) -> bool:
+        """
+        刷新会话(异步)
+
+        参数:
+            http: httpx客户端
+            generation: 失败的请求发出前的 generation
+        返回:
+            是否应该重发请求
+        """
+        if self._alock is None:
+            self._alock = asyncio.Lock()
+        async with self._alock:
+            state = self._can_refresh(generation)
+            if state is not None:
+                return state
+            logger.info("会话失效，重新获取会话cookie")
+            self._reset(http)
+            ok = await self._warm_up(http)
+            self._done(ok)
+            return ok
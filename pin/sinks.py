@@ -0,0 +1,531 @@
+import os
+import gzip
+import json
+import time
+import zlib
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Union
+from .config import SINK_ROW_GROUP, SINK_COMPRESSION, SINK_FLUSH_PAGES, SINK_FLUSH_INTERVAL
+from .normalize import _EMPTY
+from .record import PinRecord
+from .utils import logger
+
+# 列式文件的固定列，与 PinRecord 的字段一致
+PIN_COLUMNS = PinRecord.__slots__
+
+
+# Arrow IPC 文件的扩展名，其余列式文件为 Parquet
+ARROW_EXTENSIONS = ('.arrow', '.feather', '.ipc')
+
+# NDJSON 文件扩展名对应的压缩方式
+NDJSON_COMPRESSION = {'.gz': 'gzip', '.zst': 'zstd'}
+
+
+def _import_pyarrow():
+    """按需导入pyarrow(可选依赖)"""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("写入Parquet/Arrow文件需要安装pyarrow: pip install pyarrow")
+    return pyarrow
+
+
+def pin_schema(pa=None):
+    """
+    图片数据的Arrow schema
+
+    参数:
+        pa: pyarrow模块，为空时自动导入
+    返回:
+        pyarrow.Schema
+    """
+    pa = pa or _import_pyarrow()
+    return pa.schema([
+        ('id', pa.string()),
+        ('url', pa.string()),
+        ('width', pa.int32()),
+        ('height', pa.int32()),
+        ('created_at', pa.timestamp('s', tz='UTC')),
+        ('dominant_color', pa.string()),
+        ('save', pa.int64()),
+        ('repin', pa.int64()),
+        ('title', pa.string()),
+        ('auto_alt_text', pa.string()),
+    ])
+
+
+class ArrowSink:
+    """Parquet/Arrow IPC 流式写入器
+
+    逐页写入规范化后的图片数据(get_pics_data 的字典格式或PinRecord)，
+    每累积 row_group_size 张图片写出一个行组，内存占用与画板大小无关。
+    """
+
+    def __init__(self, path: str, format: Optional[str] = None, row_group_size: int = SINK_ROW_GROUP,
+                 compression: Optional[str] = SINK_COMPRESSION):
+        """
+        初始化写入器
+
+        参数:
+            path: 输出文件路径
+            format: parquet 或 arrow(Arrow IPC文件)，为空时按扩展名判断(.arrow/.feather/.ipc 为arrow，其余为parquet)
+            row_group_size: 每个行组的图片数
+            compression: Parquet压缩算法，None表示不压缩
+        """
+        if format is None:
+            format = 'arrow' if os.path.splitext(path)[1].lower() in ARROW_EXTENSIONS else 'parquet'
+        if format not in ('parquet', 'arrow'):
+            raise ValueError(f"未知的文件格式: {format}")
+        self.pa = _import_pyarrow()
+        self.path = path
+        self.format = format
+        self.row_group_size = row_group_size
+        self.schema = pin_schema(self.pa)
+        self.rows = 0
+        self._columns: Dict[str, list] = {name: [] for name in PIN_COLUMNS}
+        self._pending = 0
+        if format == 'parquet':
+            self._writer = self.pa.parquet.ParquetWriter(path, self.schema, compression=compression or 'none')
+        else:
+            self._writer = self.pa.ipc.new_file(path, self.schema)
+
+    def write(self, pins: Iterable[Union[Dict[str, Any], PinRecord]]):
+        """
+        写入一页图片数据
+
+        参数:
+            pins: get_pics_data 格式的字典或PinRecord
+        """
+        c = self._columns
+        for pin in pins:
+            if isinstance(pin, PinRecord):
+                for name in PIN_COLUMNS:
+                    c[name].append(getattr(pin, name))
+            else:
+                count = pin.get('count') or _EMPTY
+                text = pin.get('text') or _EMPTY
+                c['id'].append(str(pin['id']))
+                c['url'].append(pin.get('url', ''))
+                c['width'].append(pin.get('width', 0))
+                c['height'].append(pin.get('height', 0))
+                c['created_at'].append(pin.get('created_at', 0))
+                c['dominant_color'].append(pin.get('dominant_color', ''))
+                c['save'].append(count.get('save', 0))
+                c['repin'].append(count.get('repin', 0))
+                c['title'].append(text.get('title', ''))
+                c['auto_alt_text'].append(text.get('auto_alt_text', ''))
+            self._pending += 1
+            if self._pending >= self.row_group_size:
+                self.flush()
+
+    def flush(self):
+        """把缓冲的图片写出为一个行组"""
+        if not self._pending:
+            return
+        batch = self.pa.RecordBatch.from_arrays(
+            [self.pa.array(self._columns[field.name], type=field.type) for field in self.schema],
+            schema=self.schema,
+        )
+        if self.format == 'parquet':
+            self._writer.write_batch(batch, row_group_size=self.row_group_size)
+        else:
+            self._writer.write_batch(batch)
+        self.rows += self._pending
+        self._pending = 0
+        for values in self._columns.values():
+            values.clear()
+
+    def close(self):
+        """写出剩余数据并关闭文件"""
+        if self._writer is None:
+            return
+        self.flush()
+        self._writer.close()
+        self._writer = None
+        logger.debug(f"已写入 {self.rows} 张图片到 {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _fsync_path(path: str):
+    """把已关闭的文件同步到磁盘"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class PartitionedSink:
+    """按提交切分为多个分片文件的 Parquet/Arrow 写入器
+
+    列式文件只有写入文件尾后才能读取，中途崩溃的文件整个不可用。这里把输出写到以 path 为名的目录中，
+    每次 flush 关闭当前分片(写入文件尾并fsync)，之后的数据写入新的分片；已关闭的分片不会再被修改，
+    重新运行时追加新的分片而不是覆盖已有数据。read_pins 可以直接读取整个目录。
+    """
+
+    def __init__(self, path: str, format: Optional[str] = None, **kwargs):
+        """
+        初始化写入器
+
+        参数:
+            path: 输出目录，扩展名决定分片格式(见 ArrowSink)
+            format: parquet 或 arrow，为空时按扩展名判断
+            kwargs: 传给 ArrowSink 的参数(row_group_size、compression)
+        """
+        if format is None:
+            format = 'arrow' if os.path.splitext(path)[1].lower() in ARROW_EXTENSIONS else 'parquet'
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.format = format
+        self.kwargs = kwargs
+        self.rows = 0
+        self.parts = 0
+        self.part_rows = 0  # 当前未关闭分片中的图片数
+        self._prefix = f"part-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}"
+        self._sink: Optional[ArrowSink] = None
+        self._part_path = None
+
+    def write(self, pins: Iterable[Union[Dict[str, Any], PinRecord]]):
+        """
+        写入一页图片数据
+
+        参数:
+            pins: get_pics_data 格式的字典或PinRecord
+        """
+        if self._sink is None:
+            ext = '.parquet' if self.format == 'parquet' else '.arrow'
+            self._part_path = os.path.join(self.path, f"{self._prefix}-{self.parts:05d}{ext}")
+            self._sink = ArrowSink(self._part_path + '.tmp', self.format, **self.kwargs)
+        rows = self._sink.rows + self._sink._pending
+        self._sink.write(pins)
+        self.part_rows += self._sink.rows + self._sink._pending - rows
+
+    def flush(self):
+        """关闭当前分片并同步到磁盘，之后写入的数据进入新的分片"""
+        if self._sink is None:
+            return
+        self._sink.close()
+        tmp = self._sink.path
+        _fsync_path(tmp)
+        os.replace(tmp, self._part_path)
+        self.rows += self.part_rows
+        self.parts += 1
+        self.part_rows = 0
+        self._sink = None
+
+    def close(self):
+        """关闭最后一个分片"""
+        self.flush()
+        logger.debug(f"已写入 {self.rows} 张图片到 {self.path} ({self.parts} 个分片)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def read_pins(path: str, columns: Optional[List[str]] = None):
+    """
+    读取ArrowSink写出的文件或PartitionedSink写出的目录
+
+    参数:
+        path: 文件或目录路径
+        columns: 只读取这些列，为空时读取全部
+    返回:
+        pyarrow.Table
+    """
+    pa = _import_pyarrow()
+    if os.path.isdir(path):
+        # 只读取已关闭的分片，忽略崩溃时留下的 .tmp 文件
+        parts = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if os.path.splitext(name)[1].lower() in ('.parquet',) + ARROW_EXTENSIONS
+        )
+        if not parts:
+            return pin_schema(pa).empty_table().select(columns) if columns else pin_schema(pa).empty_table()
+        return pa.concat_tables([read_pins(part, columns) for part in parts])
+    if os.path.splitext(path)[1].lower() in ARROW_EXTENSIONS:
+        with pa.OSFile(path, 'rb') as source:
+            table = pa.ipc.open_file(source).read_all()
+        return table.select(columns) if columns else table
+    return pa.parquet.read_table(path, columns=columns)
+
+
+def _import_zstandard():
+    """按需导入zstandard(可选依赖)"""
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("读写zstd压缩文件需要安装zstandard: pip install zstandard")
+    return zstandard
+
+
+def _decompressor(compression: str):
+    """新建一个压缩帧的增量解压器"""
+    if compression == 'gzip':
+        return zlib.decompressobj(wbits=31)
+    return _import_zstandard().ZstdDecompressor().decompressobj()
+
+
+def _truncate_partial_line(path: str):
+    """把未压缩文件截断到最后一个换行符，丢弃崩溃时写了一半的行"""
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if not size:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b'\n':
+            return
+        end = 0
+        pos = size
+        while pos > 0:
+            start = max(0, pos - (1 << 16))
+            f.seek(start)
+            i = f.read(pos - start).rfind(b'\n')
+            if i >= 0:
+                end = start + i + 1
+                break
+            pos = start
+        f.truncate(end)
+    logger.warning(f"{path} 末尾有不完整的行({size - end} 字节)，已截断")
+
+
+def _recover_last_frame(path: str, compression: str) -> Optional[str]:
+    """
+    检查压缩文件的最后一帧，不完整时截掉它并把其中完整的行解压到临时文件
+
+    不完整的帧后面直接追加新帧会让整个文件无法解压，所以需要以新帧重新写入这些行。
+
+    返回:
+        临时文件路径(由调用方写回并删除)，最后一帧完整时返回None
+    """
+    # 第一遍只定位最后一帧的起始位置，不保留解压数据
+    frame_start = offset = 0
+    complete = True
+    d = _decompressor(compression)
+    with open(path, 'rb') as raw:
+        for chunk in iter(lambda: raw.read(1 << 16), b''):
+            offset += len(chunk)
+            while chunk:
+                try:
+                    d.decompress(chunk)
+                except Exception:
+                    complete = False
+                    break
+                if d.eof:
+                    chunk = d.unused_data
+                    frame_start = offset - len(chunk)
+                    d = _decompressor(compression)
+                else:
+                    chunk = b''
+            if not complete:
+                break
+    if complete and frame_start == offset:
+        return None
+
+    # 第二遍把最后一帧中能解出的完整行写到临时文件
+    tmp = path + '.recover'
+    kept = 0
+    d = _decompressor(compression)
+    with open(path, 'rb') as raw, open(tmp, 'wb') as out:
+        raw.seek(frame_start)
+        tail = b''
+        for chunk in iter(lambda: raw.read(1 << 16), b''):
+            try:
+                data = tail + d.decompress(chunk)
+            except Exception:
+                break
+            head, sep, tail = data.rpartition(b'\n')
+            if sep:
+                out.write(head + sep)
+                kept += len(head) + 1
+    with open(path, 'rb+') as f:
+        f.truncate(frame_start)
+    logger.warning(f"{path} 最后一个压缩帧不完整，已截断并以新帧重新写入其中的 {kept} 字节完整数据")
+    return tmp
+
+
+class NdjsonSink:
+    """NDJSON 追加写入器
+
+    每页数据写入后立即进入文件缓冲，每 flush_pages 页或每 flush_interval 秒 flush 并 fsync 一次，
+    内存占用与画板大小无关；程序中途崩溃时已同步的数据不会丢失。
+    可选 gzip/zstd 压缩，以追加方式打开时新数据写为新的压缩帧，与已有内容拼接后仍可读取。
+    打开已有文件时先修复崩溃留下的末尾：未压缩文件截断到最后一个换行符；压缩文件的最后一帧不完整时
+    截掉该帧，把其中完整的行写入新帧(需要解压一遍已有文件)。
+    """
+
+    def __init__(self, path: str, compression: Optional[str] = None, flush_pages: int = SINK_FLUSH_PAGES,
+                 flush_interval: float = SINK_FLUSH_INTERVAL, fsync: bool = True):
+        """
+        初始化写入器
+
+        参数:
+            path: 输出文件路径(追加写入)
+            compression: gzip、zstd 或 none，为空时按扩展名判断(.gz/.zst)
+            flush_pages: 每写入多少页同步一次
+            flush_interval: 两次同步的最长间隔(秒)
+            fsync: 同步时是否调用fsync落盘
+        """
+        if compression is None:
+            compression = NDJSON_COMPRESSION.get(os.path.splitext(path)[1].lower(), 'none')
+        if compression not in ('gzip', 'zstd', 'none'):
+            raise ValueError(f"未知的压缩方式: {compression}")
+        self.path = path
+        self.compression = compression
+        self.flush_pages = flush_pages
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.rows = 0
+        self.pages = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        recovered = None
+        if os.path.exists(path) and os.path.getsize(path):
+            if compression == 'none':
+                _truncate_partial_line(path)
+            else:
+                recovered = _recover_last_frame(path, compression)
+        self._raw = open(path, 'ab')
+        if compression == 'gzip':
+            self._file = gzip.GzipFile(fileobj=self._raw, mode='ab')
+        elif compression == 'zstd':
+            self._zstd = _import_zstandard()
+            self._file = self._zstd.ZstdCompressor().stream_writer(self._raw, closefd=False)
+        else:
+            self._file = self._raw
+        if recovered is not None:
+            with open(recovered, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 16), b''):
+                    self._file.write(chunk)
+            self.flush()
+            os.remove(recovered)
+
+    def write(self, pins: Iterable[Union[Dict[str, Any], PinRecord]]):
+        """
+        写入一页数据，每条一行
+
+        参数:
+            pins: 字典(规范化或原始数据均可)或PinRecord
+        """
+        lines = []
+        for pin in pins:
+            if isinstance(pin, PinRecord):
+                pin = pin.to_dict()
+            lines.append(json.dumps(pin, ensure_ascii=False))
+        if lines:
+            self._file.write(('\n'.join(lines) + '\n').encode('utf-8'))
+        self.rows += len(lines)
+        self.pages += 1
+        self._unsynced += 1
+        if self._unsynced >= self.flush_pages or time.monotonic() - self._last_sync >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """把已写入的数据刷新到磁盘"""
+        if self.compression == 'gzip':
+            self._file.flush()
+        elif self.compression == 'zstd':
+            self._file.flush(self._zstd.FLUSH_BLOCK)
+        self._sync()
+
+    def _sync(self):
+        self._raw.flush()
+        if self.fsync:
+            os.fsync(self._raw.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self):
+        """同步剩余数据并关闭文件"""
+        if self._raw.closed:
+            return
+        if self._file is not self._raw:
+            # 结束压缩帧(写入gzip尾部/zstd帧结束标记)，不关闭底层文件
+            self._file.close()
+        self._sync()
+        self._raw.close()
+        logger.debug(f"已写入 {self.rows} 条数据到 {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _iter_chunks(raw, compression: str, size: int = 1 << 16) -> Iterator[bytes]:
+    """逐块读取并解压，支持多个拼接的压缩帧；末尾不完整的帧只产出已能解出的部分"""
+    if compression == 'none':
+        yield from iter(lambda: raw.read(size), b'')
+        return
+    new = lambda: _decompressor(compression)
+    d = new()
+    for chunk in iter(lambda: raw.read(size), b''):
+        while chunk:
+            yield d.decompress(chunk)
+            if d.eof:
+                chunk = d.unused_data
+                d = new()
+            else:
+                chunk = b''
+
+
+def read_ndjson(path: str, compression: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    逐行读取NdjsonSink写出的文件
+
+    无法解析的行(例如崩溃时写了一半、之后又被追加的行)会被跳过并记录警告。
+
+    参数:
+        path: 文件路径
+        compression: gzip、zstd 或 none，为空时按扩展名判断
+    产出:
+        每行的字典
+    """
+    if compression is None:
+        compression = NDJSON_COMPRESSION.get(os.path.splitext(path)[1].lower(), 'none')
+    buf = b''
+    bad = 0
+    with open(path, 'rb') as raw:
+        for chunk in _iter_chunks(raw, compression):
+            buf += chunk
+            *lines, buf = buf.split(b'\n')
+            for line in lines:
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        bad += 1
+    if buf.strip():
+        try:
+            yield json.loads(buf)
+        except ValueError:
+            logger.warning(f"文件末尾不完整，已跳过: {path}")
+    if bad:
+        logger.warning(f"{path} 中有 {bad} 行无法解析，已跳过")
+
+
+def open_sink(path: str, partitioned: bool = False) -> Union[ArrowSink, PartitionedSink, NdjsonSink]:
+    """
+    按扩展名打开写入器
+
+    .parquet/.arrow/.feather/.ipc 使用 ArrowSink(partitioned为True时使用 PartitionedSink)，
+    其余(.ndjson、.ndjson.gz、.ndjson.zst等)使用 NdjsonSink。
+
+    参数:
+        path: 输出文件路径
+        partitioned: 列式格式是否写为分片目录，每次 flush 都得到可读取的完整文件
+    返回:
+        写入器
+    """
+    if os.path.splitext(path)[1].lower() in ('.parquet',) + ARROW_EXTENSIONS:
+        return PartitionedSink(path) if partitioned else ArrowSink(path)
+    return NdjsonSink(path)
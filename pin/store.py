@@ -0,0 +1,192 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+from .config import STORE_INDEX, STORE_SHARD_DEPTH
+from .utils import logger, create_dir
+
+
+class BlobStore:
+    """内容寻址的图片存储
+
+    文件按内容的SHA-256存放在分片目录中(如 ab/cd/abcd....jpg)，同一张图片只保存一份；
+    SQLite索引记录 地址哈希 -> 文件 和 图片ID -> 文件 的映射，
+    下载前按地址查询索引，已下载过的地址不再请求。
+    """
+
+    def __init__(self, root: str, index: str = STORE_INDEX, depth: int = STORE_SHARD_DEPTH):
+        """
+        初始化存储
+
+        参数:
+            root: 存储根目录
+            index: 索引文件名
+            depth: 分片目录层数
+        """
+        create_dir(root)
+        self.root = root
+        self.depth = depth
+        self.tmp_dir = os.path.join(root, 'tmp')
+        create_dir(self.tmp_dir)
+        self.url_hits = 0  # 按地址命中索引的次数
+        self.dedup = 0  # 内容重复而未重复保存的次数
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(root, index), check_same_thread=False)
+        self._db.executescript(
+            'CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, file TEXT, size INTEGER, created REAL);'
+            'CREATE TABLE IF NOT EXISTS urls (url_hash TEXT PRIMARY KEY, url TEXT, hash TEXT);'
+            'CREATE TABLE IF NOT EXISTS pins (pin_id TEXT PRIMARY KEY, hash TEXT);'
+            'CREATE INDEX IF NOT EXISTS pins_hash ON pins(hash);'
+        )
+        self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def url_key(url: str) -> str:
+        """地址的哈希"""
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _ext(url: str) -> str:
+        return os.path.splitext(urlsplit(url).path)[1].lower() or '.jpg'
+
+    def _blob_file(self, digest: str, ext: str) -> str:
+        """按哈希分片的相对路径"""
+        shards = [digest[i * 2:i * 2 + 2] for i in range(self.depth)]
+        return os.path.join(*shards, digest + ext)
+
+    def path(self, digest: str) -> Optional[str]:
+        """
+        文件的完整路径
+
+        参数:
+            digest: 内容哈希
+        返回:
+            文件路径，不存在时返回None
+        """
+        with self._lock:
+            row = self._db.execute('SELECT file FROM blobs WHERE hash = ?', (digest,)).fetchone()
+        return os.path.join(self.root, row[0]) if row else None
+
+    def lookup(self, url: str) -> Optional[str]:
+        """
+        按地址查询索引
+
+        参数:
+            url: 图片地址
+        返回:
+            内容哈希，未下载过或文件已被删除时返回None
+        """
+        key = self.url_key(url)
+        with self._lock:
+            row = self._db.execute(
+                'SELECT urls.hash, blobs.file FROM urls JOIN blobs ON blobs.hash = urls.hash WHERE url_hash = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if not os.path.exists(os.path.join(self.root, row[1])):
+                self._db.execute('DELETE FROM blobs WHERE hash = ?', (row[0],))
+                self._db.execute('DELETE FROM urls WHERE hash = ?', (row[0],))
+                self._db.commit()
+                return None
+            self.url_hits += 1
+        return row[0]
+
+    def pin_path(self, pin_id: str) -> Optional[str]:
+        """
+        按图片ID查询文件
+
+        参数:
+            pin_id: 图片ID
+        返回:
+            文件路径，没有记录时返回None
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT blobs.file FROM pins JOIN blobs ON blobs.hash = pins.hash WHERE pin_id = ?', (str(pin_id),)
+            ).fetchone()
+        return os.path.join(self.root, row[0]) if row else None
+
+    def link(self, pin_id: Optional[str], digest: str):
+        """把图片ID关联到已存储的文件"""
+        if pin_id is None:
+            return
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO pins (pin_id, hash) VALUES (?, ?)', (str(pin_id), digest))
+            self._db.commit()
+
+    def staging_path(self, url: str) -> str:
+        """下载中的临时文件路径(每个地址固定，便于断点续传)"""
+        return os.path.join(self.tmp_dir, self.url_key(url) + self._ext(url))
+
+    def put(self, file_path: str, url: Optional[str] = None, pin_id: Optional[str] = None) -> str:
+        """
+        把下载完成的文件移入存储
+
+        内容已存在时删除该文件，只更新索引。
+
+        参数:
+            file_path: 下载完成的文件
+            url: 图片地址
+            pin_id: 图片ID
+        返回:
+            存储中的文件路径
+        """
+        h = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        ext = self._ext(url) if url else os.path.splitext(file_path)[1].lower()
+        size = os.path.getsize(file_path)
+
+        with self._lock:
+            row = self._db.execute('SELECT file FROM blobs WHERE hash = ?', (digest,)).fetchone()
+            if row and os.path.exists(os.path.join(self.root, row[0])):
+                os.remove(file_path)
+                file = row[0]
+                self.dedup += 1
+                logger.debug(f"内容重复，复用已存储的文件: {file}")
+            else:
+                file = self._blob_file(digest, ext)
+                create_dir(os.path.dirname(os.path.join(self.root, file)))
+                os.replace(file_path, os.path.join(self.root, file))
+                self._db.execute(
+                    'INSERT OR REPLACE INTO blobs (hash, file, size, created) VALUES (?, ?, ?, ?)',
+                    (digest, file, size, time.time()),
+                )
+            if url:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO urls (url_hash, url, hash) VALUES (?, ?, ?)', (self.url_key(url), url, digest)
+                )
+            if pin_id is not None:
+                self._db.execute('INSERT OR REPLACE INTO pins (pin_id, hash) VALUES (?, ?)', (str(pin_id), digest))
+            self._db.commit()
+        return os.path.join(self.root, file)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """存储统计"""
+        with self._lock:
+            blobs, size = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs').fetchone()
+            urls = self._db.execute('SELECT COUNT(*) FROM urls').fetchone()[0]
+            pins = self._db.execute('SELECT COUNT(*) FROM pins').fetchone()[0]
+        return {
+            'blobs': blobs,
+            'bytes': size,
+            'urls': urls,
+            'pins': pins,
+            'url_hits': self.url_hits,
+            'dedup': self.dedup,
+        }
@@ -1,8 +1,5 @@
-import time
-import urllib.parse
-from ..utils import logger
-from typing import List, Dict, Any
-import httpx
+from ..paginator import Paginator, collect
+from typing import List, Dict, Any, Iterator
 
 class AccountBoards:
     """账号画板操作类(同步版本)"""
@@ -30,26 +27,20 @@ class AccountBoards:
 
         get_data_origin(username: str) -> List[Dict[str, Any]]:
         获取用户所有画板的数据(原始数据)
+
+        iter_data(username: str) -> Iterator[List[Dict[str, Any]]]:
+        逐页产出用户画板的数据
+
+        iter_data_origin(username: str) -> Iterator[List[Dict[str, Any]]]:
+        逐页产出用户画板的数据(原始数据)
         """)
 
     def get_ids(self, username: str) -> List[str]:
         boards_data = self.get_data(username)
-        return list(dict([(board_data['id'], board_data) for board_data in boards_data]).keys())
+        return boards_data.derive(dict([(board_data['id'], board_data) for board_data in boards_data]).keys())
 
     def get_data(self, username: str) -> List[Dict[str, Any]]:
-        boards_data_origin = self.get_data_origin(username)
-        boards_data = []
-        for board_data_origin in boards_data_origin:
-            board_data = {
-                'id': board_data_origin['id'],
-                # 'node_id': board_data_origin['node_id'],
-                'name': board_data_origin['name'],
-                'url': board_data_origin['url'],
-                'follower_count': board_data_origin['follower_count'],
-                'pin_count': board_data_origin['pin_count'],
-            }
-            boards_data.append(board_data)
-        return boards_data
+        return collect(self.iter_data(username))
 
     def get_data_origin(self, username: str) -> List[Dict[str, Any]]:
         """
@@ -60,28 +51,47 @@ class AccountBoards:
         返回:
             画板列表
         """
-        bookmark = None
-        boards = []
+        return collect(self.iter_data_origin(username))
+
+    def iter_data(self, username: str) -> Iterator[List[Dict[str, Any]]]:
+        """
+        逐页获取用户画板数据
 
-        while True:
-            # 显示进度
-            b_len = len(boards)
-            logger.debug(f"获取所有板块 [ {b_len} / ? ]")
+        参数:
+            username: 用户名
+        产出:
+            每页的画板数据列表
+        """
+        for batch in self.iter_data_origin(username):
+            yield [self._parse_board(board) for board in batch]
 
-            try:
-                batch, bookmark = self._fetch_batch(username, bookmark)
-                boards.extend(batch)
+    def iter_data_origin(self, username: str) -> Iterator[List[Dict[str, Any]]]:
+        """
+        逐页获取用户的画板(原始数据)
 
-                # 如果没有下一页，退出循环
-                if bookmark == "-end-" or bookmark == '%22-end-%22':
-                    break
-            except Exception as e:
-                logger.error(f"获取数据失败: {e}")
-                break
+        参数:
+            username: 用户名
+        产出:
+            每页的原始画板列表
+        """
+        yield from Paginator(
+            self.client, 'BoardsResource',
+            lambda bookmark: self._build_options(username, bookmark),
+            source_url=username,
+            error=f"获取此用户名失败: {username}",
+            progress='获取所有板块', summary='个板块',
+        )
 
-        b_len = len(boards)
-        logger.success(f"找到 {b_len} 个板块{'s' if b_len > 1 else ''}")
-        return boards
+    @staticmethod
+    def _parse_board(board_data_origin: Dict[str, Any]) -> Dict[str, Any]:
+        """提取单个画板的有效信息"""
+        return {
+            'id': board_data_origin['id'],
+            'name': board_data_origin['name'],
+            'url': board_data_origin['url'],
+            'follower_count': board_data_origin['follower_count'],
+            'pin_count': board_data_origin['pin_count'],
+        }
 
     def _build_options(self, username: str, bookmark: str = None) -> Dict[str, Any]:
         """构建请求参数"""
@@ -101,34 +111,3 @@ class AccountBoards:
             options.update({'bookmarks': [bookmark]})
 
         return options
-
-    def _fetch_batch(self, username: str, bookmark: str = None) -> tuple:
-        """获取一批数据"""
-        options = self._build_options(username, bookmark)
-
-        post_d = urllib.parse.urlencode({
-            'source_url': username,
-            'data': {
-                'options': options,
-                'context': {}
-            },
-            '_': int(time.time()*1000)
-        }).replace('+', '').replace('%27', '%22').replace('%3A%22true%22', '%3Atrue').replace('%3A%22false%22', '%3Afalse')
-
-        for t in (15, 30, 40, 50, 60):
-            try:
-                r = self.client.session.get(
-                    'https://www.pinterest.com/resource/BoardsResource/get/',
-                    params=post_d,
-                    timeout=60
-                )
-                data = r.json()
-                batch = data['resource_response']['data']
-                bookmark = data['resource']['options']['bookmarks'][0]
-                return batch, bookmark
-
-            except (httpx.TimeoutException, httpx.NetworkError) as e:
-                logger.warning(f"请求超时,重试中... ({t}s)")
-                time.sleep(5)
-                if t == 60:  # 最后一次重试失败
-                    raise Exception(f"获取此用户名失败: {username}")
\ No newline at end of file
@@ -1,8 +1,8 @@
+import time
 from ..utils import logger
 from typing import Dict, Any
-import json
-from bs4 import BeautifulSoup
-import time
+from ..extract import extract_pin_data
+from ..normalize import parse_created_at
 
 class PicData:
     """图片数据操作类(同步版本)"""
@@ -26,22 +26,19 @@ class PicData:
             图片详细数据
         """
         try:
-            r = self.client.session.get(
+            r = self.client.request(
                 f"https://www.pinterest.com/pin/{pin_id}/",
                 timeout=60
             )
 
-            # 解析HTML获取数据
-            soup = BeautifulSoup(r.text, "html.parser")
-
-            # 查找包含数据的script标签
-            for script in soup.find_all("script"):
-                if script.get("data-relay-response") == "true":
-                    data = json.loads(script.string)
-                    pin_data = data["response"]["data"]["v3GetPinQuery"]["data"]
-                    return pin_data
-
-            raise Exception("Pin data not found")
+            # 提取relay数据(快速扫描，失败时回退到BeautifulSoup)
+            start = time.perf_counter()
+            data = extract_pin_data(r.content)
+            seconds = time.perf_counter() - start
+            self.client.metrics.decoded('pin', seconds)
+            if self.client.hooks:
+                self.client.hooks.decode('pin', 'html', seconds, len(r.content))
+            return data
 
         except Exception as e:
             logger.error(f"获取图片数据失败: {e}")
@@ -58,7 +55,7 @@ class PicData:
             'width': p.get('imageSpec_orig', {}).get('width', 0),
             'height': p.get('imageSpec_orig', {}).get('height', 0),
             'link': p.get('link', ''),
-            'created_at': int(time.mktime(time.strptime(p.get('createdAt', ''), '%a, %d %b %Y %H:%M:%S %z'))) if p.get('createdAt') else 0,
+            'created_at': parse_created_at(p.get('createdAt')),
             'join': p.get('pinJoin', {}).get('visualAnnotation', ''),
             'dominant_color': p.get('dominantColor', ''),
             'count': {
@@ -1,8 +1,8 @@
-import httpx
-import time
-from ..utils import logger
-from typing import List, Dict, Any
-import urllib.parse
+from ..paginator import Paginator, collect
+from ..record import PinRecord
+from ..hooks import normalize_page
+from ..variant import VariantPolicy
+from typing import List, Dict, Any, Union, Iterator
 
 class PicRelated:
     """相关图片操作类(同步版本)"""
@@ -21,41 +21,28 @@ class PicRelated:
         print("""
         PicRelated 类提供以下方法:
 
-        get_pics_urls(pin_id: str, page_size: int = 25) -> List[str]:
+        get_pics_urls(pin_id: str, page_size: int = 25, variant: VariantPolicy = None) -> List[str]:
         获取相关图片的URL列表
 
-        get_pics_data(pin_id: str, page_size: int = 25) -> List[Dict[str, Any]]:
-        获取相关图片的数据
+        get_pics_data(pin_id: str, page_size: int = 25, as_records: bool = False, variant: VariantPolicy = None) -> List[Dict[str, Any]]:
+        获取相关图片的数据(as_records=True 时返回 PinRecord 列表，variant 指定图片尺寸，默认原图)
 
         get_pics_data_origin(pin_id: str, page_size: int = 25) -> List[Dict[str, Any]]:
         获取相关图片的原始数据
+
+        iter_pics(pin_id: str, page_size: int = 25, as_records: bool = False, variant: VariantPolicy = None) -> Iterator[List[Dict[str, Any]]]:
+        逐页产出相关图片的数据
+
+        iter_pics_origin(pin_id: str, page_size: int = 25) -> Iterator[List[Dict[str, Any]]]:
+        逐页产出相关图片的原始数据
         """)
 
-    def get_pics_urls(self, pin_id: str, page_size: int = 25) -> List[str]:
-        pics_data = self.get_pics_data(pin_id, page_size)
-        return [pic['url'] for pic in pics_data]
-
-    def get_pics_data(self, pin_id: str, page_size: int = 25) -> List[Dict[str, Any]]:
-        pics_data_origin = self.get_pics_data_origin(pin_id, page_size)
-        pics_data = []
-        for pic in pics_data_origin:
-            pics_data.append({
-                'id': pic['id'],
-                'url': pic.get('images', {}).get('orig', {}).get('url', ''),
-                'width': pic.get('images', {}).get('orig', {}).get('width', 0),
-                'height': pic.get('images', {}).get('orig', {}).get('height', 0),
-                'created_at': int(time.mktime(time.strptime(pic.get('created_at', ''), '%a, %d %b %Y %H:%M:%S %z'))) if pic.get('created_at') else 0,
-                'dominant_color': pic.get('dominant_color', ''),
-                'count': {
-                    'save': pic.get('aggregate_metadata', {}).get('aggregated_stats', {}).get('saves', 0),
-                    'repin': pic.get('repin_count', 0),
-                },
-                'text': {
-                    'title': pic.get('title', ''),
-                    'auto_alt_text': pic.get('auto_alt_text', ''),
-                }
-            })
-        return pics_data
+    def get_pics_urls(self, pin_id: str, page_size: int = 25, variant: VariantPolicy = None) -> List[str]:
+        pics_data = self.get_pics_data(pin_id, page_size, variant=variant)
+        return pics_data.derive(pic['url'] for pic in pics_data)
+
+    def get_pics_data(self, pin_id: str, page_size: int = 25, as_records: bool = False, variant: VariantPolicy = None) -> List[Union[Dict[str, Any], PinRecord]]:
+        return collect(self.iter_pics(pin_id, page_size, as_records, variant))
 
     def get_pics_data_origin(self, pin_id: str, page_size: int = 25) -> List[Dict[str, Any]]:
         """
@@ -67,6 +54,36 @@ class PicRelated:
         返回:
             相关图片列表
         """
+        return collect(self.iter_pics_origin(pin_id, page_size))
+
+    def iter_pics(self, pin_id: str, page_size: int = 25, as_records: bool = False, variant: VariantPolicy = None, job_key: str = None) -> Iterator[List[Union[Dict[str, Any], PinRecord]]]:
+        """
+        逐页获取相关图片数据
+
+        参数:
+            pin_id: 图片ID
+            page_size: 每页数量，默认25，最大50
+            as_records: 为True时产出PinRecord而不是字典
+            variant: 图片尺寸选择策略(VariantPolicy)，默认使用原图
+            job_key: 检查点任务键，指定后中断的任务以同一个键重新运行时从最后的bookmark继续(需要客户端设置检查点存储)
+        产出:
+            每页的图片数据列表
+        """
+        for batch in self.iter_pics_origin(pin_id, page_size, job_key=job_key):
+            yield normalize_page(self.client, 'RelatedModulesResource', batch, as_records, variant)
+
+    def iter_pics_origin(self, pin_id: str, page_size: int = 25, job_key: str = None, mark_seen: bool = True) -> Iterator[List[Dict[str, Any]]]:
+        """
+        逐页获取相关图片(原始数据)
+
+        参数:
+            pin_id: 图片ID
+            page_size: 每页数量，默认25，最大50
+            job_key: 检查点任务键，指定后中断的任务以同一个键重新运行时从最后的bookmark继续(需要客户端设置检查点存储)
+            mark_seen: 是否在取下一页时把上一页记为已见(需要客户端设置已见集合)；为False时由调用方写入后调用 seen.mark_seen
+        产出:
+            每页的原始图片列表
+        """
         if not pin_id:
             raise ValueError("无效的图片ID")
         if page_size < 1:
@@ -74,31 +91,16 @@ class PicRelated:
         if page_size > 50:
             raise ValueError("每页数量不能超过50")
 
-        bookmark = None
-        images = []
-
-        while True:
-            # 显示进度
-            i_len = len(images)
-            logger.debug(f"获取相关图片 [ {i_len} / ? ]")
-
-            try:
-                batch, bookmark = self._fetch_batch(pin_id, bookmark, page_size)
-                images.extend(batch)
-
-                # 如果没有下一页，退出循环
-                if bookmark == "-end-" or bookmark == '%22-end-%22':
-                    break
-            except Exception as e:
-                # 打印错误栈
-                import traceback
-                traceback.print_exc()
-                logger.error(f"获取数据失败: {e}")
-                break
-
-        i_len = len(images)
-        logger.success(f"找到 {i_len} 张相关图片{'s' if i_len > 1 else ''}")
-        return images
+        yield from Paginator(
+            self.client, 'RelatedModulesResource',
+            lambda bookmark: self._build_options(pin_id, bookmark, page_size),
+            source_url=f"/pin/{pin_id}/",
+            error=f"获取相关图片失败: pin_id={pin_id}",
+            progress='获取相关图片', summary='张相关图片',
+            seen=self.client.seen,
+            mark_seen=mark_seen,
+            job_key=job_key,
+        )
 
     def _build_options(self, pin_id: str, bookmark: str = None, page_size: int = 25) -> Dict[str, Any]:
         """构建请求参数"""
@@ -117,37 +119,3 @@ class PicRelated:
             options["bookmarks"] = [bookmark]
 
         return options
-
-    def _fetch_batch(self, pin_id: str, bookmark: str = None, page_size: int = 25) -> tuple:
-        """获取一批数据"""
-        options = self._build_options(pin_id, bookmark, page_size)
-        source_url = f"/pin/{pin_id}/"
-
-        post_d = urllib.parse.urlencode({
-            'source_url': source_url,
-            'data': {
-                'options': options,
-                'context': {}
-            },
-            '_': int(time.time()*1000)
-        }).replace('+', '').replace('%27', '%22').replace('%3A%22true%22', '%3Atrue').replace('%3A%22false%22', '%3Afalse')
-
-        for t in (15, 30, 40, 50, 60):
-            try:
-                r = self.client.session.get(
-                    'https://www.pinterest.com/resource/RelatedModulesResource/get/',
-                    params=post_d,
-                    timeout=60
-                )
-                data = r.json()
-                # 提取数据
-                batch = data['resource_response']['data']
-                bookmark = data['resource']['options'].get('bookmarks', ['-end-'])[0]
-
-                return batch, bookmark
-
-            except (httpx.TimeoutException, httpx.NetworkError) as e:
-                logger.warning(f"请求超时,重试中... ({t}s)")
-                time.sleep(5)
-                if t == 60:  # 最后一次重试失败
-                    raise Exception(f"获取相关图片失败: pin_id={pin_id}")
\ No newline at end of file
@@ -1,8 +1,9 @@
-import httpx
-import time
 import urllib.parse
-from ..utils import logger
-from typing import List, Dict, Any
+from ..paginator import Paginator, collect
+from ..record import PinRecord
+from ..hooks import normalize_page
+from ..variant import VariantPolicy
+from typing import List, Dict, Any, Union, Iterator
 
 class SearchPics:
     """图片搜索操作类(同步版本)"""
@@ -16,31 +17,12 @@ class SearchPics:
         """
         self.client = client
 
-    def get_pics_urls(self, pin_id: str, page_size: int = 25) -> List[str]:
-        pics_data = self.get_pics_data(pin_id, page_size)
-        return [pic['url'] for pic in pics_data]
+    def get_pics_urls(self, query: str, variant: VariantPolicy = None) -> List[str]:
+        pics_data = self.get_pics_data(query, variant=variant)
+        return pics_data.derive(pic['url'] for pic in pics_data)
 
-    def get_pics_data(self, pin_id: str, page_size: int = 25) -> List[Dict[str, Any]]:
-        pics_data_origin = self.get_pics_data_origin(pin_id, page_size)
-        pics_data = []
-        for pic in pics_data_origin:
-            pics_data.append({
-                'id': pic['id'],
-                'url': pic.get('images', {}).get('orig', {}).get('url', ''),
-                'width': pic.get('images', {}).get('orig', {}).get('width', 0),
-                'height': pic.get('images', {}).get('orig', {}).get('height', 0),
-                'created_at': int(time.mktime(time.strptime(pic.get('created_at', ''), '%a, %d %b %Y %H:%M:%S %z'))) if pic.get('created_at') else 0,
-                'dominant_color': pic.get('dominant_color', ''),
-                'count': {
-                    'save': pic.get('aggregate_metadata', {}).get('aggregated_stats', {}).get('saves', 0),
-                    'repin': pic.get('repin_count', 0),
-                },
-                'text': {
-                    'title': pic.get('title', ''),
-                    'auto_alt_text': pic.get('auto_alt_text', ''),
-                }
-            })
-        return pics_data
+    def get_pics_data(self, query: str, as_records: bool = False, variant: VariantPolicy = None) -> List[Union[Dict[str, Any], PinRecord]]:
+        return collect(self.iter_pics(query, as_records, variant))
 
     def get_pics_data_origin(self, query: str) -> List[Dict[str, Any]]:
         """
@@ -51,28 +33,44 @@ class SearchPics:
         返回:
             图片列表
         """
-        bookmark = None
-        images = []
+        return collect(self.iter_pics_origin(query))
 
-        while True:
-            # 显示进度
-            i_len = len(images)
-            logger.debug(f"获取搜索结果 [ {i_len} / ? ]")
+    def iter_pics(self, query: str, as_records: bool = False, variant: VariantPolicy = None, job_key: str = None) -> Iterator[List[Union[Dict[str, Any], PinRecord]]]:
+        """
+        逐页搜索图片数据
 
-            try:
-                batch, bookmark = self._fetch_batch(query, bookmark)
-                images.extend(batch)
+        参数:
+            query: 搜索关键词
+            as_records: 为True时产出PinRecord而不是字典
+            variant: 图片尺寸选择策略(VariantPolicy)，默认使用原图
+            job_key: 检查点任务键，指定后中断的任务以同一个键重新运行时从最后的bookmark继续(需要客户端设置检查点存储)
+        产出:
+            每页的图片数据列表
+        """
+        for batch in self.iter_pics_origin(query, job_key=job_key):
+            yield normalize_page(self.client, 'BaseSearchResource', batch, as_records, variant)
 
-                # 如果没有下一页，退出循环
-                if bookmark == "-end-" or bookmark == '%22-end-%22':
-                    break
-            except Exception as e:
-                logger.error(f"获取数据失败: {e}")
-                break
+    def iter_pics_origin(self, query: str, job_key: str = None, mark_seen: bool = True) -> Iterator[List[Dict[str, Any]]]:
+        """
+        逐页搜索图片(原始数据)
 
-        i_len = len(images)
-        logger.success(f"找到 {i_len} 张图片{'s' if i_len > 1 else ''}")
-        return images
+        参数:
+            query: 搜索关键词
+            job_key: 检查点任务键，指定后中断的任务以同一个键重新运行时从最后的bookmark继续(需要客户端设置检查点存储)
+            mark_seen: 是否在取下一页时把上一页记为已见(需要客户端设置已见集合)；为False时由调用方写入后调用 seen.mark_seen
+        产出:
+            每页的原始图片列表
+        """
+        yield from Paginator(
+            self.client, 'BaseSearchResource',
+            lambda bookmark: self._build_options(query, bookmark),
+            results_key='results', bookmark_source='response',
+            error=f"搜索图片失败: query={query}",
+            progress='获取搜索结果', summary='张图片',
+            seen=self.client.seen,
+            mark_seen=mark_seen,
+            job_key=job_key,
+        )
 
     def _build_options(self, query: str, bookmark: str = None) -> Dict[str, Any]:
         """构建请求参数"""
@@ -109,39 +107,3 @@ class SearchPics:
             options['bookmarks'] = [bookmark]
 
         return options
-
-    def _fetch_batch(self, query: str, bookmark: str = None) -> tuple:
-        """获取一批数据"""
-        options = self._build_options(query, bookmark)
-
-        post_d = urllib.parse.urlencode({
-            'data': {
-                'options': options,
-                'context': {}
-            },
-            '_': int(time.time()*1000)
-        }).replace('+', '').replace('%27', '%22').replace('%3A%22true%22', '%3Atrue').replace('%3A%22false%22', '%3Afalse')
-
-        for t in (15, 30, 40, 50, 60):
-            try:
-                r = self.client.session.get(
-                    'https://www.pinterest.com/resource/BaseSearchResource/get/',
-                    params=post_d,
-                    timeout=60
-                )
-                data = r.json()
-                # 修正数据提取路径
-                batch = data['resource_response']['data']['results']
-                bookmark = data['resource_response'].get('bookmark', '-end-')  # 使用get避免KeyError
-
-                # 如果没有bookmark，说明是最后一页
-                if not bookmark:
-                    bookmark = '-end-'
-
-                return batch, bookmark
-
-            except (httpx.TimeoutException, httpx.NetworkError) as e:
-                logger.warning(f"请求超时,重试中... ({t}s)")
-                time.sleep(5)
-                if t == 60:  # 最后一次重试失败
-                    raise Exception(f"搜索图片失败: query={query}")
\ No newline at end of file
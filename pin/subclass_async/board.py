@@ -1,9 +1,8 @@
-import httpx
-import time
-import urllib.parse
-import asyncio
-from ..utils import logger
-from typing import List, Dict, Any
+from ..paginator import AsyncPaginator, acollect
+from ..record import PinRecord
+from ..hooks import normalize_page
+from ..variant import VariantPolicy
+from typing import List, Dict, Any, Union, AsyncIterator
 
 class Board:
     """画板操作类"""
@@ -36,58 +35,12 @@ class Board:
 
         return options
 
-    async def _fetch_batch(self, options, shortform=None):
-        """获取一批数据"""
-        post_d = urllib.parse.urlencode({
-            'data': {
-                'options': options,
-                'context': {}
-            },
-            '_': int(time.time()*1000)
-        }).replace('+', '').replace('%27', '%22').replace('%3A%22true%22', '%3Atrue').replace('%3A%22false%22', '%3Afalse')
-
-        for t in (15, 30, 40, 50, 60):
-            try:
-                r = await self.client.client.get(
-                    'https://www.pinterest.com/resource/BoardFeedResource/get/',
-                    params=post_d
-                )
-                data = r.json()
-                batch = data['resource_response']['data']
-                bookmark = data['resource']['options']['bookmarks'][0]
-                return batch, bookmark
-
-            except (httpx.TimeoutException, httpx.ConnectError) as e:
-                logger.warning(f"请求超时,重试中... ({t}s)")
-                await asyncio.sleep(5)
-                if t == 60:  # 最后一次重试失败
-                    raise Exception(f"获取此板块/分区失败: {shortform}")
-
-    async def get_pics_urls(self, board_id: str) -> List[str]:
-        pics_data = await self.get_pics_data(board_id)
-        return [pic['url'] for pic in pics_data]
-
-    async def get_pics_data(self, board_id: str) -> List[Dict[str, Any]]:
-        pics_data_origin = await self.get_pics_data_origin(board_id)
-        pics_data = []
-        for pic in pics_data_origin:
-            pics_data.append({
-                'id': pic['id'],
-                'url': pic.get('images', {}).get('orig', {}).get('url', ''),
-                'width': pic.get('images', {}).get('orig', {}).get('width', 0),
-                'height': pic.get('images', {}).get('orig', {}).get('height', 0),
-                'created_at': int(time.mktime(time.strptime(pic.get('created_at', ''), '%a, %d %b %Y %H:%M:%S %z'))) if pic.get('created_at') else 0,
-                'dominant_color': pic.get('dominant_color', ''),
-                'count': {
-                    'save': pic.get('aggregate_metadata', {}).get('aggregated_stats', {}).get('saves', 0),
-                    'repin': pic.get('repin_count', 0),
-                },
-                'text': {
-                    'title': pic.get('title', ''),
-                    'auto_alt_text': pic.get('auto_alt_text', ''),
-                }
-            })
-        return pics_data
+    async def get_pics_urls(self, board_id: str, variant: VariantPolicy = None) -> List[str]:
+        pics_data = await self.get_pics_data(board_id, variant=variant)
+        return pics_data.derive(pic['url'] for pic in pics_data)
+
+    async def get_pics_data(self, board_id: str, as_records: bool = False, variant: VariantPolicy = None) -> List[Union[Dict[str, Any], PinRecord]]:
+        return await acollect(self.aiter_pics(board_id, as_records, variant))
 
     async def get_pics_data_origin(self, board_id: str, uname=None, board_slug=None, section_slug=None):
         """
@@ -99,6 +52,39 @@ class Board:
             board_slug: 画板slug
             section_slug: 分区slug
         """
+        return await acollect(self.aiter_pics_origin(board_id, uname, board_slug, section_slug))
+
+    async def aiter_pics(self, board_id: str, as_records: bool = False, variant: VariantPolicy = None, job_key: str = None) -> AsyncIterator[List[Union[Dict[str, Any], PinRecord]]]:
+        """
+        逐页获取画板图片数据
+
+        参数:
+            board_id: 画板ID
+            as_records: 为True时产出PinRecord而不是字典
+            variant: 图片尺寸选择策略(VariantPolicy)，默认使用原图
+            job_key: 检查点任务键，指定后中断的任务以同一个键重新运行时从最后的bookmark继续(需要客户端设置检查点存储)
+        产出:
+            每页的图片数据列表
+        """
+        async for batch in self.aiter_pics_origin(board_id, job_key=job_key):
+            yield normalize_page(self.client, 'BoardFeedResource', batch, as_records, variant)
+
+    async def aiter_pics_origin(self, board_id: str, uname=None, board_slug=None, section_slug=None, job_key: str = None, mark_seen: bool = True) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        逐页获取画板内容(原始数据)
+
+        每获取一页立即产出，不在内存中累积整个画板。
+
+        参数:
+            board_id: 画板ID
+            uname: 用户名
+            board_slug: 画板slug
+            section_slug: 分区slug
+            job_key: 检查点任务键，指定后中断的任务以同一个键重新运行时从最后的bookmark继续(需要客户端设置检查点存储)
+            mark_seen: 是否在取下一页时把上一页记为已见(需要客户端设置已见集合)；为False时由调用方写入后调用 seen.mark_seen
+        产出:
+            每页的原始图片列表
+        """
         board = {
             'board': {
                 'id': board_id,
@@ -109,23 +95,14 @@ class Board:
             shortform = '/'.join([uname, board_slug, section_slug]) if section_slug else '/'.join([uname, board_slug])
         else:
             shortform = None
-        bookmark = None
-        images = []
-
-        while bookmark != '-end-':
-            options = self._build_options(board, section_slug, bookmark)
-
-            # 显示进度
-            i_len = len(images)
-            logger.info(f"获取所有图片 [ {i_len} / ? ]")
-
-            try:
-                batch, bookmark = await self._fetch_batch(options, shortform)
-                images.extend(batch)
-            except Exception as e:
-                logger.error(f"获取数据失败: {e}")
-                break
-
-        i_len = len(images)
-        logger.success(f"找到 {i_len} 张图片{'s' if i_len > 1 else ''}")
-        return images
\ No newline at end of file
+
+        async for batch in AsyncPaginator(
+            self.client, 'BoardFeedResource',
+            lambda bookmark: self._build_options(board, section_slug, bookmark),
+            error=f"获取此板块/分区失败: {shortform}",
+            progress='获取所有图片', summary='张图片', progress_level='INFO',
+            seen=self.client.seen,
+            mark_seen=mark_seen,
+            job_key=job_key,
+        ):
+            yield batch
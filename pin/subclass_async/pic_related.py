@@ -1,9 +1,8 @@
-import httpx
-import asyncio
-from ..utils import logger
-from typing import List, Dict, Any
-import urllib.parse
-import time
+from ..paginator import AsyncPaginator, acollect
+from ..record import PinRecord
+from ..hooks import normalize_page
+from ..variant import VariantPolicy
+from typing import List, Dict, Any, Union, AsyncIterator
 
 class PicRelated:
     """相关图片操作类"""
@@ -17,31 +16,12 @@ class PicRelated:
         """
         self.client = client
 
-    async def get_pics_urls(self, pin_id: str) -> List[str]:
-        pics_data = await self.get_pics_data(pin_id)
-        return [pic['url'] for pic in pics_data]
+    async def get_pics_urls(self, pin_id: str, variant: VariantPolicy = None) -> List[str]:
+        pics_data = await self.get_pics_data(pin_id, variant=variant)
+        return pics_data.derive(pic['url'] for pic in pics_data)
 
-    async def get_pics_data(self, pin_id: str) -> List[Dict[str, Any]]:
-        pics_data_origin = await self.get_pics_data_origin(pin_id)
-        pics_data = []
-        for pic in pics_data_origin:
-            pics_data.append({
-                'id': pic['id'],
-                'url': pic.get('images', {}).get('orig', {}).get('url', ''),
-                'width': pic.get('images', {}).get('orig', {}).get('width', 0),
-                'height': pic.get('images', {}).get('orig', {}).get('height', 0),
-                'created_at': int(time.mktime(time.strptime(pic.get('created_at', ''), '%a, %d %b %Y %H:%M:%S %z'))) if pic.get('created_at') else 0,
-                'dominant_color': pic.get('dominant_color', ''),
-                'count': {
-                    'save': pic.get('aggregate_metadata', {}).get('aggregated_stats', {}).get('saves', 0),
-                    'repin': pic.get('repin_count', 0),
-                },
-                'text': {
-                    'title': pic.get('title', ''),
-                    'auto_alt_text': pic.get('auto_alt_text', ''),
-                }
-            })
-        return pics_data
+    async def get_pics_data(self, pin_id: str, as_records: bool = False, variant: VariantPolicy = None) -> List[Union[Dict[str, Any], PinRecord]]:
+        return await acollect(self.aiter_pics(pin_id, as_records, variant))
 
     async def get_pics_data_origin(self, pin_id: str) -> List[Dict[str, Any]]:
         """
@@ -50,33 +30,46 @@ class PicRelated:
         参数:
             pin_id: 图片ID
         返回:
-            图片列表
+            相关图片列表
         """
-        bookmark = None
-        images = []
+        return await acollect(self.aiter_pics_origin(pin_id))
 
-        while True:
-            # 显示进度
-            i_len = len(images)
-            logger.debug(f"获取相关图片 [ {i_len} / ? ]")
+    async def aiter_pics(self, pin_id: str, as_records: bool = False, variant: VariantPolicy = None, job_key: str = None) -> AsyncIterator[List[Union[Dict[str, Any], PinRecord]]]:
+        """
+        逐页获取相关图片数据
 
-            try:
-                batch, bookmark = await self._fetch_batch(pin_id, bookmark)
-                images.extend(batch)
+        参数:
+            pin_id: 图片ID
+            as_records: 为True时产出PinRecord而不是字典
+            variant: 图片尺寸选择策略(VariantPolicy)，默认使用原图
+            job_key: 检查点任务键，指定后中断的任务以同一个键重新运行时从最后的bookmark继续(需要客户端设置检查点存储)
+        产出:
+            每页的图片数据列表
+        """
+        async for batch in self.aiter_pics_origin(pin_id, job_key=job_key):
+            yield normalize_page(self.client, 'RelatedPinFeedResource', batch, as_records, variant)
 
-                # 如果没有下一页，退出循环
-                if bookmark == "-end-" or bookmark == '%22-end-%22':
-                    break
-            except Exception as e:
-                # 显示错误堆栈
-                import traceback
-                traceback.print_exc()
-                logger.error(f"获取数据失败: {e}")
-                break
+    async def aiter_pics_origin(self, pin_id: str, job_key: str = None, mark_seen: bool = True) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        逐页获取相关图片(原始数据)
 
-        i_len = len(images)
-        logger.success(f"找到 {i_len} 张相关图片{'s' if i_len > 1 else ''}")
-        return images
+        参数:
+            pin_id: 图片ID
+            job_key: 检查点任务键，指定后中断的任务以同一个键重新运行时从最后的bookmark继续(需要客户端设置检查点存储)
+            mark_seen: 是否在取下一页时把上一页记为已见(需要客户端设置已见集合)；为False时由调用方写入后调用 seen.mark_seen
+        产出:
+            每页的原始图片列表
+        """
+        async for batch in AsyncPaginator(
+            self.client, 'RelatedPinFeedResource',
+            lambda bookmark: self._build_options(pin_id, bookmark),
+            error=f"获取相关图片失败: pin_id={pin_id}",
+            progress='获取相关图片', summary='张相关图片',
+            seen=self.client.seen,
+            mark_seen=mark_seen,
+            job_key=job_key,
+        ):
+            yield batch
 
     def _build_options(self, pin_id: str, bookmark: str = None) -> Dict[str, Any]:
         """构建请求参数"""
@@ -90,31 +83,3 @@ class PicRelated:
             options.update({'bookmarks': [bookmark]})
 
         return options
-
-    async def _fetch_batch(self, pin_id: str, bookmark: str = None) -> tuple:
-        """获取一批数据"""
-        options = self._build_options(pin_id, bookmark)
-        post_d = urllib.parse.urlencode({
-            'data': {
-                'options': options,
-                'context': {}
-            },
-            '_': int(time.time()*1000)
-        }).replace('+', '').replace('%27', '%22').replace('%3A%22true%22', '%3Atrue').replace('%3A%22false%22', '%3Afalse')
-
-        for t in (15, 30, 40, 50, 60):
-            try:
-                r = await self.client.client.get(
-                    'https://www.pinterest.com/resource/RelatedPinFeedResource/get/',
-                    params=post_d
-                )
-                data = r.json()
-                batch = data['resource_response']['data']
-                bookmark = data['resource']['options']['bookmarks'][0]
-                return batch, bookmark
-
-            except (httpx.TimeoutException, httpx.ConnectError) as e:
-                logger.warning(f"请求超时,重试中... ({t}s)")
-                await asyncio.sleep(5)
-                if t == 60:  # 最后一次重试失败
-                    raise Exception(f"获取相关图片失败: pin_id={pin_id}")
\ No newline at end of file
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from pathlib import Path, PurePath
 from loguru import logger
 import sys
@@ -38,6 +39,16 @@ def sort_func(x):
     prefix = x.split('.')[0].split('_')[0]
     return int(prefix) if prefix.isdigit() else 0
 
+@lru_cache(maxsize=1)
+def get_user_agent():
+    """
+    获取共享的UserAgent实例
+
+    UserAgent() 每次创建都要加载数据文件，进程内只创建一次。
+    """
+    from fake_useragent import UserAgent
+    return UserAgent()
+
 def setup_logger():
     """配置日志记录器"""
     # 移除默认的处理器
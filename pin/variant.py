@@ -0,0 +1,94 @@
+import re
+from typing import Dict, Any, Optional
+from .normalize import _EMPTY
+
+# pinimg 地址中 originals 之外的固定宽度目录
+PINIMG_WIDTHS = (236, 474, 564, 736)
+_PINIMG_DIR = re.compile(r'^(https?://i\.pinimg\.com/)(originals|\d+x)(/)')
+# 裁剪成固定宽高的变体(如 136x136、60x60)，宽高比与原图不同，不参与按宽度选择
+_CROPPED = re.compile(r'^\d+x\d+$')
+
+
+class VariantPolicy:
+    """图片尺寸(变体)选择策略
+
+    原始数据的 images 中除 orig 外还有 236x、474x、736x 等缩小的版本，
+    缩略图和模型预处理只需要较小的版本，可以大幅减少下载量。三种策略只能指定一种:
+        key: 指定变体名(如 '736x')，没有时使用 orig
+        max_width: 宽度不超过N的最大版本，都超过时使用最小的版本
+        min_width: 宽度不小于N的最小版本，都不满足时使用最大的版本
+    """
+
+    def __init__(self, key: Optional[str] = None, max_width: Optional[int] = None, min_width: Optional[int] = None):
+        if sum(x is not None for x in (key, max_width, min_width)) != 1:
+            raise ValueError("key、max_width、min_width 必须且只能指定一个")
+        self.key = key
+        self.max_width = max_width
+        self.min_width = min_width
+
+    def __repr__(self):
+        if self.key is not None:
+            return f"VariantPolicy(key={self.key!r})"
+        if self.max_width is not None:
+            return f"VariantPolicy(max_width={self.max_width})"
+        return f"VariantPolicy(min_width={self.min_width})"
+
+    def _fits(self, width: int) -> bool:
+        if self.max_width is not None:
+            return width <= self.max_width
+        return width >= self.min_width
+
+    def select(self, images: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        从原始数据的 images 中选择一个变体
+
+        参数:
+            images: 原始图片数据的 images 字段
+        返回:
+            变体字典(url、width、height)，没有可用变体时返回空字典
+        """
+        if self.key is not None:
+            return images.get(self.key) or images.get('orig') or _EMPTY
+        sized = sorted(
+            (v for k, v in images.items() if v and v.get('url') and v.get('width') and not _CROPPED.match(k)),
+            key=lambda v: v['width'],
+        )
+        if not sized:
+            return images.get('orig') or _EMPTY
+        fit = [v for v in sized if self._fits(v['width'])]
+        if self.max_width is not None:
+            return fit[-1] if fit else sized[0]
+        return fit[0] if fit else sized[-1]
+
+    def rewrite_url(self, url: str, width: Optional[int] = None) -> str:
+        """
+        把 i.pinimg.com 的图片地址改写为所选的版本
+
+        用于只有地址(如 get_pics_urls 的结果)时选择版本；其他地址原样返回。
+
+        参数:
+            url: 图片地址
+            width: 原图宽度(地址为原图时有效)，未知时按策略选择固定宽度的版本
+        返回:
+            改写后的地址
+        """
+        m = _PINIMG_DIR.match(url)
+        if not m:
+            return url
+        if m.group(2) != 'originals':
+            # 宽度是已选版本的宽度，不是原图宽度
+            width = None
+        if self.key is not None:
+            target = 'originals' if self.key == 'orig' else self.key
+            if target != 'originals' and not target[:-1].isdigit():
+                return url
+        else:
+            # 比原图宽的固定版本不会更清晰，不作候选；原图宽度未知时视为最大
+            candidates = [(w, f'{w}x') for w in PINIMG_WIDTHS if not width or w < width]
+            candidates.append((width or float('inf'), 'originals'))
+            fit = [c for c in candidates if self._fits(c[0])]
+            if self.max_width is not None:
+                target = (fit[-1] if fit else candidates[0])[1]
+            else:
+                target = (fit[0] if fit else candidates[-1])[1]
+        return m.group(1) + target + m.group(3) + url[m.end():]
@@ -0,0 +1,65 @@
+import pytest
+from pin.checkpoint import CheckpointStore
+from pin.paginator import Paginator
+
+PAGES = 3
+
+
+class FakeClient:
+    """按 bookmark 返回固定页面的客户端"""
+
+    seen = None
+    metrics = None
+
+    def __init__(self, checkpoint):
+        self.checkpoint = checkpoint
+
+    def get_resource(self, url, options, source_url=None):
+        page = int(options.get('bookmarks', ['0'])[0])
+        bookmark = str(page + 1) if page + 1 < PAGES else '-end-'
+        return {
+            'resource_response': {'data': [{'id': f"{options['board_id']}-{page}-{i}"} for i in range(2)]},
+            'resource': {'options': {'bookmarks': [bookmark]}},
+        }
+
+
+def pages(client, board_id, job_key):
+    def build_options(bookmark):
+        options = {'board_id': board_id}
+        if bookmark:
+            options['bookmarks'] = [bookmark]
+        return options
+
+    return Paginator(client, 'BoardFeedResource', build_options, prefetch=False, job_key=job_key)
+
+
+@pytest.fixture
+def client(tmp_path):
+    with CheckpointStore(str(tmp_path / 'checkpoint.sqlite')) as store:
+        yield FakeClient(store)
+
+
+def test_consumer_error_keeps_checkpoint(client):
+    """消费方出错时保留检查点，重新运行只产出剩余页面"""
+    with pytest.raises(OSError):
+        for i, page in enumerate(pages(client, 'b1', 'board:b1')):
+            if i == 1:
+                raise OSError('写入失败')
+    state = client.checkpoint.load('board:b1')
+    assert state is not None and not state['done'] and state['pages'] == 1
+
+    paginator = pages(client, 'b1', 'board:b1')
+    rest = [pin['id'] for page in paginator for pin in page]
+    assert paginator.resumed
+    assert rest == ['b1-1-0', 'b1-1-1', 'b1-2-0', 'b1-2-1']
+    assert client.checkpoint.load('board:b1')['done']
+    assert client.checkpoint.pending() == []
+
+
+def test_job_key_reused_for_other_options(client):
+    it = iter(pages(client, 'b1', 'board:b1'))
+    next(it)
+    next(it)
+    it.close()
+    with pytest.raises(ValueError):
+        next(iter(pages(client, 'b2', 'board:b1')))
@@ -0,0 +1,22 @@
+import asyncio
+import httpx
+from pin.download import Downloader
+
+
+def test_download_all_survives_worker_errors(tmp_path):
+    """下载之外的错误(如磁盘写满)只记为失败，download_all 不会卡住"""
+
+    async def main():
+        async with Downloader(str(tmp_path), max_connections=2) as downloader:
+            downloader.http = httpx.AsyncClient(transport=httpx.MockTransport(lambda r: httpx.Response(200, content=b'x')))
+
+            def full_disk(rows):
+                raise OSError(28, 'No space left on device')
+
+            downloader._manifest.write = full_disk
+            urls = [f'https://i.pinimg.com/originals/{i}.jpg' for i in range(20)]
+            return await asyncio.wait_for(downloader.download_all(urls), 10)
+
+    stats = asyncio.run(main())
+    assert stats.failed == 20
+    assert stats.files == 0
@@ -0,0 +1,121 @@
+import json
+import time
+import multiprocessing
+import urllib.parse
+import httpx
+import pytest
+from pin.jobqueue import SqliteJobQueue
+from pin.runner import ShardedRunner
+from pin.sinks import read_ndjson, read_pins
+
+BOARDS = [f'b{i}' for i in range(12)]
+PAGES = 3
+PAGE_SIZE = 5
+
+
+def board_feed(request: httpx.Request) -> httpx.Response:
+    """模拟画板接口: 每个画板 PAGES 页，每页 PAGE_SIZE 张图片"""
+    if '/resource/' not in request.url.path:
+        return httpx.Response(200, text='<html></html>', headers={'content-type': 'text/html'})
+    options = json.loads(urllib.parse.parse_qs(request.url.query.decode())['data'][0])['options']
+    board_id = options['board_id']
+    page = int(options.get('bookmarks', ['0'])[0])
+    bookmark = str(page + 1) if page + 1 < PAGES else '-end-'
+    pins = [
+        {'id': f'{board_id}-{page}-{i}', 'images': {'orig': {'url': f'https://i.pinimg.com/{board_id}/{page}/{i}.jpg'}}}
+        for i in range(PAGE_SIZE)
+    ]
+    return httpx.Response(200, json={
+        'resource_response': {'data': pins, 'bookmark': bookmark},
+        'resource': {'options': {'bookmarks': [bookmark]}},
+    })
+
+
+@pytest.fixture
+def mock_http(monkeypatch):
+    """让(fork出的)工作进程中的 httpx.AsyncClient 使用 MockTransport"""
+    base = httpx.AsyncClient
+
+    class MockAsyncClient(base):
+        def __init__(self, *args, **kwargs):
+            kwargs.pop('proxies', None)
+            kwargs['transport'] = httpx.MockTransport(board_feed)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(httpx, 'AsyncClient', MockAsyncClient)
+
+
+def test_lease_is_exclusive_until_ack(tmp_path):
+    with SqliteJobQueue(str(tmp_path / 'jobs.sqlite')) as jobs:
+        assert jobs.put_many([('board', 'a'), ('board', 'b'), ('board', 'a')]) == 2
+        first = jobs.lease('w1', 60)
+        second = jobs.lease('w2', 60)
+        assert {first.target, second.target} == {'a', 'b'}
+        assert jobs.lease('w3', 60) is None
+        assert jobs.ack(first)
+        assert not jobs.ack(first)
+        assert jobs.stats() == {'ready': 0, 'leased': 1, 'done': 1, 'failed': 0}
+
+
+def test_finished_job_is_ignored_until_requeued(tmp_path):
+    with SqliteJobQueue(str(tmp_path / 'jobs.sqlite')) as jobs:
+        jobs.put('board', 'a')
+        assert jobs.ack(jobs.lease('w1', 60))
+        assert not jobs.put('board', 'a')
+        assert jobs.lease('w1', 60) is None
+        assert jobs.requeue_many([('board', 'a'), ('board', 'b')]) == 2
+        assert jobs.stats() == {'ready': 2, 'leased': 0, 'done': 0, 'failed': 0}
+        assert jobs.lease('w1', 60).attempts == 1
+
+
+def test_expired_lease_is_released_and_stale_ack_rejected(tmp_path):
+    with SqliteJobQueue(str(tmp_path / 'jobs.sqlite')) as jobs:
+        jobs.put('board', 'a')
+        stale = jobs.lease('w1', 0.05)
+        time.sleep(0.1)
+        fresh = jobs.lease('w2', 60)
+        assert fresh.id == stale.id and fresh.attempts == 2
+        assert not jobs.ack(stale)
+        assert not jobs.extend(stale)
+        assert jobs.ack(fresh)
+
+
+def test_nack_retries_then_fails(tmp_path):
+    with SqliteJobQueue(str(tmp_path / 'jobs.sqlite'), max_attempts=2) as jobs:
+        jobs.put('board', 'a')
+        job = jobs.lease('w1', 60)
+        assert jobs.nack(job, error='boom', delay=60)
+        assert jobs.lease('w1', 60) is None  # 延迟重试
+        assert jobs.nack(job) is False  # 租约已释放
+        with jobs._lock:
+            jobs._db.execute("UPDATE jobs SET available = 0")
+        job = jobs.lease('w1', 60)
+        assert job.attempts == 2
+        assert jobs.nack(job, error='boom')
+        assert jobs.stats()['failed'] == 1
+        assert jobs.failed() == [{'kind': 'board', 'target': 'a', 'attempts': 2, 'error': 'boom'}]
+
+
+def read_ids(output):
+    if output.endswith('.parquet'):
+        return read_pins(output, columns=['id']).column('id').to_pylist()
+    return [pin['id'] for pin in read_ndjson(output)]
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(), reason='需要fork启动工作进程')
+@pytest.mark.parametrize('name', ['out.ndjson', 'out.parquet'])
+def test_workers_share_queue_without_duplicates_or_loss(tmp_path, mock_http, monkeypatch, name):
+    monkeypatch.setattr('pin.runner.RUNNER_COMMIT_INTERVAL', 0.2)
+    monkeypatch.setattr('pin.runner.JOB_POLL_INTERVAL', 0.1)
+    output = str(tmp_path / name)
+    runner = ShardedRunner(
+        output, workers=3, concurrency=2, queue_path=str(tmp_path / 'jobs.sqlite'),
+        rate={'rate': 1000.0, 'capacity': 1000.0, 'max_rate': 1000.0},
+    )
+    stats = runner.run(('board', board) for board in BOARDS)
+
+    ids = read_ids(output)
+    expected = {f'{b}-{p}-{i}' for b in BOARDS for p in range(PAGES) for i in range(PAGE_SIZE)}
+    assert len(ids) == len(set(ids))
+    assert set(ids) == expected
+    assert stats['jobs'] == {'ready': 0, 'leased': 0, 'done': len(BOARDS), 'failed': 0}
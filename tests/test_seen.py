@@ -0,0 +1,63 @@
+import pytest
+from pin.paginator import Paginator
+from pin.seen import SeenSet
+
+PAGES = 3
+
+
+class FakeClient:
+    """按 bookmark 返回固定页面的客户端"""
+
+    seen = None
+    checkpoint = None
+    metrics = None
+
+    def get_resource(self, url, options, source_url=None):
+        page = int(options.get('bookmarks', ['0'])[0])
+        bookmark = str(page + 1) if page + 1 < PAGES else '-end-'
+        return {
+            'resource_response': {'data': [{'id': f'{page}-{i}'} for i in range(3)]},
+            'resource': {'options': {'bookmarks': [bookmark]}},
+        }
+
+
+def pages(seen, **kwargs):
+    return Paginator(
+        FakeClient(), 'BoardFeedResource',
+        lambda bookmark: {'bookmarks': [bookmark]} if bookmark else {},
+        seen=seen, prefetch=False, **kwargs,
+    )
+
+
+@pytest.fixture
+def seen(tmp_path):
+    with SeenSet(str(tmp_path / 'seen.sqlite')) as seen:
+        yield seen
+
+
+def test_filter_does_not_mark(seen):
+    batch = [{'id': 'a'}, {'id': 'b'}, {'id': 'a'}]
+    assert seen.filter_unseen(batch) == [{'id': 'a'}, {'id': 'b'}]
+    assert len(seen) == 0
+    assert seen.mark_seen(batch) == 2
+    assert seen.filter_unseen(batch) == []
+
+
+def test_unconsumed_page_is_not_marked(seen):
+    """消费者处理某页时中断，该页不会被记为已见"""
+    it = iter(pages(seen))
+    next(it)
+    next(it)  # 取第二页时第一页才记为已见
+    it.close()
+    assert len(seen) == 3
+    assert sum(len(page) for page in pages(seen)) == (PAGES - 1) * 3
+
+
+def test_manual_mark(seen):
+    for page in pages(seen, mark_seen=False):
+        pass
+    assert len(seen) == 0
+    for page in pages(seen, mark_seen=False):
+        seen.mark_seen(page)
+    assert len(seen) == PAGES * 3
+    assert sum(len(page) for page in pages(seen)) == 0